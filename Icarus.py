@@ -1,63 +1,33 @@
+import time
+
+# Référence de démarrage pour mesurer l'import et le délai jusqu'au premier statut
+_STARTED_AT = time.perf_counter()
+
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 import asyncio
-import socket
-import ping3
 import os
-from datetime import datetime, timedelta
+import shutil
+import tempfile
+from datetime import timedelta
 import logging
-import pytz
-import re
-import json
-import ftplib
 from io import BytesIO
 
-# Configuration du logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)-8s %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.FileHandler('icarus_bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-# Configuration du fuseau horaire français
-TIMEZONE = pytz.timezone('Europe/Paris')
+import metrics
+import spans
+from alerts import AlertEngine
+from analytics import SessionArrays, summarize as summarize_activity
+from charts import ChartRenderer
+from collector import CollectorMonitor, CollectorParser, CollectorProcess, build_parser
+from export import export as export_history
+from guilds import GuildRegistry, GuildState, ShardScheduler
+from history import HistoryStore
+from icarus_core import TIMEZONE, ServerMonitor, get_config, get_french_time
+from log_search import LogSearch
+from logging_setup import setup_logging
 
-# Chargement de la configuration
-def load_config():
-    """Charge la configuration depuis le fichier config.json"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.error("❌ Fichier config.json non trouvé. Utilisez config_template.json comme modèle.")
-        raise
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ Erreur dans le fichier config.json: {e}")
-        raise
-
-# Chargement de la configuration
-config = load_config()
-
-# Configuration Discord
-DISCORD_TOKEN = config['discord']['token']
-CHANNEL_ID = config['discord']['channel_id']
-
-# Configuration Serveur
-SERVER_IP = config['server']['ip']
-SERVER_PORT = config['server']['port']
-SERVER_PASSWORD = config['server']['password']
-
-# Configuration FTP
-FTP_HOST = config['ftp']['host']
-FTP_PORT = config['ftp']['port']
-FTP_USER = config['ftp']['user']
-FTP_PASS = config['ftp']['password']
-LOG_PATH = config['ftp']['log_path']
+logger = logging.getLogger(__name__)
 
 # Variables globales
 server_history = []
@@ -67,9 +37,17 @@ ping_history = []
 players_data = {}
 server_events = []
 prospect_info = {}
-status_message = None
-current_channel_id = CHANNEL_ID
-last_update_time = None
+first_status_published = False
+
+# Instances créées par init_bot() au démarrage (aucune lecture de config à l'import)
+icarus_parser = None
+server_monitor = None
+collector_process = None  # Mode collecteur : lecture et analyse des logs dans un processus séparé
+alert_engine = None  # Règles d'alerte (section 'alerts' de la configuration)
+archive_search = None  # Recherche plein texte dans l'archive des logs (section 'archive')
+guild_registry = None  # Serveur Icarus suivi par guilde (un seul état partagé en mode mono-guilde)
+shard_scheduler = None  # Mode multi-guildes : boucles de monitoring par shard
+chart_renderer = None  # Graphiques de l'historique rendus dans un pool de processus (section 'charts')
 
 # Initialisation bot
 intents = discord.Intents.default()
@@ -152,8 +130,8 @@ class MyHelpCommand(commands.HelpCommand):
         channel = self.get_destination()
         await channel.send(embed=embed)
 
-# Configuration du client Discord
-client = commands.Bot(
+# Configuration du client Discord (un seul shard tant que le bot est sur peu de guildes)
+client = commands.AutoShardedBot(
     command_prefix='!', 
     intents=intents, 
     help_command=MyHelpCommand(),
@@ -163,607 +141,178 @@ client = commands.Bot(
     )
 )
 
-def get_french_time():
-    """Retourne l'heure française actuelle"""
-    return datetime.now(TIMEZONE)
+BREAKER_LABELS = {
+    'closed': "🟢 fermé",
+    'open': "🔴 ouvert",
+    'half_open': "🟠 semi-ouvert"
+}
 
-class IcarusLogParser:
-    """Parseur de logs spécialisé pour Icarus avec gestion exacte des joueurs"""
+def build_status_embed(server_info, parser):
+    """Construit l'embed de statut à partir d'un instantané de get_server_status"""
+    online = server_info['online']
+    players_count = server_info['players']
+    players_list = server_info['players_list']
+    ping_val = server_info['ping']
+    recent_events = server_info['recent_events']
     
-    def __init__(self):
-        self.events = []
-        self.connected_players = {}  # {player_name: {'connect_time': datetime, 'last_seen': datetime, 'name': str}}
-        self.ftp_available = False
-        self.last_ftp_check = None
-        self.current_prospect = "Unknown"
-        
-        # Patterns regex précis pour détecter les événements exacts d'Icarus
-        self.patterns = {
-            # === CONNEXIONS ===
-            'player_connect': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*ServerTryCompletePlayerInitialisation.*Name=(\w+)', re.IGNORECASE),
-            'player_login': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Login request.*Name=(\w+)', re.IGNORECASE),
-            'player_join': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Join request.*Name=(\w+)', re.IGNORECASE),
-            
-            # === DÉCONNEXIONS ===
-            'player_disconnect': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*DetachPlayerFromSeat.*Name=(\w+)', re.IGNORECASE),
-            'session_exit': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Session.*Exit.*Success', re.IGNORECASE),
-            'connection_lost': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Connection.*(?:Lost|Closed)', re.IGNORECASE),
-            
-            # === CHANGEMENTS DE BIOME ===
-            'biome_change': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*just entered new biome:\s*(\w+)', re.IGNORECASE),
-            
-            # === SAUVEGARDES ===
-            'game_save_begin': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*BeginRecording', re.IGNORECASE),
-            'game_save_end': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*EndRecording', re.IGNORECASE),
-            
-            # === MISSIONS ===
-            'prospect_update': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*UpdateActiveProspectInfo.*ProspectID:\s*(\w+).*ProspectDTKey:\s*(\w+)', re.IGNORECASE),
-            
-            # === ACTIVITÉS DIVERSES ===
-            'crafting_activity': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Crafting.*Requested Add (.+?) to (.+?)', re.IGNORECASE),
-            'character_activity': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*BP_IcarusPlayerCharacterSurvival_C_(\d+)', re.IGNORECASE)
-        }
+    # Couleur et statut selon l'état du serveur
+    if online:
+        embed_color = 0x2ECC71  # Vert
+        status_emoji = "🟢"
+        status_text = "EN LIGNE"
+    else:
+        embed_color = 0xE74C3C  # Rouge
+        status_emoji = "🔴"
+        status_text = "HORS LIGNE"
     
-    def convert_timestamp(self, timestamp_str):
-        """Convertit un timestamp Icarus en datetime"""
-        try:
-            if ':' in timestamp_str:
-                main_part, milliseconds = timestamp_str.split(':', 1)
-            else:
-                main_part = timestamp_str
-                milliseconds = "000"
-            
-            parts = main_part.split('-')
-            if len(parts) >= 2:
-                date_str = parts[0].replace('.', '-')
-                time_str = parts[1].replace('.', ':')
-                
-                full_timestamp = f"{date_str} {time_str}"
-                dt = datetime.strptime(full_timestamp, '%Y-%m-%d %H:%M:%S')
-                
-                if milliseconds.isdigit():
-                    microseconds = min(int(milliseconds[:3]) * 1000, 999999)
-                    dt = dt.replace(microsecond=microseconds)
-                
-                return TIMEZONE.localize(dt) if dt.tzinfo is None else dt
-            
-        except Exception as e:
-            logger.error(f"Erreur parsing timestamp {timestamp_str}: {e}")
-        
-        return None
+    # Titre principal selon l'exemple
+    title = "🎮 SERVEUR ICARUS - FRÈRES DE SURVIE"
     
-    async def read_logs_ftp(self):
-        """Lit les logs depuis le serveur FTP"""
-        events = []
-        ftp = None
-        
-        try:
-            logger.info("🔄 Connexion FTP...")
-            ftp = ftplib.FTP()
-            ftp.connect(FTP_HOST, FTP_PORT, timeout=30)
-            ftp.login(FTP_USER, FTP_PASS)
-            
-            # Lecture du fichier log
-            bio = BytesIO()
-            try:
-                ftp.retrbinary(f'RETR {LOG_PATH}', bio.write)
-                content = bio.getvalue().decode('utf-8', errors='ignore')
-                
-                # Analyse des 400 dernières lignes
-                lines = content.strip().split('\n')[-400:]
-                logger.info(f"📋 Analyse de {len(lines)} lignes de logs")
-                
-                for line in lines:
-                    if not line.strip():
-                        continue
-                    
-                    event = self.parse_log_line(line)
-                    if event:
-                        events.append(event)
-                
-                self.ftp_available = True
-                self.last_ftp_check = get_french_time()
-                logger.info(f"✅ {len(events)} événements extraits - {len(self.connected_players)} joueurs connectés")
-                
-                # Liste les joueurs connectés
-                if self.connected_players:
-                    player_names = list(self.connected_players.keys())
-                    logger.info(f"👥 Joueurs: {', '.join(player_names)}")
-                
-            except Exception as e:
-                logger.error(f"❌ Erreur lecture fichier: {e}")
-                self.ftp_available = False
-                
-        except Exception as e:
-            logger.error(f"❌ Erreur FTP: {e}")
-            self.ftp_available = False
-        finally:
-            if ftp:
-                try:
-                    ftp.quit()
-                except:
-                    try:
-                        ftp.close()
-                    except:
-                        pass
-        
-        return events
+    # Description avec statut
+    ping_text = f"{ping_val}ms" if ping_val and ping_val > 0 else "N/A"
+    prospect_name = parser.current_prospect if parser.current_prospect != "Unknown" else "Avant-poste Olympus"
     
-    def parse_log_line(self, line):
-        """Parse une ligne de log avec détection précise des événements Icarus"""
-        if not line.strip():
-            return None
-            
-        try:
-            # === DÉTECTION DES CONNEXIONS (ServerTryCompletePlayerInitialisation) ===
-            match = self.patterns['player_connect'].search(line)
-            if match and len(match.groups()) >= 2:
-                timestamp_str = match.group(1)
-                player_name = match.group(2).strip()
-                timestamp = self.convert_timestamp(timestamp_str)
-                
-                if timestamp and player_name and len(player_name) > 2:
-                    # Vérifie si c'est un nouveau joueur
-                    if player_name not in self.connected_players:
-                        self.connected_players[player_name] = {
-                            'connect_time': timestamp,
-                            'last_seen': timestamp,
-                            'name': player_name
-                        }
-                        
-                        logger.info(f"🟢 CONNEXION détectée: {player_name}")
-                        return {
-                            'timestamp': timestamp,
-                            'type': 'player_connect',
-                            'player_name': player_name,
-                            'raw_line': line.strip()
-                        }
-                    else:
-                        # Met à jour la dernière activité
-                        self.connected_players[player_name]['last_seen'] = timestamp
-            
-            # === DÉTECTION DES DÉCONNEXIONS (DetachPlayerFromSeat) ===
-            match = self.patterns['player_disconnect'].search(line)
-            if match and len(match.groups()) >= 2:
-                timestamp_str = match.group(1)
-                player_name = match.group(2).strip()
-                timestamp = self.convert_timestamp(timestamp_str)
-                
-                if timestamp and player_name in self.connected_players:
-                    del self.connected_players[player_name]
-                    logger.info(f"🔴 DÉCONNEXION détectée: {player_name}")
-                    return {
-                        'timestamp': timestamp,
-                        'type': 'player_disconnect',
-                        'player_name': player_name,
-                        'raw_line': line.strip()
-                    }
-            
-            # === DÉTECTION DES CHANGEMENTS DE BIOME ===
-            match = self.patterns['biome_change'].search(line)
-            if match and len(match.groups()) >= 2:
-                timestamp_str = match.group(1)
-                biome_name = match.group(2).strip()
-                timestamp = self.convert_timestamp(timestamp_str)
-                
-                if timestamp and biome_name:
-                    # Trouve le joueur le plus récemment actif pour associer le changement de biome
-                    active_player = None
-                    if self.connected_players:
-                        most_recent = max(
-                            self.connected_players.items(),
-                            key=lambda x: x[1]['last_seen']
-                        )
-                        active_player = most_recent[0]
-                        # Met à jour l'activité du joueur
-                        self.connected_players[active_player]['last_seen'] = timestamp
-                    
-                    logger.info(f"🌍 CHANGEMENT DE BIOME: {active_player or 'Joueur'} → {biome_name}")
-                    return {
-                        'timestamp': timestamp,
-                        'type': 'biome_change',
-                        'player_name': active_player,
-                        'biome_name': biome_name,
-                        'raw_line': line.strip()
-                    }
-            
-            # === DÉTECTION DES SAUVEGARDES (BeginRecording/EndRecording) ===
-            match = self.patterns['game_save_begin'].search(line)
-            if match:
-                timestamp_str = match.group(1)
-                timestamp = self.convert_timestamp(timestamp_str)
-                
-                if timestamp:
-                    logger.info(f"💾 SAUVEGARDE détectée")
-                    return {
-                        'timestamp': timestamp,
-                        'type': 'game_save',
-                        'raw_line': line.strip()
-                    }
-            
-            match = self.patterns['game_save_end'].search(line)
-            if match:
-                timestamp_str = match.group(1)
-                timestamp = self.convert_timestamp(timestamp_str)
-                
-                if timestamp:
-                    # Met à jour l'activité de tous les joueurs connectés
-                    for player_name in self.connected_players:
-                        self.connected_players[player_name]['last_seen'] = timestamp
-                    
-                    return {
-                        'timestamp': timestamp,
-                        'type': 'game_save_complete',
-                        'raw_line': line.strip()
-                    }
-            
-            # === DÉTECTION DES MISSIONS ===
-            match = self.patterns['prospect_update'].search(line)
-            if match and len(match.groups()) >= 3:
-                timestamp_str = match.group(1)
-                prospect_id = match.group(2)
-                prospect_key = match.group(3).strip()
-                timestamp = self.convert_timestamp(timestamp_str)
-                
-                if timestamp:
-                    prospect_name = prospect_key.replace('_', ' ').title()
-                    self.current_prospect = prospect_name
-                    
-                    # Met à jour l'activité des joueurs connectés
-                    for player_name in self.connected_players:
-                        self.connected_players[player_name]['last_seen'] = timestamp
-                    
-                    logger.info(f"🎯 MISSION mise à jour: {prospect_name}")
-                    return {
-                        'timestamp': timestamp,
-                        'type': 'prospect_update',
-                        'prospect_id': prospect_id,
-                        'prospect_name': prospect_name,
-                        'raw_line': line.strip()
-                    }
-            
-            # === AUTRES DÉCONNEXIONS GÉNÉRIQUES ===
-            for pattern_name in ['session_exit', 'connection_lost']:
-                match = self.patterns[pattern_name].search(line)
-                if match:
-                    timestamp_str = match.group(1)
-                    timestamp = self.convert_timestamp(timestamp_str)
-                    
-                    if timestamp and self.connected_players:
-                        # Prend le joueur le plus récemment actif
-                        most_recent_player = max(
-                            self.connected_players.items(),
-                            key=lambda x: x[1]['last_seen']
-                        )
-                        disconnecting_player = most_recent_player[0]
-                        del self.connected_players[disconnecting_player]
-                        
-                        logger.info(f"🔴 DÉCONNEXION générique: {disconnecting_player}")
-                        return {
-                            'timestamp': timestamp,
-                            'type': 'player_disconnect',
-                            'player_name': disconnecting_player,
-                            'raw_line': line.strip()
-                        }
-            
-        except Exception as e:
-            logger.error(f"Erreur parsing ligne: {e}")
-        
-        return None
+    description = f"{status_emoji} {status_text} • {players_count} joueur{'s' if players_count != 1 else ''} connecté{'s' if players_count != 1 else ''}"
     
-    def add_events(self, new_events):
-        """Ajoute de nouveaux événements"""
-        cutoff_time = get_french_time() - timedelta(hours=24)
-        
-        # Filtre les événements anciens
-        self.events = [e for e in self.events if e['timestamp'] > cutoff_time]
-        
-        # Ajoute les nouveaux événements
-        for event in new_events:
-            if event and event.get('timestamp') and event['timestamp'] > cutoff_time:
-                self.events.append(event)
-        
-        # Trie et limite
-        self.events.sort(key=lambda x: x['timestamp'])
-        if len(self.events) > 500:
-            self.events = self.events[-400:]
-        
-        # Nettoie les données anciennes
-        self.cleanup_old_data()
+    embed = discord.Embed(
+        title=title,
+        description=description,
+        color=embed_color,
+        timestamp=get_french_time()
+    )
     
-    def cleanup_old_data(self):
-        """Nettoie les joueurs inactifs"""
-        cutoff_time = get_french_time() - timedelta(hours=24)
-        current_time = get_french_time()
-        
-        # Nettoie les événements anciens
-        self.events = [e for e in self.events if e['timestamp'] > cutoff_time]
-        
-        # Retirer les joueurs inactifs (plus de 45 minutes)
-        inactive_players = []
-        for player_name, data in self.connected_players.items():
-            time_since_activity = (current_time - data['last_seen']).total_seconds()
-            if time_since_activity > 2700:  # 45 minutes
-                inactive_players.append(player_name)
-        
-        for player_name in inactive_players:
-            del self.connected_players[player_name]
-            logger.info(f"🔴 Joueur retiré (inactif 45min): {player_name}")
+    # === ÉTAT SERVEUR ===
+    server_state = f"🟢 Serveur: {status_text} ({ping_text}) • 🎯 Mission: {prospect_name}"
     
-    def get_recent_events(self, count=5):
-        """Retourne les événements récents"""
-        return sorted(self.events, key=lambda x: x['timestamp'], reverse=True)[:count]
+    embed.add_field(
+        name="🌐 ÉTAT SERVEUR",
+        value=server_state,
+        inline=False
+    )
     
-    def get_server_stats(self):
-        """Génère des statistiques exactes"""
-        now = get_french_time()
-        
-        # Nettoie d'abord les données anciennes
-        self.cleanup_old_data()
-        
-        # Événements récents (2 heures)
-        recent_events = [e for e in self.events if (now - e['timestamp']).total_seconds() < 7200]
-        
-        # Compte les événements
-        connections = len([e for e in recent_events if e['type'] == 'player_connect'])
-        disconnections = len([e for e in recent_events if e['type'] == 'player_disconnect'])
-        saves = len([e for e in recent_events if e['type'] == 'game_save'])
-        
-        # JOUEURS ACTUELLEMENT CONNECTÉS (valeur exacte)
-        current_active_players = len(self.connected_players)
-        active_player_names = [data['name'] for data in self.connected_players.values()]
-        
-        # Événements récents
-        recent_crafts = 0
-        recent_saves = 0
-        activity_by_hour = {}
-        
-        if self.events:  # Vérifie si self.events n'est pas None ou vide
-            recent_crafts = len([e for e in self.events if isinstance(e, dict) and e.get('type') == 'player_craft' 
-                               and (now - e.get('timestamp', now)).total_seconds() < 3600])
-            
-            recent_saves = len([e for e in self.events if isinstance(e, dict) and e.get('type') == 'game_save' 
-                              and (now - e.get('timestamp', now)).total_seconds() < 3600])
+    # === JOUEURS ACTIFS ===
+    if players_count > 0:
+        players_section = f"👥 JOUEURS ACTIFS ({players_count})\n"
+        
+        for player_name in players_list:
+            # Calculer le temps de connexion
+            connect_time = "N/A"
+            if player_name in parser.connected_players:
+                player_data = parser.connected_players[player_name]
+                if 'connect_time' in player_data:
+                    now = get_french_time()
+                    connect_dt = player_data['connect_time']
+                    if hasattr(connect_dt, 'replace'):
+                        # S'assurer que les deux datetime ont le même timezone
+                        if connect_dt.tzinfo is None:
+                            connect_dt = TIMEZONE.localize(connect_dt)
+                        if now.tzinfo is None:
+                            now = TIMEZONE.localize(now)
+                        
+                        duration = now - connect_dt
+                        total_minutes = int(duration.total_seconds() / 60)
+                        if total_minutes < 60:
+                            connect_time = f"{total_minutes}min"
+                        else:
+                            hours = total_minutes // 60
+                            minutes = total_minutes % 60
+                            connect_time = f"{hours}h{minutes:02d}min" if minutes > 0 else f"{hours}h"
             
-            # Activité par heure (dernières 24h)
-            for event in self.events:
-                if (isinstance(event, dict) and 'timestamp' in event and 
-                    (now - event['timestamp']).total_seconds() < 86400):
-                    hour = event['timestamp'].hour
-                    activity_by_hour[hour] = activity_by_hour.get(hour, 0) + 1
-        
-        return {
-            'active_players': current_active_players,
-            'active_player_names': active_player_names,
-            'connections': connections,
-            'disconnections': disconnections,
-            'recent_saves': saves,
-            'current_prospect': self.current_prospect,
-            'total_events': len(self.events),
-            'recent_events': recent_events[-5:] if recent_events else [],
-            'recent_crafts': recent_crafts,
-            'activity_by_hour': activity_by_hour
-        }
-
-# Créer l'instance
-icarus_parser = IcarusLogParser()
-
-class ServerMonitor:
-    """Classe pour gérer la surveillance du serveur"""
+            players_section += f"🟢 {player_name} • Connecté depuis {connect_time}\n"
+    else:
+        players_section = "👥 JOUEURS ACTIFS (0)\n❌ Aucun joueur connecté"
     
-    def __init__(self):
-        self.last_check = None
+    embed.add_field(
+        name="👥 JOUEURS ACTIFS",
+        value=players_section,
+        inline=False
+    )
     
-    async def get_server_ping(self):
-        """Mesure le ping du serveur"""
-        try:
-            loop = asyncio.get_event_loop()
-            ping = await loop.run_in_executor(None, ping3.ping, SERVER_IP, 3)
-            return round(ping * 1000, 1) if ping else None
-        except Exception as e:
-            logger.warning(f"Erreur ping: {e}")
-            return None
+    # === ACTIVITÉ RÉCENTE ===
+    activity_section = "📋 ACTIVITÉ RÉCENTE\n"
     
-    async def check_port(self):
-        """Vérifie si le port est ouvert"""
-        try:
-            future = asyncio.open_connection(SERVER_IP, SERVER_PORT)
-            reader, writer = await asyncio.wait_for(future, timeout=5)
-            writer.close()
-            await writer.wait_closed()
-            return True
-        except Exception:
-            return False
-    
-    async def get_server_status(self):
-        """Récupère le statut complet du serveur"""
-        try:
-            # Lecture des logs FTP
-            log_events = await icarus_parser.read_logs_ftp()
-            icarus_parser.add_events(log_events)
-            
-            # Récupère les stats
-            stats = icarus_parser.get_server_stats()
-            
-            # Test de connectivité
-            ping = await self.get_server_ping()
-            port_open = await self.check_port()
-            
-            return {
-                'name': 'Frères de Survie - Icarus',
-                'players': stats['active_players'],
-                'players_list': stats['active_player_names'],
-                'max_players': 8,
-                'map': stats['current_prospect'],
-                'ping': ping if ping else 0,
-                'port_open': port_open,
-                'online': icarus_parser.ftp_available,
-                'recent_events': stats['recent_events'],
-                'connections': stats['connections'],
-                'disconnections': stats['disconnections'],
-                'recent_saves': stats['recent_saves']
-            }
+    if recent_events and len(recent_events) > 0:
+        # Prendre les 3 derniers événements et les inverser pour avoir le plus récent en haut
+        recent_activity = []
+        for event in reversed(recent_events[-3:]):
+            timestamp_str = event.get('timestamp', 'N/A')
+            if hasattr(timestamp_str, 'strftime'):
+                time_str = timestamp_str.strftime('%H:%M:%S')
+            else:
+                time_str = str(timestamp_str)[:8]
             
-        except Exception as e:
-            logger.error(f"Erreur get_server_status: {e}")
-            return {
-                'name': 'Frères de Survie - Icarus',
-                'players': 0,
-                'players_list': [],
-                'max_players': 8,
-                'map': 'Unknown',
-                'ping': 0,
-                'port_open': False,
-                'online': False,
-                'recent_events': [],
-                'connections': 0,
-                'disconnections': 0,
-                'recent_saves': 0
-            }
-
-# Créer l'instance du monitor
-server_monitor = ServerMonitor()
+            if event['type'] == 'player_connect':
+                player_name = event.get('player_name', 'Joueur')
+                recent_activity.append(f"🟢 {time_str} {player_name} connecté")
+            elif event['type'] == 'player_disconnect':
+                player_name = event.get('player_name', 'Joueur')
+                recent_activity.append(f"🔴 {time_str} {player_name} déconnecté")
+            elif event['type'] == 'biome_change':
+                player_name = event.get('player_name', 'Joueur')
+                biome_name = event.get('biome_name', 'Biome')
+                recent_activity.append(f"🌍 {time_str} {player_name} → Biome {biome_name}")
+            elif event['type'] == 'game_save':
+                recent_activity.append(f"💾 {time_str} Sauvegarde effectuée")
+            elif event['type'] == 'prospect_update':
+                prospect_name = event.get('prospect_name', 'Mission')
+                recent_activity.append(f"🎯 {time_str} Mission: {prospect_name}")
+        
+        if recent_activity:
+            activity_section += "\n".join(recent_activity)
+        else:
+            activity_section += "✅ Serveur actif, aucun événement récent"
+    else:
+        activity_section += "⏳ Aucune activité récente détectée"
+    
+    embed.add_field(
+        name="📋 ACTIVITÉ RÉCENTE",
+        value=activity_section,
+        inline=False
+    )
+    
+    # === ÉTAT TECHNIQUE ===
+    current_time = get_french_time().strftime('%H:%M:%S')
+    tech_status = f"📡 Bot: 🟢 Logs en temps réel • Dernière vérification: {current_time}"
+    stale_since = server_info.get('stale_since')
+    if stale_since:
+        # FTP injoignable : joueurs et événements affichés sont ceux de la dernière lecture réussie
+        tech_status = (f"📡 Bot: 🟠 Logs FTP indisponibles depuis {stale_since.strftime('%H:%M')} • "
+                       f"données figées • Disjoncteur: {BREAKER_LABELS.get(server_info.get('breaker'), '—')}")
+    
+    # Durée des sauvegardes : premier signe de ralentissement quand le monde grossit
+    saves = server_info.get('saves')
+    if saves and saves['count']:
+        tech_status += f"\n💾 Sauvegardes: p50 {saves['p50']:.1f}s • p95 {saves['p95']:.1f}s"
+        if saves['last'] and saves['last']['regression']:
+            tech_status += f" • 🐢 dernière lente ({saves['last']['duration']:.1f}s)"
+    
+    # Débit du log serveur : un long silence signale un serveur figé avant même sa reprise
+    log_flow = server_info.get('log_flow')
+    if log_flow and log_flow['lines_per_second'] is not None:
+        tech_status += (f"\n📈 Logs serveur: {log_flow['lines_per_second']:.1f} lignes/s"
+                        f" • écart max {log_flow['max_gap_seconds']:.0f}s")
+        if log_flow['stalled']:
+            tech_status += f" • 🧊 silence depuis {log_flow['silence_seconds'] / 60:.0f} min"
+        if log_flow['restarts']:
+            tech_status += f" • 🔁 {log_flow['restarts']} redémarrage(s) récent(s)"
+    
+    embed.add_field(
+        name="🔧 ÉTAT TECHNIQUE",
+        value=tech_status,
+        inline=False
+    )
+    
+    return embed
 
-async def create_enhanced_embed():
+async def create_enhanced_embed(state):
     """Crée l'embed avec le format exact demandé dans l'exemple"""
     try:
-        server_info = await server_monitor.get_server_status()
-        
-        online = server_info['online']
-        players_count = server_info['players']
-        players_list = server_info['players_list']
-        ping_val = server_info['ping']
-        recent_events = server_info['recent_events']
-        
-        # Couleur et statut selon l'état du serveur
-        if online:
-            embed_color = 0x2ECC71  # Vert
-            status_emoji = "🟢"
-            status_text = "EN LIGNE"
-        else:
-            embed_color = 0xE74C3C  # Rouge
-            status_emoji = "🔴"
-            status_text = "HORS LIGNE"
-        
-        # Titre principal selon l'exemple
-        title = "🎮 SERVEUR ICARUS - FRÈRES DE SURVIE"
-        
-        # Description avec statut
-        ping_text = f"{ping_val}ms" if ping_val and ping_val > 0 else "N/A"
-        prospect_name = icarus_parser.current_prospect if icarus_parser.current_prospect != "Unknown" else "Avant-poste Olympus"
-        
-        description = f"{status_emoji} {status_text} • {players_count} joueur{'s' if players_count != 1 else ''} connecté{'s' if players_count != 1 else ''}"
-        
-        embed = discord.Embed(
-            title=title,
-            description=description,
-            color=embed_color,
-            timestamp=get_french_time()
-        )
-        
-        # === ÉTAT SERVEUR ===
-        server_state = f"🟢 Serveur: {status_text} ({ping_text}) • 🎯 Mission: {prospect_name}"
-        
-        embed.add_field(
-            name="🌐 ÉTAT SERVEUR",
-            value=server_state,
-            inline=False
-        )
-        
-        # === JOUEURS ACTIFS ===
-        if players_count > 0:
-            players_section = f"👥 JOUEURS ACTIFS ({players_count})\n"
-            
-            for player_name in players_list:
-                # Calculer le temps de connexion
-                connect_time = "N/A"
-                if player_name in icarus_parser.connected_players:
-                    player_data = icarus_parser.connected_players[player_name]
-                    if 'connect_time' in player_data:
-                        now = get_french_time()
-                        connect_dt = player_data['connect_time']
-                        if hasattr(connect_dt, 'replace'):
-                            # S'assurer que les deux datetime ont le même timezone
-                            if connect_dt.tzinfo is None:
-                                connect_dt = TIMEZONE.localize(connect_dt)
-                            if now.tzinfo is None:
-                                now = TIMEZONE.localize(now)
-                            
-                            duration = now - connect_dt
-                            total_minutes = int(duration.total_seconds() / 60)
-                            if total_minutes < 60:
-                                connect_time = f"{total_minutes}min"
-                            else:
-                                hours = total_minutes // 60
-                                minutes = total_minutes % 60
-                                connect_time = f"{hours}h{minutes:02d}min" if minutes > 0 else f"{hours}h"
-                
-                players_section += f"🟢 {player_name} • Connecté depuis {connect_time}\n"
-        else:
-            players_section = "👥 JOUEURS ACTIFS (0)\n❌ Aucun joueur connecté"
-        
-        embed.add_field(
-            name="👥 JOUEURS ACTIFS",
-            value=players_section,
-            inline=False
-        )
-        
-        # === ACTIVITÉ RÉCENTE ===
-        activity_section = "📋 ACTIVITÉ RÉCENTE\n"
-        
-        if recent_events and len(recent_events) > 0:
-            # Prendre les 3 derniers événements et les inverser pour avoir le plus récent en haut
-            recent_activity = []
-            for event in reversed(recent_events[-3:]):
-                timestamp_str = event.get('timestamp', 'N/A')
-                if hasattr(timestamp_str, 'strftime'):
-                    time_str = timestamp_str.strftime('%H:%M:%S')
-                else:
-                    time_str = str(timestamp_str)[:8]
-                
-                if event['type'] == 'player_connect':
-                    player_name = event.get('player_name', 'Joueur')
-                    recent_activity.append(f"🟢 {time_str} {player_name} connecté")
-                elif event['type'] == 'player_disconnect':
-                    player_name = event.get('player_name', 'Joueur')
-                    recent_activity.append(f"🔴 {time_str} {player_name} déconnecté")
-                elif event['type'] == 'biome_change':
-                    player_name = event.get('player_name', 'Joueur')
-                    biome_name = event.get('biome_name', 'Biome')
-                    recent_activity.append(f"🌍 {time_str} {player_name} → Biome {biome_name}")
-                elif event['type'] == 'game_save':
-                    recent_activity.append(f"💾 {time_str} Sauvegarde effectuée")
-                elif event['type'] == 'prospect_update':
-                    prospect_name = event.get('prospect_name', 'Mission')
-                    recent_activity.append(f"🎯 {time_str} Mission: {prospect_name}")
-            
-            if recent_activity:
-                activity_section += "\n".join(recent_activity)
-            else:
-                activity_section += "✅ Serveur actif, aucun événement récent"
-        else:
-            activity_section += "⏳ Aucune activité récente détectée"
-        
-        embed.add_field(
-            name="📋 ACTIVITÉ RÉCENTE",
-            value=activity_section,
-            inline=False
-        )
-        
-        # === ÉTAT TECHNIQUE ===
-        current_time = get_french_time().strftime('%H:%M:%S')
-        tech_status = f"📡 Bot: 🟢 Logs en temps réel • Dernière vérification: {current_time}"
-        
-        embed.add_field(
-            name="🔧 ÉTAT TECHNIQUE",
-            value=tech_status,
-            inline=False
-        )
-        
-        return embed
+        server_info = await state.monitor.get_server_status()
+        with metrics.Timer(metrics.EMBED_BUILD_DURATION), spans.span('embed_build'):
+            return build_status_embed(server_info, state.parser)
         
     except Exception as e:
-        logger.error(f"Erreur création embed: {e}")
+        logger.error("Erreur création embed: %s", e)
         
         # Embed d'erreur
         error_embed = discord.Embed(
@@ -775,288 +324,404 @@ async def create_enhanced_embed():
         
         return error_embed
 
-class ServerConnectView(discord.ui.View):
-    """Vue avec boutons pour se connecter au serveur"""
+def build_connect_button_embed(server):
+    """Construit l'embed d'aide à la connexion envoyé par le bouton « Se Connecter »"""
+    embed = discord.Embed(
+        title="🚀 **COMMENT REJOINDRE LE SERVEUR**",
+        description=(
+            f"Voici comment te connecter au serveur Icarus :\n"
+            f"```/connect {server['ip']}:{server['port']} {server['password']}```"
+        ),
+        color=0x00D9FF
+    )
+    
+    # Ajouter la méthode de connexion directe
+    embed.add_field(
+        name="🎮 **Méthode de connexion**",
+        value=(
+            f"1. Lance **Icarus** depuis Steam\n"
+            f"2. Appuie sur la touche **`** (au-dessus de Tab) pour ouvrir la console\n"
+            f"3. Copie-colle la commande de connexion ci-dessus\n"
+            f"4. Appuie sur **Entrée**"
+        ),
+        inline=False
+    )
+    
+    # Ajouter la méthode manuelle
+    embed.add_field(
+        name="🔍 **Méthode manuelle**",
+        value=(
+            f"1. Lance Steam\n"
+            f"2. Ouvre Icarus\n"
+            f"3. Va dans `Multijoueur`\n"
+            f"4. Clique sur `Rejoindre par IP`\n"
+            f"5. Saisis: `{server['ip']}:{server['port']}`\n"
+            f"6. Mot de passe: `{server['password']}`"
+        ),
+        inline=False
+    )
+    
+    # Ajouter des conseils
+    embed.add_field(
+        name="💡 **Conseils**",
+        value=(
+            "• Assure-toi que Steam est bien lancé\n"
+            "• Vérifie ta connexion internet\n"
+            "• Si tu rencontres des problèmes, redémarre Steam"
+        ),
+        inline=False
+    )
+    
+    return embed
+
+def format_duration(seconds):
+    """Formate une durée en « 37min », « 2h05min » ou « 3j 4h »"""
+    total_minutes = int(seconds // 60)
+    if total_minutes < 60:
+        return f"{total_minutes}min"
+    hours, minutes = divmod(total_minutes, 60)
+    if hours >= 24:
+        return f"{hours // 24}j {hours % 24}h"
+    return f"{hours}h{minutes:02d}min" if minutes > 0 else f"{hours}h"
+
+def build_stats_embed(stats, snapshot_time, parser):
+    """Construit l'embed des statistiques depuis le dernier relevé (statut et statistiques du même cycle)"""
+    stats_embed = discord.Embed(
+        title="📊 **STATISTIQUES DU SERVEUR**",
+        color=0x00D9FF,
+        timestamp=snapshot_time
+    )
+    
+    # Informations générales : démarrage = dernier redémarrage vu dans le log
+    start_time = stats['log_flow']['last_restart']
+    uptime = format_duration((snapshot_time - start_time).total_seconds()) if start_time else 'Inconnu'
+    stats_embed.add_field(
+        name="📊 **STATISTIQUES**",
+        value=f"👥 **Joueurs connectés:** {stats['active_players']}\n"
+              f"📅 **Démarrage:** {start_time.strftime('%d/%m/%Y %H:%M') if start_time else 'Inconnu'}\n"
+              f"⏳ **Temps de fonctionnement:** {uptime}\n"
+              f"📝 **Mission actuelle:** {stats['current_prospect']}",
+        inline=True
+    )
+    
+    # Activité récente (2 heures), la plus récente en haut
+    recent_activity = [format_event_line(event, '%H:%M') for event in reversed(stats['recent_events'])]
+    stats_embed.add_field(
+        name="🕒 **ACTIVITÉ RÉCENTE**",
+        value="\n".join(recent_activity) if recent_activity else "Aucune activité récente",
+        inline=False
+    )
+    
+    # Joueurs connectés
+    if stats['active_player_names']:
+        players_list = []
+        for name in stats['active_player_names']:
+            player = parser.connected_players.get(name)
+            connect_time = player['connect_time'].strftime('%H:%M') if player else '—'
+            players_list.append(f"• {name} (connecté à {connect_time})")
+        
+        stats_embed.add_field(
+            name=f"👥 **JOUEURS CONNECTÉS ({len(players_list)})**",
+            value="\n".join(players_list)[:1024],
+            inline=False
+        )
+    
+    # Statistiques d'activité
+    activity_stats = f"🔗 **Connexions récentes:** {stats['connections']}\n"
+    activity_stats += f"📤 **Déconnexions récentes:** {stats['disconnections']}\n"
+    activity_stats += f"💾 **Sauvegardes récentes:** {stats['recent_saves']}\n"
+    activity_stats += f"🔨 **Crafts (1h):** {stats['recent_crafts']}\n"
+    activity_stats += f"📋 **Total événements:** {stats['total_events']}\n"
+    activity_stats += f"🗺️ **Mission actuelle:** {stats['current_prospect']}"
+    
+    stats_embed.add_field(
+        name="📈 **ACTIVITÉ (2 HEURES)**",
+        value=activity_stats,
+        inline=True
+    )
+    
+    # Durées des sauvegardes
+    saves = stats['saves']
+    if saves['count']:
+        saves_stats = f"⏱️ **Durée p50 / p95:** {saves['p50']:.1f}s / {saves['p95']:.1f}s\n"
+        if saves['interval_p50']:
+            saves_stats += f"🔁 **Intervalle médian:** {saves['interval_p50'] / 60:.0f} min\n"
+        saves_stats += f"🐢 **Sauvegardes lentes:** {saves['regressions']} sur {saves['count']}"
+        if saves['last']:
+            saves_stats += f"\n💾 **Dernière:** {saves['last']['duration']:.1f}s à {saves['last']['end'].strftime('%H:%M')}"
+        
+        stats_embed.add_field(
+            name="💾 **SAUVEGARDES**",
+            value=saves_stats,
+            inline=True
+        )
+    
+    # Craft par joueur et stations les plus utilisées (compteurs agrégés)
+    if stats['player_activity']:
+        crafting_lines = [
+            f"• {name}: {totals['crafts']} crafts, {totals['actions']} actions"
+            for name, totals in sorted(stats['player_activity'].items(), key=lambda x: -x[1]['crafts'])[:8]
+        ]
+        top_stations = sorted(stats['crafting_stations'].items(), key=lambda x: -x[1])[:3]
+        if top_stations:
+            crafting_lines.append("🏭 " + ", ".join(f"{station.replace('_', ' ')} ({count})" for station, count in top_stations))
+        
+        stats_embed.add_field(
+            name="🔨 **ARTISANAT (1 HEURE)**",
+            value="\n".join(crafting_lines),
+            inline=False
+        )
+    
+    # État technique
+    log_source = stats['log_source']
+    tech_status = f"🔗 **FTP:** {'🟢 Connecté' if parser.ftp_available else '🔴 Déconnecté'}\n"
+    if log_source['stale_since']:
+        tech_status += f"🟠 **Données figées depuis:** {log_source['stale_since'].strftime('%H:%M:%S')}\n"
+    tech_status += f"⛔ **Disjoncteur:** {BREAKER_LABELS[log_source['breaker']['state']]}\n"
+    tech_status += f"⏰ **Dernière vérification:** {snapshot_time.strftime('%H:%M:%S')}\n"
+    tech_status += f"🎯 **Patterns actifs:** {len(parser.patterns)}\n"
+    tech_status += f"📊 **Précision:** 95%+ des événements détectés"
+    
+    stats_embed.add_field(
+        name="🔧 **ÉTAT TECHNIQUE**",
+        value=tech_status,
+        inline=True
+    )
+    
+    return stats_embed
+
+# Réponse des commandes dans une guilde absente de la section 'guilds'
+NOT_CONFIGURED = "❌ Aucun serveur Icarus n'est configuré pour ce serveur Discord."
+
+def guild_state(guild_id):
+    """Serveur Icarus suivi pour la guilde (l'unique état en mode mono-guilde, None si non configurée)"""
+    return guild_registry.get(guild_id) if guild_registry else None
+
+async def command_state(ctx):
+    """État de la guilde de la commande ; prévient l'auteur si la guilde n'est pas configurée"""
+    state = guild_state(ctx.guild.id if ctx.guild else None)
+    if state is None:
+        await ctx.send(NOT_CONFIGURED)
+    return state
+
+class InteractionResponses:
+    """Réponses précalculées des boutons de ServerConnectView
+    
+    Un clic n'envoie qu'un embed déjà construit : celui de connexion est
+    reconstruit quand la section 'server' de la configuration change, celui des
+    statistiques quand un nouveau relevé est publié. L'acquittement ne dépend
+    donc ni du FTP ni d'un calcul, même pendant une rafale de clics.
+    """
+    
+    def __init__(self):
+        self._connect = {}  # {guild_id: (ip, port, mot de passe, embed)}
+        self._stats = {}  # {guild_id: (heure du relevé, embed)}
+        self._refresh_view = None
+    
+    def connect_embed(self, state):
+        server = state.monitor.server_config
+        key = (server['ip'], server['port'], server['password'])
+        cached = self._connect.get(state.guild_id)
+        if cached is None or cached[:3] != key:
+            cached = self._connect[state.guild_id] = key + (build_connect_button_embed(server),)
+        return cached[3]
+    
+    def stats_embed(self, state):
+        """Embed du dernier relevé de la guilde ; None tant qu'aucun relevé n'a abouti"""
+        monitor = state.monitor
+        if monitor.last_stats is None:
+            return None
+        cached = self._stats.get(state.guild_id)
+        if cached is None or cached[0] != monitor.last_status_time:
+            cached = self._stats[state.guild_id] = (
+                monitor.last_status_time, build_stats_embed(monitor.last_stats, monitor.last_status_time, state.parser))
+        return cached[1]
+    
+    def refresh_view(self):
+        # Créée à la demande : une vue discord.py exige une boucle asyncio active
+        if self._refresh_view is None:
+            self._refresh_view = ConnectRefreshView()
+        return self._refresh_view
+
+button_responses = InteractionResponses()
+
+def record_ack(interaction, component):
+    """Mesure le délai entre la création de l'interaction (côté Discord) et son acquittement"""
+    latency = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    metrics.INTERACTION_ACK_DURATION.observe(max(0.0, latency), component=component)
+
+async def send_button_response(interaction, component, *args, **kwargs):
+    """Répond à un clic en un seul appel (pas de différé) et enregistre la latence d'acquittement"""
+    try:
+        await interaction.response.send_message(*args, ephemeral=True, **kwargs)
+    except discord.NotFound:
+        # Unknown interaction (10062) : la limite de 3 secondes est dépassée
+        metrics.INTERACTION_EXPIRED.inc(component=component)
+        logger.warning("Interaction %s expirée avant acquittement", component)
+        return
+    record_ack(interaction, component)
+
+class ConnectRefreshView(discord.ui.View):
+    """Bouton d'actualisation des informations de connexion (persistant, instance partagée)"""
     
     def __init__(self):
         super().__init__(timeout=None)
     
-    async def _defer_if_needed(self, interaction: discord.Interaction):
-        """Gère le différé de l'interaction avec gestion des erreurs améliorée"""
+    @discord.ui.button(label="🔄 Actualiser", style=discord.ButtonStyle.secondary, custom_id="refresh_connect")
+    async def refresh_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        state = guild_state(interaction.guild_id)
+        if state is None:
+            await send_button_response(interaction, 'refresh_connect', NOT_CONFIGURED)
+            return
         try:
-            # Vérifie si l'interaction est toujours valide
-            if interaction.is_expired():
-                logger.warning("Tentative de réponse à une interaction expirée")
-                return False
-                
-            # Vérifie si une réponse a déjà été envoyée
-            if interaction.response.is_done():
-                return True
-                
-            # Diffère la réponse
-            try:
-                await interaction.response.defer(ephemeral=True, thinking=True)
-                return True
-            except discord.NotFound:
-                logger.warning("Interaction non trouvée (déjà répondu ou expiré)")
-                return False
-            except discord.HTTPException as e:
-                logger.warning(f"Erreur HTTP lors du différé: {e}")
-                if e.code == 10062:  # Unknown interaction
-                    return False
-                raise
-                
-        except Exception as e:
-            logger.error(f"Erreur inattendue dans _defer_if_needed: {e}")
-            return False
+            await interaction.response.edit_message(embed=button_responses.connect_embed(state), view=self)
+        except discord.NotFound:
+            metrics.INTERACTION_EXPIRED.inc(component='refresh_connect')
+            return
+        record_ack(interaction, 'refresh_connect')
 
+class ServerConnectView(discord.ui.View):
+    """Vue avec boutons pour se connecter au serveur"""
+    
+    def __init__(self):
+        super().__init__(timeout=None)
+    
     @discord.ui.button(label="🔗 Se Connecter", style=discord.ButtonStyle.primary, custom_id="connect_server")
     async def connect_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        state = guild_state(interaction.guild_id)
+        if state is None:
+            await send_button_response(interaction, 'connect_server', NOT_CONFIGURED)
+            return
         try:
-            # Vérifier si l'interaction est toujours valide
-            if interaction.is_expired():
-                logger.warning("Tentative d'interaction expirée dans connect_button")
-                return
-                
-            # Différer l'interaction immédiatement
-            try:
-                await interaction.response.defer(ephemeral=True, thinking=True)
-            except discord.NotFound:
-                logger.warning("Interaction non trouvée dans connect_button")
-                return
-            except Exception as e:
-                logger.error(f"Erreur lors du différé dans connect_button: {e}")
-                return
-            
-            try:
-                # Créer le message d'aide
-                connect_embed = discord.Embed(
-                    title="🚀 **COMMENT REJOINDRE LE SERVEUR**",
-                    description=(
-                        f"Voici comment te connecter au serveur Icarus :\n"
-                        f"```/connect {SERVER_IP}:{SERVER_PORT} {SERVER_PASSWORD}```"
-                    ),
-                    color=0x00D9FF
-                )
-                
-                # Ajouter la méthode de connexion directe
-                connect_embed.add_field(
-                    name="🎮 **Méthode de connexion**",
-                    value=(
-                        f"1. Lance **Icarus** depuis Steam\n"
-                        f"2. Appuie sur la touche **`** (au-dessus de Tab) pour ouvrir la console\n"
-                        f"3. Copie-colle la commande de connexion ci-dessus\n"
-                        f"4. Appuie sur **Entrée**"
-                    ),
-                    inline=False
-                )
-                
-                # Ajouter la méthode manuelle
-                connect_embed.add_field(
-                    name="🔍 **Méthode manuelle**",
-                    value=(
-                        f"1. Lance Steam\n"
-                        f"2. Ouvre Icarus\n"
-                        f"3. Va dans `Multijoueur`\n"
-                        f"4. Clique sur `Rejoindre par IP`\n"
-                        f"5. Saisis: `{SERVER_IP}:{SERVER_PORT}`\n"
-                        f"6. Mot de passe: `{SERVER_PASSWORD}`"
-                    ),
-                    inline=False
-                )
-                
-                # Ajouter des conseils
-                connect_embed.add_field(
-                    name="💡 **Conseils**",
-                    value=(
-                        "• Assure-toi que Steam est bien lancé\n"
-                        "• Vérifie ta connexion internet\n"
-                        "• Si tu rencontres des problèmes, redémarre Steam"
-                    ),
-                    inline=False
-                )
-                
-                # Créer la vue avec un bouton de rafraîchissement
-                view = discord.ui.View()
-                
-                # Ajouter un bouton de rafraîchissement
-                refresh_button = discord.ui.Button(
-                    label="🔄 Actualiser",
-                    style=discord.ButtonStyle.secondary,
-                    custom_id="refresh_connect"
-                )
-                
-                # Définir la fonction de callback pour le bouton
-                async def refresh_callback(button_interaction):
-                    if button_interaction.user != interaction.user:
-                        await button_interaction.response.send_message(
-                            "❌ Seul l'auteur de la commande peut actualiser ce message.",
-                            ephemeral=True
-                        )
-                        return
-                        
-                    await button_interaction.response.defer()
-                    await interaction.delete_original_response()
-                    
-                refresh_button.callback = refresh_callback
-                view.add_item(refresh_button)
-                
-                # Envoyer le message
-                try:
-                    msg = await interaction.followup.send(
-                        embed=connect_embed, 
-                        view=view, 
-                        ephemeral=True,
-                        wait=True
-                    )
-                    
-                    # Planifier la suppression du message après 5 minutes
-                    if hasattr(msg, 'delete_after'):
-                        await msg.delete(delay=300)
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'envoi du message de connexion: {e}")
-                
-            except Exception as e:
-                logger.error(f"Erreur dans connect_button: {e}")
-                try:
-                    msg = await interaction.followup.send(
-                        "❌ Une erreur est survenue lors de la préparation des informations de connexion.\n"
-                        "Veuillez réessayer ou contacter un administrateur.",
-                        ephemeral=True,
-                        wait=True
-                    )
-                    if hasattr(msg, 'delete'):
-                        await msg.delete(delay=10)
-                except Exception as e2:
-                    logger.error(f"Échec de l'envoi du message d'erreur: {e2}")
-                    # Essayer une méthode alternative
-                    try:
-                        if interaction.channel:
-                            await interaction.channel.send(
-                                "❌ Une erreur est survenue. Veuillez réessayer.",
-                                delete_after=10
-                            )
-                    except Exception as e3:
-                        logger.error(f"Échec de l'envoi du message alternatif: {e3}")
-                        
+            await send_button_response(
+                interaction, 'connect_server',
+                embed=button_responses.connect_embed(state),
+                view=button_responses.refresh_view(),
+                delete_after=300  # Auto-destruction après 5 minutes
+            )
         except Exception as e:
-            logger.error(f"Erreur critique dans connect_button: {e}")
-            try:
-                if not interaction.response.is_done():
-                    msg = await interaction.response.send_message(
-                        "❌ Une erreur critique est survenue. Veuillez réessayer.",
-                        ephemeral=True
-                    )
-                else:
-                    msg = await interaction.followup.send(
-                        "❌ Une erreur critique est survenue. Veuillez réessayer.",
-                        ephemeral=True,
-                        wait=True
-                    )
-                
-                # Supprimer le message après 10 secondes si possible
-                if hasattr(msg, 'delete'):
-                    await msg.delete(delay=10)
-            except Exception as e2:
-                logger.error(f"Échec de l'envoi du message d'erreur critique: {e2}")
+            logger.error("Erreur dans connect_button: %s", e)
     
     @discord.ui.button(label="📊 Statistiques", style=discord.ButtonStyle.secondary, custom_id="stats_server")
     async def stats_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Différer l'interaction immédiatement
-        if not await self._defer_if_needed(interaction):
+        state = guild_state(interaction.guild_id)
+        if state is None:
+            await send_button_response(interaction, 'stats_server', NOT_CONFIGURED)
             return
-            
         try:
-            # Récupérer les statistiques
-            stats = icarus_parser.get_server_stats()
-            
-            # Créer l'embed des statistiques
-            stats_embed = discord.Embed(
-                title="📊 **STATISTIQUES DU SERVEUR**",
-                color=0x00D9FF,
-                timestamp=datetime.now(TIMEZONE)
-            )
-            
-            # Informations générales
-            stats_embed.add_field(
-                name="📊 **STATISTIQUES**",
-                value=f"👥 **Joueurs connectés:** {len(icarus_parser.connected_players)}\n"
-                      f"📅 **Démarrage:** {stats['start_time'].strftime('%d/%m/%Y %H:%M') if stats['start_time'] else 'Inconnu'}\n"
-                      f"⏳ **Temps de fonctionnement:** {stats['uptime']}\n"
-                      f"📝 **Mission actuelle:** {icarus_parser.current_prospect}",
-                inline=True
-            )
-            
-            # Activité récente
-            recent_activity = []
-            for event in stats['recent_activity']:
-                event_time = event['time'].strftime('%H:%M')
-                recent_activity.append(f"`{event_time}` {event['description']}")
-            
-            stats_embed.add_field(
-                name="🕒 **ACTIVITÉ RÉCENTE**",
-                value="\n".join(recent_activity) if recent_activity else "Aucune activité récente",
-                inline=False
-            )
-            
-            # Joueurs connectés
-            if icarus_parser.connected_players:
-                players_list = []
-                for player in icarus_parser.connected_players.values():
-                    connect_time = player['connect_time'].strftime('%H:%M')
-                    players_list.append(f"• {player['name']} (connecté à {connect_time})")
-                
-                stats_embed.add_field(
-                    name=f"👥 **JOUEURS CONNECTÉS ({len(icarus_parser.connected_players)})**",
-                    value="\n".join(players_list),
-                    inline=False
-                )
-            
-            # Statistiques d'activité
-            activity_stats = f"🔗 **Connexions récentes:** {stats['connections']}\n"
-            activity_stats += f"📤 **Déconnexions récentes:** {stats['disconnections']}\n"
-            activity_stats += f"💾 **Sauvegardes récentes:** {stats['recent_saves']}\n"
-            activity_stats += f"📋 **Total événements:** {stats['total_events']}\n"
-            activity_stats += f"🗺️ **Mission actuelle:** {stats['current_prospect']}"
-            
-            stats_embed.add_field(
-                name="📈 **ACTIVITÉ (2 HEURES)**",
-                value=activity_stats,
-                inline=True
-            )
-            
-            # État technique
-            tech_status = f"🔗 **FTP:** {'🟢 Connecté' if icarus_parser.ftp_available else '🔴 Déconnecté'}\n"
-            tech_status += f"⏰ **Dernière vérification:** {icarus_parser.last_ftp_check.strftime('%H:%M:%S') if icarus_parser.last_ftp_check else 'Jamais'}\n"
-            tech_status += f"🎯 **Patterns actifs:** {len(icarus_parser.patterns)}\n"
-            tech_status += f"📊 **Précision:** 95%+ des événements détectés"
-            
-            stats_embed.add_field(
-                name="🔧 **ÉTAT TECHNIQUE**",
-                value=tech_status,
-                inline=True
-            )
-            
-            await interaction.followup.send(embed=stats_embed, ephemeral=True, delete_after=300)  # Auto-destruction après 5 minutes
-            
+            embed = button_responses.stats_embed(state)
+            if embed is None:
+                await send_button_response(interaction, 'stats_server', "⏳ Premier relevé du serveur en cours, réessaie dans quelques secondes.")
+                return
+            await send_button_response(interaction, 'stats_server', embed=embed, delete_after=300)
         except Exception as e:
             logger.error(f"Erreur stats: {e}")
+
+# Types d'événements proposés comme filtre de la timeline
+EVENT_TYPE_LABELS = {
+    'player_connect': "Connexions",
+    'player_disconnect': "Déconnexions",
+    'biome_change': "Changements de biome",
+    'game_save': "Sauvegardes",
+    'game_save_complete': "Sauvegardes terminées",
+    'prospect_update': "Missions",
+    'server_stall': "Blocages du serveur",
+    'server_restart': "Redémarrages du serveur",
+    'server_crash_loop': "Boucles de crash"
+}
+
+class TimelineView(discord.ui.View):
+    """Timeline paginée des événements : chaque page est lue par curseur dans le store trié"""
+    
+    def __init__(self, parser, player_name=None, event_type=None, since=None, until=None, page_size=10):
+        super().__init__(timeout=300)
+        self.parser = parser
+        self.filters = {'player_name': player_name, 'event_type': event_type, 'since': since, 'until': until}
+        self.page_size = page_size
+        self.page = []
+        self.page_number = 1
+        self.has_older = False
+        self.has_newer = False
+        self.message = None
+    
+    def load(self, before=None, after=None):
+        """Charge la page avant/après un curseur (par défaut la plus récente)"""
+        self.page, self.has_older, self.has_newer = self.parser.get_timeline_page(
+            before=before, after=after, page_size=self.page_size, **self.filters
+        )
+        self.newest_button.disabled = not self.has_newer
+        self.newer_button.disabled = not self.has_newer
+        self.older_button.disabled = not self.has_older
+    
+    def build_embed(self):
+        embed = discord.Embed(
+            title="🕒 **TIMELINE DES ÉVÉNEMENTS**",
+            color=0x3498DB,
+            timestamp=get_french_time()
+        )
+        
+        if self.page:
+            embed.description = "```yaml\n" + "\n".join(format_event_line(event, '%d/%m %H:%M:%S') for event in self.page) + "\n```"
+        else:
+            embed.description = "❌ **Aucun événement pour ces filtres**"
+        
+        filters = []
+        if self.filters['player_name']:
+            filters.append(f"👤 {self.filters['player_name']}")
+        if self.filters['event_type']:
+            filters.append(f"🏷️ {EVENT_TYPE_LABELS.get(self.filters['event_type'], self.filters['event_type'])}")
+        if self.filters['since']:
+            filters.append(f"depuis {self.filters['since'].strftime('%d/%m %H:%M')}")
+        if self.filters['until']:
+            filters.append(f"jusqu'à {self.filters['until'].strftime('%d/%m %H:%M')}")
+        footer = f"📄 Page {self.page_number}"
+        if filters:
+            footer += " • " + " • ".join(filters)
+        embed.set_footer(text=footer)
+        
+        return embed
+    
+    async def _show(self, interaction):
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+    
+    @discord.ui.button(label="⏮️ Plus récents", style=discord.ButtonStyle.secondary)
+    async def newest_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page_number = 1
+        self.load()
+        await self._show(interaction)
+    
+    @discord.ui.button(label="◀️ Précédent", style=discord.ButtonStyle.primary)
+    async def newer_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.page:
+            self.page_number = max(1, self.page_number - 1)
+            self.load(after=self.parser.event_cursor(self.page[0]))
+        await self._show(interaction)
+    
+    @discord.ui.button(label="Suivant ▶️", style=discord.ButtonStyle.primary)
+    async def older_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.page:
+            self.page_number += 1
+            self.load(before=self.parser.event_cursor(self.page[-1]))
+        await self._show(interaction)
+    
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
             try:
-                await interaction.followup.send(
-                    "❌ Erreur lors de la récupération des statistiques.", 
-                    ephemeral=True
-                )
-            except Exception as e2:
-                logger.error(f"Échec de l'envoi du message d'erreur: {e2}")
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
 
 # === ÉVÉNEMENTS DU BOT ===
 
 @client.event
 async def on_ready():
     """Événement déclenché quand le bot est prêt"""
-    logger.info(f'🤖 Bot connecté: {client.user}')
-    logger.info(f'📡 Surveillance du serveur: {SERVER_IP}:{SERVER_PORT}')
-    logger.info(f'📁 Logs FTP: {FTP_HOST}:{FTP_PORT}')
+    logger.info('🤖 Bot connecté: %s (%s shard(s), %d guilde(s))', client.user, client.shard_count, len(client.guilds))
+    for state in guild_registry.states():
+        server = state.monitor.server_config
+        logger.info("📡 Surveillance du serveur: %s:%s (guilde %s)", server['ip'], server['port'], state.guild_id or 'toutes')
     logger.info(f'🧑‍🚀 By Micka Delcato')
     
     # Vérifier que les composants sont correctement enregistrés
@@ -1064,13 +729,26 @@ async def on_ready():
         # Ajouter la vue des boutons si ce n'est pas déjà fait
         if not hasattr(client, 'persistent_views_added'):
             client.add_view(ServerConnectView())
+            client.add_view(button_responses.refresh_view())
             client.persistent_views_added = True
             logger.info("✅ Vues persistantes enregistrées avec succès")
     except Exception as e:
         logger.error(f"❌ Erreur lors de l'enregistrement des vues persistantes: {e}")
     
-    # Démarrage des tâches
-    if not monitor_server.is_running():
+    # Enregistrement des commandes slash (une seule fois par processus)
+    if not getattr(client, 'app_commands_synced', False):
+        try:
+            synced = await client.tree.sync()
+            client.app_commands_synced = True
+            logger.info("✅ %d commandes slash synchronisées", len(synced))
+        except Exception as e:
+            logger.error("❌ Erreur lors de la synchronisation des commandes slash: %s", e)
+    
+    # Démarrage des tâches : une boucle par shard en mode multi-guildes
+    if shard_scheduler is not None:
+        shard_ids = client.shard_ids if client.shard_ids is not None else range(client.shard_count or 1)
+        shard_scheduler.start(shard_ids, client.shard_count or 1)
+    elif not monitor_server.is_running():
         try:
             monitor_server.start()
             logger.info("✅ Monitoring démarré avec succès")
@@ -1094,51 +772,72 @@ async def on_message(message):
 @tasks.loop(seconds=15)
 async def monitor_server():
     """Tâche de monitoring principal"""
-    global status_message, last_update_time
+    spans.profiler.start_cycle()
+    try:
+        with spans.span('cycle'):
+            await update_status_message(guild_registry.default)
+    finally:
+        spans.profiler.end_cycle()
+
+async def update_status_message(state):
+    """Construit l'embed de statut et met à jour (ou crée) le message du canal de la guilde"""
+    global first_status_published
     
     try:
-        channel = client.get_channel(current_channel_id)
+        channel = client.get_channel(state.channel_id)
         if not channel:
-            logger.warning(f"Canal {current_channel_id} non trouvé")
+            logger.warning("Canal %s non trouvé", state.channel_id)
             return
         
-        embed = await create_enhanced_embed()
+        embed = await create_enhanced_embed(state)
         view = ServerConnectView()
         
         current_time = get_french_time()
         
         # Mise à jour ou création du message de statut
-        if status_message is None:
+        if state.status_message is None:
             try:
+                # Publie d'abord le statut : le nettoyage ne retarde pas le premier affichage
+                state.status_message = await channel.send(embed=embed, view=view)
+                logger.info("✅ Nouveau message de statut créé")
+                
                 # Supprime les anciens messages du bot (optionnel)
                 async for message in channel.history(limit=10):
-                    if message.author == client.user and message.embeds:
+                    if message.author == client.user and message.embeds and message.id != state.status_message.id:
                         try:
                             await message.delete()
                         except:
                             pass
                 
-                status_message = await channel.send(embed=embed, view=view)
-                logger.info("✅ Nouveau message de statut créé")
-                
             except Exception as e:
                 logger.error(f"Erreur création message: {e}")
                 return
         else:
             try:
-                await status_message.edit(embed=embed, view=view)
+                with metrics.Timer(metrics.DISCORD_EDIT_DURATION), spans.span('discord_edit'):
+                    await state.status_message.edit(embed=embed, view=view)
             except discord.NotFound:
                 logger.warning("Message de statut non trouvé, création d'un nouveau")
-                status_message = None
+                state.status_message = None
+                return
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    metrics.DISCORD_RATE_LIMITED.inc()
+                logger.error("Erreur mise à jour message: %s", e)
                 return
             except Exception as e:
-                logger.error(f"Erreur mise à jour message: {e}")
+                logger.error("Erreur mise à jour message: %s", e)
                 return
         
-        last_update_time = current_time
+        state.last_update_time = current_time
+        if not first_status_published:
+            first_status_published = True
+            elapsed = time.perf_counter() - _STARTED_AT
+            metrics.TIME_TO_FIRST_STATUS.set(elapsed)
+            logger.info("⏱️ Premier statut publié %.2fs après le lancement", elapsed)
         
     except Exception as e:
-        logger.error(f"❌ Erreur monitoring: {e}")
+        logger.error("❌ Erreur monitoring: %s", e)
 
 @monitor_server.before_loop
 async def before_monitor():
@@ -1159,14 +858,110 @@ async def before_monitor():
 )
 async def status_command(ctx):
     """Commande pour afficher le statut du serveur"""
+    state = await command_state(ctx)
+    if state is None:
+        return
     try:
-        embed = await create_enhanced_embed()
+        embed = await create_enhanced_embed(state)
         view = ServerConnectView()
         await ctx.send(embed=embed, view=view)
     except Exception as e:
         logger.error(f"Erreur commande status: {e}")
         await ctx.send("❌ Erreur lors de la récupération du statut du serveur.")
 
+def build_debug_embed(parser, log_events=None):
+    """Construit l'embed de debug depuis l'état en mémoire (log_events: lecture forcée éventuelle)"""
+    embed = discord.Embed(
+        title="🔧 **DEBUG SYSTÈME**",
+        color=0xE74C3C,
+        timestamp=get_french_time()
+    )
+    
+    # État FTP
+    ftp_status = f"🔗 **Connexion FTP:** {'🟢 OK' if parser.ftp_available else '🔴 ÉCHEC'}\n"
+    ftp_status += f"⏰ **Dernière vérification:** {parser.last_ftp_check.strftime('%H:%M:%S') if parser.last_ftp_check else 'Jamais'}\n"
+    breaker = parser.get_server_stats()['log_source']['breaker']
+    ftp_status += (f"⛔ **Disjoncteur:** {BREAKER_LABELS[breaker['state']]} depuis {breaker['since'].strftime('%H:%M:%S')}"
+                   f" • {breaker['failures']} échec(s)")
+    if breaker['next_probe_seconds'] is not None:
+        ftp_status += f" • essai dans {breaker['next_probe_seconds']:.0f}s"
+    ftp_status += "\n"
+    ftp_status += f"📋 **Événements lus:** {len(log_events) if log_events is not None else '— (cache)'}\n"
+    ftp_status += f"📊 **Total événements:** {len(parser.events)}"
+    if collector_process and parser is icarus_parser:
+        pid = collector_process.process.pid if collector_process.process else '—'
+        last_snapshot = collector_process.last_snapshot_time.strftime('%H:%M:%S') if collector_process.last_snapshot_time else 'Jamais'
+        ftp_status += f"\n🛰️ **Collecteur:** pid {pid} • {collector_process.snapshots} instantanés • dernier à {last_snapshot}"
+    
+    embed.add_field(
+        name="🔗 **ÉTAT FTP**",
+        value=ftp_status,
+        inline=False
+    )
+    
+    # Joueurs connectés
+    if parser.connected_players:
+        players_debug = ""
+        for name, data in parser.connected_players.items():
+            connect_time = data['connect_time'].strftime('%H:%M:%S')
+            last_seen = data['last_seen'].strftime('%H:%M:%S')
+            activity_delay = (get_french_time() - data['last_seen']).total_seconds() / 60
+            
+            players_debug += f"**{name}**\n"
+            players_debug += f"├─ 🔗 Connecté: {connect_time}\n"
+            players_debug += f"├─ 👁️ Dernière activité: {last_seen}\n"
+            players_debug += f"└─ ⏰ Il y a {activity_delay:.1f} minutes\n\n"
+        
+        embed.add_field(
+            name=f"👥 **JOUEURS ACTIFS** ({len(parser.connected_players)})",
+            value=players_debug[:1000],
+            inline=False
+        )
+    else:
+        embed.add_field(
+            name="👥 **JOUEURS ACTIFS**",
+            value="❌ **Aucun joueur détecté**\n\n🔍 **Vérifications:**\n- Des joueurs sont-ils connectés ?\n- Les logs sont-ils accessibles ?\n- Le serveur est-il en ligne ?",
+            inline=False
+        )
+    
+    # Derniers événements
+    recent = parser.get_recent_events(5)
+    if recent:
+        events_debug = "```yaml\n"
+        for event in recent:
+            time_str = event['timestamp'].strftime('%H:%M:%S')
+            event_type = event['type'].replace('_', ' ').title()
+            player_name = event.get('player_name', '')
+            
+            if player_name:
+                events_debug += f"{time_str}: {event_type} ({player_name})\n"
+            else:
+                events_debug += f"{time_str}: {event_type}\n"
+        
+        events_debug += "```"
+        
+        embed.add_field(
+            name="📋 **DERNIERS ÉVÉNEMENTS**",
+            value=events_debug,
+            inline=False
+        )
+    
+    # Latences par étape du cycle de monitoring
+    stage_summary = spans.recorder.summary()
+    if stage_summary:
+        stages_debug = "```\nétape              p50     p95     max  (ms)\n"
+        for stage, stat in sorted(stage_summary.items(), key=lambda x: -x[1]['p50']):
+            stages_debug += f"{stage:<16} {stat['p50']:>7.1f} {stat['p95']:>7.1f} {stat['max']:>7.1f}\n"
+        stages_debug += "```"
+        
+        embed.add_field(
+            name=f"⏱️ **ÉTAPES DU CYCLE** ({stage_summary.get('cycle', {}).get('count', 0)} cycles)",
+            value=stages_debug[:1024],
+            inline=False
+        )
+    
+    return embed
+
 @client.command(
     name='debug',
     help='Affiche des informations de débogage détaillées sur le serveur',
@@ -1178,82 +973,103 @@ async def status_command(ctx):
 )
 async def debug_command(ctx):
     """Commande pour débugger l'état du système"""
+    state = await command_state(ctx)
+    if state is None:
+        return
     try:
-        embed = discord.Embed(
-            title="🔧 **DEBUG SYSTÈME**",
-            color=0xE74C3C,
-            timestamp=get_french_time()
-        )
-        
         # Force une lecture des logs
         logger.info("🔄 Debug: Force lecture logs FTP...")
-        log_events = await icarus_parser.read_logs_ftp()
-        icarus_parser.add_events(log_events)
+        log_events = await state.parser.read_logs_ftp()
+        state.parser.add_events(log_events)
         
-        # État FTP
-        ftp_status = f"🔗 **Connexion FTP:** {'🟢 OK' if icarus_parser.ftp_available else '🔴 ÉCHEC'}\n"
-        ftp_status += f"⏰ **Dernière vérification:** {icarus_parser.last_ftp_check.strftime('%H:%M:%S') if icarus_parser.last_ftp_check else 'Jamais'}\n"
-        ftp_status += f"📋 **Événements lus:** {len(log_events)}\n"
-        ftp_status += f"📊 **Total événements:** {len(icarus_parser.events)}"
+        await ctx.send(embed=build_debug_embed(state.parser, log_events))
         
-        embed.add_field(
-            name="🔗 **ÉTAT FTP**",
-            value=ftp_status,
-            inline=False
+    except Exception as e:
+        logger.error(f"Erreur debug: {e}")
+        await ctx.send(f"❌ Erreur debug: {e}")
+
+@client.command(
+    name='profile',
+    help='Profile les N prochains cycles de monitoring (cprofile ou pyinstrument)',
+    brief='Profile le cycle de monitoring',
+    description=(
+        'Active un profilage cProfile (ou pyinstrument s\'il est installé) sur les N prochains cycles '
+        'de monitoring puis envoie le rapport en pièce jointe. Réservé aux administrateurs.'
+    )
+)
+@commands.has_permissions(administrator=True)
+async def profile_command(ctx, cycles: int = 3, engine: str = 'cprofile'):
+    """Commande pour profiler les prochains cycles de monitoring"""
+    cycles = max(1, min(cycles, 20))
+    engine = engine.lower()
+    
+    try:
+        await ctx.send(f"🔬 Profilage {engine} de {cycles} cycle(s) en cours (~{cycles * 15}s)...")
+        report = await spans.profiler.capture(cycles, engine)
+        
+        filename = f"profile_{engine}_{get_french_time().strftime('%Y%m%d_%H%M%S')}.txt"
+        await ctx.send(
+            f"✅ Profilage terminé ({cycles} cycle(s))",
+            file=discord.File(BytesIO(report.encode('utf-8')), filename=filename)
         )
         
-        # Joueurs connectés
-        if icarus_parser.connected_players:
-            players_debug = ""
-            for name, data in icarus_parser.connected_players.items():
-                connect_time = data['connect_time'].strftime('%H:%M:%S')
-                last_seen = data['last_seen'].strftime('%H:%M:%S')
-                activity_delay = (get_french_time() - data['last_seen']).total_seconds() / 60
-                
-                players_debug += f"**{name}**\n"
-                players_debug += f"├─ 🔗 Connecté: {connect_time}\n"
-                players_debug += f"├─ 👁️ Dernière activité: {last_seen}\n"
-                players_debug += f"└─ ⏰ Il y a {activity_delay:.1f} minutes\n\n"
-            
-            embed.add_field(
-                name=f"👥 **JOUEURS ACTIFS** ({len(icarus_parser.connected_players)})",
-                value=players_debug[:1000],
-                inline=False
-            )
+    except (RuntimeError, ValueError) as e:
+        await ctx.send(f"❌ {e}")
+    except Exception as e:
+        logger.error("Erreur profile: %s", e)
+        await ctx.send("❌ Erreur lors du profilage.")
+
+def build_players_embed(parser, player_name=None):
+    """Construit la liste des joueurs connectés (ou la fiche d'un joueur) depuis l'état en mémoire"""
+    embed = discord.Embed(
+        title="👥 **SURVIVANTS ICARUS**",
+        color=0x27AE60,
+        timestamp=get_french_time()
+    )
+    
+    # Fiche d'un joueur : état de connexion, craft et derniers événements
+    if player_name:
+        data = parser.connected_players.get(player_name)
+        if data:
+            minutes_ago = (get_french_time() - data['last_seen']).total_seconds() / 60
+            player_text = f"🟢 **{player_name}** connecté depuis {data['connect_time'].strftime('%H:%M:%S')}\n"
+            player_text += f"👁️ Vu il y a: {minutes_ago:.0f} min\n"
         else:
-            embed.add_field(
-                name="👥 **JOUEURS ACTIFS**",
-                value="❌ **Aucun joueur détecté**\n\n🔍 **Vérifications:**\n- Des joueurs sont-ils connectés ?\n- Les logs sont-ils accessibles ?\n- Le serveur est-il en ligne ?",
-                inline=False
-            )
+            player_text = f"🔴 **{player_name}** n'est pas connecté\n"
+        crafts = parser.get_server_stats()['player_activity'].get(player_name, {}).get('crafts', 0)
+        player_text += f"🔨 Crafts (1h): {crafts}\n"
         
-        # Derniers événements
-        recent = icarus_parser.get_recent_events(5)
-        if recent:
-            events_debug = "```yaml\n"
-            for event in recent:
-                time_str = event['timestamp'].strftime('%H:%M:%S')
-                event_type = event['type'].replace('_', ' ').title()
-                player_name = event.get('player_name', '')
-                
-                if player_name:
-                    events_debug += f"{time_str}: {event_type} ({player_name})\n"
-                else:
-                    events_debug += f"{time_str}: {event_type}\n"
-            
-            events_debug += "```"
-            
-            embed.add_field(
-                name="📋 **DERNIERS ÉVÉNEMENTS**",
-                value=events_debug,
-                inline=False
-            )
+        for event in parser.get_recent_events(5, player_name=player_name):
+            player_text += f"\n`{event['timestamp'].strftime('%H:%M')}` {event['type'].replace('_', ' ').title()}"
+            if event.get('biome_name'):
+                player_text += f" → {event['biome_name']}"
         
-        await ctx.send(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Erreur debug: {e}")
-        await ctx.send(f"❌ Erreur debug: {e}")
+        embed.description = player_text
+        return embed
+    
+    if parser.connected_players:
+        player_activity = parser.get_server_stats()['player_activity']
+        players_text = ""
+        for i, (name, data) in enumerate(parser.connected_players.items(), 1):
+            connect_time = data['connect_time'].strftime('%H:%M:%S')
+            last_seen = data['last_seen'].strftime('%H:%M:%S')
+            minutes_ago = (get_french_time() - data['last_seen']).total_seconds() / 60
+            
+            players_text += f"**{i}. {name}**\n"
+            players_text += f"   🔗 Connecté à: {connect_time}\n"
+            players_text += f"   👁️ Vu il y a: {minutes_ago:.0f} min\n"
+            crafts = player_activity.get(name, {}).get('crafts', 0)
+            if crafts:
+                players_text += f"   🔨 Crafts (1h): {crafts}\n"
+            players_text += "\n"
+        
+        embed.description = players_text
+        embed.set_footer(text=f"🎮 {len(parser.connected_players)}/8 survivants connectés")
+    else:
+        embed.description = "💤 **Aucun survivant actuellement connecté**\n\n🚀 Soyez les premiers à rejoindre l'aventure !"
+        embed.set_footer(text="🎮 0/8 survivants connectés")
+    
+    return embed
 
 @client.command(
     name='players',
@@ -1266,40 +1082,76 @@ async def debug_command(ctx):
 )
 async def players_command(ctx):
     """Commande pour lister les joueurs actifs"""
+    state = await command_state(ctx)
+    if state is None:
+        return
     try:
         # Force une mise à jour
-        log_events = await icarus_parser.read_logs_ftp()
-        icarus_parser.add_events(log_events)
-        
-        embed = discord.Embed(
-            title="👥 **SURVIVANTS ICARUS**",
-            color=0x27AE60,
-            timestamp=get_french_time()
-        )
+        log_events = await state.parser.read_logs_ftp()
+        state.parser.add_events(log_events)
         
-        if icarus_parser.connected_players:
-            players_text = ""
-            for i, (name, data) in enumerate(icarus_parser.connected_players.items(), 1):
-                connect_time = data['connect_time'].strftime('%H:%M:%S')
-                last_seen = data['last_seen'].strftime('%H:%M:%S')
-                minutes_ago = (get_french_time() - data['last_seen']).total_seconds() / 60
-                
-                players_text += f"**{i}. {name}**\n"
-                players_text += f"   🔗 Connecté à: {connect_time}\n"
-                players_text += f"   👁️ Vu il y a: {minutes_ago:.0f} min\n\n"
-            
-            embed.description = players_text
-            embed.set_footer(text=f"🎮 {len(icarus_parser.connected_players)}/8 survivants connectés")
-        else:
-            embed.description = "💤 **Aucun survivant actuellement connecté**\n\n🚀 Soyez les premiers à rejoindre l'aventure !"
-            embed.set_footer(text="🎮 0/8 survivants connectés")
-        
-        await ctx.send(embed=embed)
+        await ctx.send(embed=build_players_embed(state.parser))
         
     except Exception as e:
         logger.error(f"Erreur players: {e}")
         await ctx.send("❌ Erreur lors de la récupération des joueurs.")
 
+def format_event_line(event, time_format='%H:%M:%S'):
+    """Formate un événement sur une ligne (logs, timeline)"""
+    timestamp = event['timestamp'].strftime(time_format)
+    event_type = event['type']
+    
+    if event_type == 'player_connect':
+        player_name = event.get('player_name', 'Joueur')
+        return f"🟢 {timestamp}: {player_name} s'est connecté"
+    elif event_type == 'player_disconnect':
+        player_name = event.get('player_name', 'Joueur')
+        return f"🔴 {timestamp}: {player_name} s'est déconnecté"
+    elif event_type == 'prospect_update':
+        prospect_name = event.get('prospect_name', 'Mission')
+        return f"🗺️ {timestamp}: Mission {prospect_name} mise à jour"
+    elif event_type == 'biome_change':
+        player_name = event.get('player_name') or 'Joueur'
+        return f"🌍 {timestamp}: {player_name} → {event.get('biome_name', 'Biome')}"
+    elif event_type == 'game_save':
+        return f"💾 {timestamp}: Sauvegarde automatique"
+    elif event_type == 'game_save_complete' and event.get('duration_seconds') is not None:
+        slow = " 🐢" if event.get('regression') else ""
+        return f"💾 {timestamp}: Sauvegarde terminée en {event['duration_seconds']:.1f}s{slow}"
+    elif event_type == 'server_stall':
+        return f"🧊 {timestamp}: Serveur figé pendant {event['gap_seconds'] / 60:.1f} min"
+    elif event_type == 'server_restart':
+        downtime = event.get('downtime_seconds')
+        suffix = f" après {downtime / 60:.1f} min d'arrêt" if downtime else ""
+        return f"🔁 {timestamp}: Redémarrage du serveur{suffix}"
+    elif event_type == 'server_crash_loop':
+        return f"💥 {timestamp}: Boucle de crash ({event['restarts']} redémarrages en {event['window_minutes']} min)"
+    elif event_type == 'crafting_activity':
+        return f"🔨 {timestamp}: Activité de craft détectée"
+    else:
+        return f"⚙️ {timestamp}: {event_type.replace('_', ' ').title()}"
+
+def build_logs_embed(recent_events):
+    """Construit l'embed des événements récents"""
+    embed = discord.Embed(
+        title="📋 **LOGS ICARUS RÉCENTS**",
+        color=0x3498DB,
+        timestamp=get_french_time()
+    )
+    
+    if recent_events:
+        logs_text = "```yaml\n"
+        for event in recent_events:
+            logs_text += format_event_line(event) + "\n"
+        logs_text += "```"
+        embed.description = logs_text
+    else:
+        embed.description = "❌ **Aucun événement récent trouvé**"
+    
+    embed.set_footer(text=f"📊 {len(recent_events)} événements • Source: FTP Logs")
+    
+    return embed
+
 @client.command(
     name='logs',
     help='Affiche les derniers événements enregistrés dans les logs du serveur',
@@ -1311,54 +1163,328 @@ async def players_command(ctx):
 )
 async def logs_command(ctx, limit: int = 10):
     """Commande pour afficher les logs récents"""
+    state = await command_state(ctx)
+    if state is None:
+        return
     try:
         limit = max(1, min(limit, 20))  # Entre 1 et 20
         
         # Force une lecture des logs
-        log_events = await icarus_parser.read_logs_ftp()
-        icarus_parser.add_events(log_events)
+        log_events = await state.parser.read_logs_ftp()
+        state.parser.add_events(log_events)
         
-        recent_events = icarus_parser.get_recent_events(limit)
+        await ctx.send(embed=build_logs_embed(state.parser.get_recent_events(limit)))
         
-        embed = discord.Embed(
-            title="📋 **LOGS ICARUS RÉCENTS**",
-            color=0x3498DB,
-            timestamp=get_french_time()
-        )
+    except Exception as e:
+        logger.error(f"Erreur logs: {e}")
+        await ctx.send("❌ Erreur lors de la récupération des logs.")
+
+# Lignes maximales envoyées par !rawlogs (taille de la pièce jointe)
+RAWLOGS_MAX_LINES = 20000
+# Jours parcourus par !search
+SEARCH_DAYS = 14
+
+def read_raw_window(parser, start, end, limit):
+    """Fenêtre du log brut : miroir local (mmap) s'il remonte jusqu'au début de la fenêtre, sinon archive"""
+    if parser.mirror is not None and (parser.archive is None or parser.mirror.covers(start)):
+        return parser.mirror.read_window(start, end, limit)
+    return parser.archive.read_window(start, end, limit)
+
+@client.command(
+    name='rawlogs',
+    help='Extrait les lignes brutes du log archivé: !rawlogs 14:30 [minutes]',
+    brief='Lignes brutes archivées',
+    description=(
+        'Envoie en pièce jointe les lignes brutes du log du serveur à partir de l\'heure donnée '
+        '(HH:MM, 10 minutes par défaut, 120 au maximum), lues dans le miroir local du log ou '
+        'dans l\'archive compressée.'
+    )
+)
+async def rawlogs_command(ctx, debut: str, minutes: int = 10):
+    """Commande pour extraire une fenêtre du log brut archivé"""
+    state = await command_state(ctx)
+    if state is None:
+        return
+    if state.parser.archive is None and state.parser.mirror is None:
+        await ctx.send("❌ L'archive et le miroir des logs sont désactivés (sections `archive` et `mirror` "
+                       "de la configuration).")
+        return
+    
+    try:
+        hour, minute = (int(part) for part in debut.split(':'))
+        now = get_french_time()
+        start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except ValueError:
+        await ctx.send("❌ Heure invalide, format attendu: HH:MM (ex: `!rawlogs 14:30 15`)")
+        return
+    if start > now:
+        start -= timedelta(days=1)
+    end = start + timedelta(minutes=max(1, min(minutes, 120)))
+    
+    try:
+        # Dichotomie dans le miroir ou décompression des seuls blocs de la fenêtre, hors de la boucle asyncio
+        loop = asyncio.get_running_loop()
+        lines = await loop.run_in_executor(state.parser.executor, read_raw_window, state.parser, start, end,
+                                           RAWLOGS_MAX_LINES)
+        if not lines:
+            await ctx.send(f"📭 Aucune ligne archivée entre {start.strftime('%H:%M')} et {end.strftime('%H:%M')}.")
+            return
         
-        if recent_events:
-            logs_text = "```yaml\n"
-            for event in recent_events:
-                timestamp = event['timestamp'].strftime('%H:%M:%S')
-                event_type = event['type']
-                
-                if event_type == 'player_connect':
-                    player_name = event.get('player_name', 'Joueur')
-                    logs_text += f"🟢 {timestamp}: {player_name} s'est connecté\n"
-                elif event_type == 'player_disconnect':
-                    player_name = event.get('player_name', 'Joueur')
-                    logs_text += f"🔴 {timestamp}: {player_name} s'est déconnecté\n"
-                elif event_type == 'prospect_update':
-                    prospect_name = event.get('prospect_name', 'Mission')
-                    logs_text += f"🗺️ {timestamp}: Mission {prospect_name} mise à jour\n"
-                elif event_type == 'game_save':
-                    logs_text += f"💾 {timestamp}: Sauvegarde automatique\n"
-                elif event_type == 'crafting_activity':
-                    logs_text += f"🔨 {timestamp}: Activité de craft détectée\n"
-                else:
-                    logs_text += f"⚙️ {timestamp}: {event_type.replace('_', ' ').title()}\n"
-                    
-            logs_text += "```"
-            embed.description = logs_text
-        else:
-            embed.description = "❌ **Aucun événement récent trouvé**"
+        data = BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+        filename = f"icarus-{start.strftime('%Y%m%d-%H%M')}.log"
+        await ctx.send(f"🗄️ {len(lines)} lignes entre {start.strftime('%H:%M')} et {end.strftime('%H:%M')}",
+                       file=discord.File(data, filename=filename))
         
-        embed.set_footer(text=f"📊 {len(recent_events)} événements • Source: FTP Logs")
+    except Exception as e:
+        logger.error("Erreur rawlogs: %s", e)
+        await ctx.send("❌ Erreur lors de la lecture de l'archive.")
+
+def build_search_embed(query, lines, stats, days):
+    """Construit l'embed des résultats d'une recherche dans l'archive"""
+    embed = discord.Embed(
+        title=f"🔎 **RECHERCHE : {query[:100]}**",
+        color=0x3498DB,
+        timestamp=get_french_time()
+    )
+    
+    if lines:
+        # Les lignes les plus récentes sont gardées si l'embed déborde
+        shown = []
+        length = 0
+        for line in reversed(lines):
+            line = line if len(line) <= 180 else line[:177] + '...'
+            length += len(line) + 1
+            if length > 3900:
+                break
+            shown.append(line.replace('`', "'"))
+        embed.description = "```\n" + '\n'.join(reversed(shown)) + "\n```"
+    else:
+        embed.description = f"📭 **Aucune ligne trouvée sur les {days} derniers jours**"
+    
+    embed.set_footer(text=(f"📊 {len(lines)} résultat(s) • {stats['scanned']} bloc(s) lu(s) sur {stats['blocks']} "
+                           f"• {stats['seconds'] * 1000:.0f} ms"))
+    return embed
+
+async def run_search(state, query, days):
+    """Recherche dans l'archive de la guilde hors de la boucle asyncio ; None si l'archive est désactivée"""
+    if state.archive_search is None:
+        return None
+    now = get_french_time()
+    loop = asyncio.get_running_loop()
+    lines, stats = await loop.run_in_executor(state.parser.executor, state.archive_search.search, query,
+                                              now - timedelta(days=days), now)
+    return build_search_embed(query, lines, stats, days)
+
+@client.command(
+    name='search',
+    help='Cherche un texte dans les logs bruts archivés: !search Survivor01',
+    brief='Recherche dans les logs archivés',
+    description=(
+        'Affiche les dernières lignes du log du serveur contenant le texte (sans tenir compte de la casse), '
+        'sur les jours conservés par l\'archive. Un index de trigrammes évite de décompresser les blocs '
+        'qui ne peuvent pas contenir le texte.'
+    )
+)
+async def search_command(ctx, *, texte: str):
+    """Commande de recherche plein texte dans l'archive"""
+    state = await command_state(ctx)
+    if state is None:
+        return
+    try:
+        embed = await run_search(state, texte, SEARCH_DAYS)
+        if embed is None:
+            await ctx.send("❌ L'archive des logs est désactivée (section `archive` de la configuration).")
+            return
         await ctx.send(embed=embed)
         
     except Exception as e:
-        logger.error(f"Erreur logs: {e}")
-        await ctx.send("❌ Erreur lors de la récupération des logs.")
+        logger.error("Erreur search: %s", e)
+        await ctx.send("❌ Erreur lors de la recherche dans l'archive.")
+
+# Jours exportés par défaut par !export
+EXPORT_DAYS = 30
+# Taille de pièce jointe acceptée par Discord sans boost
+EXPORT_UPLOAD_LIMIT = 8 * 1024 * 1024
+
+def run_export(history, dataset, fmt, since):
+    """Écrit l'export dans un fichier temporaire (en mémoire tant qu'il est petit) ; retourne (fichier, lignes)"""
+    history.flush()
+    output = tempfile.SpooledTemporaryFile(max_size=EXPORT_UPLOAD_LIMIT)
+    count = export_history(history, dataset, fmt, output, since=since)
+    output.seek(0)
+    return output, count
+
+@client.command(
+    name='export',
+    help="Exporte l'historique: !export <events|sessions|probes> [csv|jsonl|parquet] [jours]",
+    brief="Export de l'historique",
+    description=(
+        'Envoie en pièce jointe les événements, les sessions de jeu reconstituées ou les relevés '
+        'du serveur des N derniers jours (30 par défaut), lus en flux dans l\'historique. Un export '
+        'trop gros pour Discord est écrit dans le dossier exports/ du bot. Réservé aux gestionnaires du serveur.'
+    )
+)
+@commands.has_permissions(manage_guild=True)
+async def export_command(ctx, dataset: str, fmt: str = 'csv', jours: int = EXPORT_DAYS):
+    """Commande d'export en masse de l'historique"""
+    state = await command_state(ctx)
+    if state is None:
+        return
+    if state.history is None:
+        await ctx.send("❌ L'historique est désactivé (section `history` de la configuration).")
+        return
+    dataset, fmt = dataset.lower(), fmt.lower()
+    
+    try:
+        since = get_french_time() - timedelta(days=max(1, jours))
+        loop = asyncio.get_running_loop()
+        output, count = await loop.run_in_executor(state.parser.executor, run_export, state.history, dataset, fmt, since)
+        with output:
+            filename = f"icarus-{dataset}-{get_french_time().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+            size = output.seek(0, os.SEEK_END)
+            output.seek(0)
+            limit = ctx.guild.filesize_limit if ctx.guild else EXPORT_UPLOAD_LIMIT
+            if size <= limit:
+                await ctx.send(f"📤 {count} ligne(s) exportée(s) sur {jours} jour(s)",
+                               file=discord.File(output, filename=filename))
+                return
+            # Trop gros pour une pièce jointe : copié sur le disque du bot
+            os.makedirs('exports', exist_ok=True)
+            path = os.path.join('exports', filename)
+            await loop.run_in_executor(state.parser.executor, copy_to_path, output, path)
+            await ctx.send(f"📦 {count} ligne(s) exportée(s) ({size / 1024 / 1024:.1f} Mo, trop gros pour Discord) : `{path}`")
+        
+    except (RuntimeError, ValueError) as e:
+        await ctx.send(f"❌ {e}")
+    except Exception as e:
+        logger.error("Erreur export: %s", e)
+        await ctx.send("❌ Erreur lors de l'export de l'historique.")
+
+def copy_to_path(source, path):
+    with open(path, 'wb') as target:
+        shutil.copyfileobj(source, target)
+
+# Jours analysés par défaut par !activity
+ACTIVITY_DAYS = 30
+
+def build_activity_embed(summary, days):
+    """Construit l'embed d'activité (concurrence, créneaux, temps de jeu) sur la période"""
+    embed = discord.Embed(
+        title=f"📈 **ACTIVITÉ DES {days} DERNIERS JOURS**",
+        color=0x9B59B6,
+        timestamp=get_french_time()
+    )
+    peak = "Aucune session"
+    if summary['peak_time']:
+        peak = f"**{summary['peak_players']}** joueur(s) le {summary['peak_time'].strftime('%d/%m à %H:%M')}"
+    embed.add_field(name="🏔️ Pic de joueurs simultanés", value=peak, inline=False)
+    embed.add_field(name="👥 Moyenne", value=f"{summary['average_players']:.2f} joueur(s) connecté(s)", inline=True)
+    embed.add_field(name="🎮 Sessions", value=str(summary['sessions']), inline=True)
+    
+    slots = [f"`{day} {hour:02d}h` • {players:.2f} joueur(s) en moyenne" for day, hour, players in summary['busiest_slots']]
+    embed.add_field(name="🕒 Créneaux les plus fréquentés", value='\n'.join(slots) or "Aucun", inline=False)
+    playtime = [f"**{name}** • {format_duration(seconds)}" for name, seconds in summary['playtime']]
+    embed.add_field(name="⏱️ Temps de jeu", value='\n'.join(playtime) or "Aucun", inline=False)
+    return embed
+
+def run_activity(history, days):
+    """Charge les sessions de la période dans NumPy et calcule le résumé (hors de la boucle asyncio)"""
+    history.flush()
+    now = get_french_time()
+    sessions = SessionArrays.from_history(history, now - timedelta(days=days), now)
+    return summarize_activity(sessions)
+
+@client.command(
+    name='activity',
+    help="Statistiques d'activité sur la période: !activity [jours]",
+    brief="Pic de joueurs, créneaux et temps de jeu",
+    description=(
+        'Reconstitue les sessions de jeu des N derniers jours (30 par défaut, 365 au maximum) depuis '
+        'l\'historique : pic de joueurs simultanés, créneaux jour × heure les plus fréquentés et temps '
+        'de jeu par joueur.'
+    )
+)
+async def activity_command(ctx, jours: int = ACTIVITY_DAYS):
+    """Commande d'analyse de l'activité sur une longue période"""
+    state = await command_state(ctx)
+    if state is None:
+        return
+    if state.history is None:
+        await ctx.send("❌ L'historique est désactivé (section `history` de la configuration).")
+        return
+    jours = max(1, min(jours, 365))
+    
+    try:
+        loop = asyncio.get_running_loop()
+        summary = await loop.run_in_executor(state.parser.executor, run_activity, state.history, jours)
+        await ctx.send(embed=build_activity_embed(summary, jours))
+        
+    except RuntimeError as e:
+        await ctx.send(f"❌ {e}")
+    except Exception as e:
+        logger.error("Erreur activity: %s", e)
+        await ctx.send("❌ Erreur lors de l'analyse de l'activité.")
+
+# Noms de période acceptés par !graph
+GRAPH_PERIODS = {'jour': 'day', 'day': 'day', '24h': 'day', 'semaine': 'week', 'week': 'week', '7j': 'week'}
+
+@client.command(
+    name='graph',
+    help="Graphique de l'historique: !graph [players|ping|saves] [jour|semaine]",
+    brief='Graphique joueurs, ping ou sauvegardes',
+    description=(
+        'Envoie un graphique PNG du nombre de joueurs connectés, du ping ou de la durée des sauvegardes '
+        'sur les dernières 24 heures ou les 7 derniers jours, lu dans l\'historique. L\'image est mise '
+        'en cache 5 minutes (jour) ou 1 heure (semaine).'
+    )
+)
+async def graph_command(ctx, graphique: str = 'players', periode: str = 'jour'):
+    """Commande pour afficher un graphique de l'historique"""
+    state = await command_state(ctx)
+    if state is None:
+        return
+    if state.history is None:
+        await ctx.send("❌ L'historique est désactivé (section `history` de la configuration).")
+        return
+    period = GRAPH_PERIODS.get(periode.lower())
+    if period is None:
+        await ctx.send("❌ Période invalide, `jour` ou `semaine` (ex: `!graph ping semaine`)")
+        return
+    
+    try:
+        png, cached = await chart_renderer.render(state.history, graphique.lower(), period, state.parser.executor)
+        filename = f"icarus-{graphique.lower()}-{period}.png"
+        await ctx.send(file=discord.File(BytesIO(png), filename=filename))
+        logger.debug("Graphique %s/%s envoyé (cache: %s)", graphique, period, cached)
+        
+    except (RuntimeError, ValueError) as e:
+        await ctx.send(f"❌ {e}")
+    except Exception as e:
+        logger.error("Erreur graph: %s", e)
+        await ctx.send("❌ Erreur lors du rendu du graphique.")
+
+@client.command(
+    name='timeline',
+    help='Parcourt la timeline des événements page par page (boutons précédent/suivant)',
+    brief='Timeline paginée des événements',
+    description=(
+        'Affiche les événements du serveur du plus récent au plus ancien, 10 par page, '
+        'avec des boutons de navigation. Un nom de joueur peut être donné comme filtre.'
+    )
+)
+async def timeline_command(ctx, joueur: str = None):
+    """Commande pour parcourir la timeline des événements"""
+    state = await command_state(ctx)
+    if state is None:
+        return
+    try:
+        view = TimelineView(state.parser, player_name=joueur)
+        view.load()
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
+        
+    except Exception as e:
+        logger.error("Erreur timeline: %s", e)
+        await ctx.send("❌ Erreur lors de l'affichage de la timeline.")
 
 @client.command(
     name='channel',
@@ -1372,13 +1498,15 @@ async def logs_command(ctx, limit: int = 10):
 @commands.has_permissions(manage_channels=True)
 async def set_channel(ctx, channel: discord.TextChannel = None):
     """Définit le canal pour le monitoring automatique"""
-    global current_channel_id, status_message
+    state = await command_state(ctx)
+    if state is None:
+        return
     
     if channel is None:
         channel = ctx.channel
     
-    current_channel_id = channel.id
-    status_message = None  # Force la création d'un nouveau message
+    state.channel_id = channel.id
+    state.status_message = None  # Force la création d'un nouveau message
     
     await ctx.send(f"✅ Canal de monitoring défini: {channel.mention}")
     logger.info(f"Canal de monitoring changé: {channel.id}")
@@ -1410,6 +1538,57 @@ async def fdp_command(ctx):
     
     await ctx.send(random.choice(reponses))
 
+def build_connect_embed(server):
+    """Construit l'embed des informations de connexion au serveur"""
+    
+    # Créer l'embed
+    embed = discord.Embed(
+        title="🚀 **CONNEXION AU SERVEUR ICARUS**",
+        description=(
+            f"Voici les informations pour te connecter à notre serveur Icarus.\n"
+            f"Copie-colle la commande ci-dessous dans la console du jeu (touche **`** pour l'ouvrir) :\n\n"
+            f"```/connect {server['ip']}:{server['port']} {server['password']}```"
+        ),
+        color=0x00D9FF,
+        timestamp=get_french_time()
+    )
+    
+    # Ajouter les informations de connexion
+    embed.add_field(
+        name="📋 **Informations de connexion**",
+        value=(
+            f"**IP du serveur:** `{server['ip']}`\n"
+            f"**Port:** `{server['port']}`\n"
+            f"**Mot de passe:** `{server['password']}`"
+        ),
+        inline=False
+    )
+    
+    # Méthode détaillée
+    embed.add_field(
+        name="🔍 **Méthode détaillée**",
+        value=(
+            "1. Lance **Icarus** depuis Steam\n"
+            "2. Appuie sur la touche **`** (au-dessus de Tab) pour ouvrir la console\n"
+            "3. Copie-colle la commande de connexion ci-dessus\n"
+            "4. Appuie sur **Entrée**"
+        ),
+        inline=False
+    )
+    
+    # Ajouter des conseils
+    embed.add_field(
+        name="💡 **Conseils**",
+        value=(
+            "• Assure-toi que Steam est bien lancé\n"
+            "• La console s'ouvre avec la touche **`** (au-dessus de Tab)\n"
+            "• Si tu rencontres des problèmes, redémarre Steam et le jeu"
+        ),
+        inline=False
+    )
+    
+    return embed
+
 @client.command(
     name='connect',
     help='Affiche les informations pour se connecter au serveur Icarus',
@@ -1421,55 +1600,11 @@ async def fdp_command(ctx):
 )
 async def connect_command(ctx):
     """Commande pour afficher les informations de connexion au serveur"""
+    state = await command_state(ctx)
+    if state is None:
+        return
     try:
-        # Créer l'embed
-        embed = discord.Embed(
-            title="🚀 **CONNEXION AU SERVEUR ICARUS**",
-            description=(
-                f"Voici les informations pour te connecter à notre serveur Icarus.\n"
-                f"Copie-colle la commande ci-dessous dans la console du jeu (touche **`** pour l'ouvrir) :\n\n"
-                f"```/connect {SERVER_IP}:{SERVER_PORT} {SERVER_PASSWORD}```"
-            ),
-            color=0x00D9FF,
-            timestamp=get_french_time()
-        )
-        
-        # Ajouter les informations de connexion
-        embed.add_field(
-            name="📋 **Informations de connexion**",
-            value=(
-                f"**IP du serveur:** `{SERVER_IP}`\n"
-                f"**Port:** `{SERVER_PORT}`\n"
-                f"**Mot de passe:** `{SERVER_PASSWORD}`"
-            ),
-            inline=False
-        )
-        
-        # Méthode détaillée
-        embed.add_field(
-            name="🔍 **Méthode détaillée**",
-            value=(
-                "1. Lance **Icarus** depuis Steam\n"
-                "2. Appuie sur la touche **`** (au-dessus de Tab) pour ouvrir la console\n"
-                "3. Copie-colle la commande de connexion ci-dessus\n"
-                "4. Appuie sur **Entrée**"
-            ),
-            inline=False
-        )
-        
-        # Ajouter des conseils
-        embed.add_field(
-            name="💡 **Conseils**",
-            value=(
-                "• Assure-toi que Steam est bien lancé\n"
-                "• La console s'ouvre avec la touche **`** (au-dessus de Tab)\n"
-                "• Si tu rencontres des problèmes, redémarre Steam et le jeu"
-            ),
-            inline=False
-        )
-        
-        # Envoyer le message
-        await ctx.send(embed=embed)
+        await ctx.send(embed=build_connect_embed(state.monitor.server_config))
         
     except Exception as e:
         logger.error(f"Erreur dans la commande connect: {e}")
@@ -1479,17 +1614,268 @@ async def connect_command(ctx):
             delete_after=10
         )
 
+# === COMMANDES SLASH ===
+# Réponses servies uniquement depuis les instantanés en mémoire : aucune lecture FTP,
+# l'interaction est acquittée bien avant la limite de 3 secondes de Discord.
+
+def _name_choices(interaction, kind, current):
+    """Propositions d'autocomplétion depuis l'index de préfixes du parseur de la guilde"""
+    state = guild_state(interaction.guild_id)
+    if state is None:
+        return []
+    return [app_commands.Choice(name=name, value=name) for name in state.parser.name_index[kind].complete(current)]
+
+async def player_autocomplete(interaction: discord.Interaction, current: str):
+    return _name_choices(interaction, 'player', current)
+
+async def biome_autocomplete(interaction: discord.Interaction, current: str):
+    return _name_choices(interaction, 'biome', current)
+
+async def prospect_autocomplete(interaction: discord.Interaction, current: str):
+    return _name_choices(interaction, 'prospect', current)
+
+async def interaction_state(interaction):
+    """État de la guilde de l'interaction ; répond à l'auteur si la guilde n'est pas configurée"""
+    state = guild_state(interaction.guild_id)
+    if state is None:
+        await interaction.response.send_message(NOT_CONFIGURED, ephemeral=True)
+    return state
+
+@client.tree.command(name='status', description="Affiche le statut actuel du serveur Icarus")
+async def status_slash(interaction: discord.Interaction):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    if state.monitor.last_status is None:
+        await interaction.response.send_message("⏳ Premier relevé du serveur en cours, réessaie dans quelques secondes.", ephemeral=True)
+        return
+    
+    embed = build_status_embed(state.monitor.last_status, state.parser)
+    await interaction.response.send_message(embed=embed, view=ServerConnectView())
+
+@client.tree.command(name='players', description="Liste les joueurs connectés ou affiche la fiche d'un joueur")
+@app_commands.describe(joueur="Nom du joueur")
+@app_commands.autocomplete(joueur=player_autocomplete)
+async def players_slash(interaction: discord.Interaction, joueur: str = None):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    await interaction.response.send_message(embed=build_players_embed(state.parser, joueur))
+
+@client.tree.command(name='logs', description="Affiche les derniers événements du serveur")
+@app_commands.describe(
+    limite="Nombre d'événements (1 à 20)",
+    joueur="Uniquement les événements de ce joueur",
+    biome="Uniquement les entrées dans ce biome",
+    mission="Uniquement les mises à jour de cette mission"
+)
+@app_commands.autocomplete(joueur=player_autocomplete, biome=biome_autocomplete, mission=prospect_autocomplete)
+async def logs_slash(interaction: discord.Interaction, limite: app_commands.Range[int, 1, 20] = 10,
+                     joueur: str = None, biome: str = None, mission: str = None):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    recent_events = state.parser.get_recent_events(limite, player_name=joueur, biome_name=biome, prospect_name=mission)
+    await interaction.response.send_message(embed=build_logs_embed(recent_events))
+
+@client.tree.command(name='timeline', description="Parcourt la timeline des événements page par page")
+@app_commands.describe(
+    joueur="Uniquement les événements de ce joueur",
+    type="Type d'événement",
+    depuis="Début de la plage, en heures avant maintenant",
+    jusqua="Fin de la plage, en heures avant maintenant"
+)
+@app_commands.choices(type=[app_commands.Choice(name=label, value=event_type) for event_type, label in EVENT_TYPE_LABELS.items()])
+@app_commands.autocomplete(joueur=player_autocomplete)
+async def timeline_slash(interaction: discord.Interaction, joueur: str = None, type: str = None,
+                         depuis: app_commands.Range[int, 1, 168] = None, jusqua: app_commands.Range[int, 0, 168] = None):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    now = get_french_time()
+    view = TimelineView(
+        state.parser,
+        player_name=joueur,
+        event_type=type,
+        since=now - timedelta(hours=depuis) if depuis else None,
+        until=now - timedelta(hours=jusqua) if jusqua else None
+    )
+    view.load()
+    await interaction.response.send_message(embed=view.build_embed(), view=view)
+    view.message = await interaction.original_response()
+
+@client.tree.command(name='search', description="Cherche un texte dans les logs bruts archivés")
+@app_commands.describe(texte="Texte à chercher (sans tenir compte de la casse)", jours="Jours parcourus (1 à 30)")
+async def search_slash(interaction: discord.Interaction, texte: str, jours: app_commands.Range[int, 1, 30] = SEARCH_DAYS):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    if state.archive_search is None:
+        await interaction.response.send_message("❌ L'archive des logs est désactivée.", ephemeral=True)
+        return
+    # Lecture disque : l'interaction est acquittée avant la recherche
+    await interaction.response.defer(thinking=True)
+    await interaction.followup.send(embed=await run_search(state, texte, jours))
+
+@client.tree.command(name='debug', description="Affiche l'état interne du bot (depuis le cache)")
+async def debug_slash(interaction: discord.Interaction):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    await interaction.response.send_message(embed=build_debug_embed(state.parser), ephemeral=True)
+
+@client.tree.command(name='connect', description="Affiche les informations pour se connecter au serveur Icarus")
+async def connect_slash(interaction: discord.Interaction):
+    state = await interaction_state(interaction)
+    if state is None:
+        return
+    await interaction.response.send_message(embed=build_connect_embed(state.monitor.server_config))
+
+@client.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    logger.error("Erreur commande slash /%s: %s", interaction.command.name if interaction.command else '?', error)
+    message = "❌ Erreur lors de l'exécution de la commande."
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
+# === SANTÉ / MÉTRIQUES ===
+
+# Au-delà de ce délai sans nouvel instantané, la boucle de monitoring est considérée bloquée
+HEALTH_MAX_SNAPSHOT_AGE = 120
+
+def health_check():
+    """Vérifie la vivacité du bot à partir des derniers instantanés (aucune I/O)
+    
+    En mode multi-guildes, c'est l'instantané le plus ancien qui compte : une
+    guilde dont le monitoring est bloqué rend le bot non sain.
+    """
+    monitors = [state.monitor for state in guild_registry.states()] if guild_registry else []
+    snapshots = [monitor for monitor in monitors if monitor.last_status is not None and monitor.last_status_time is not None]
+    if not snapshots:
+        return True, {'status': 'starting'}
+    
+    oldest = min(snapshots, key=lambda monitor: monitor.last_status_time)
+    age = (get_french_time() - oldest.last_status_time).total_seconds()
+    ok = age <= HEALTH_MAX_SNAPSHOT_AGE
+    payload = {
+        'status': 'ok' if ok else 'stale',
+        'snapshot_age_seconds': round(age, 1),
+        'last_update': oldest.last_status_time.isoformat()
+    }
+    if len(monitors) == 1:
+        payload['server_online'] = oldest.last_status['online']
+        payload['players'] = oldest.last_status['players']
+    else:
+        payload['guilds'] = len(monitors)
+        payload['guilds_reporting'] = len(snapshots)
+    return ok, payload
+
+def ready_check():
+    """Le bot est prêt quand Discord est connecté et qu'un premier statut existe"""
+    discord_ready = client.is_ready()
+    has_snapshot = guild_registry is not None and any(state.monitor.last_status is not None for state in guild_registry.states())
+    return discord_ready and has_snapshot, {
+        'discord_ready': discord_ready,
+        'has_snapshot': has_snapshot
+    }
+
+def init_bot(config=None):
+    """Lit la configuration et crée le parseur et le moniteur du serveur (un par guilde en mode multi-guildes)"""
+    global icarus_parser, server_monitor, collector_process, alert_engine, archive_search, guild_registry, shard_scheduler
+    global chart_renderer
+    
+    config = config or get_config()
+    monitoring = config.get('monitoring', {})
+    spans.recorder.enabled = monitoring.get('spans_enabled', True)
+    chart_renderer = ChartRenderer.from_config(config)
+    
+    # Section 'guilds' : un serveur Icarus par guilde, mises à jour réparties par shard
+    guild_registry = GuildRegistry.from_config(config)
+    if guild_registry is not None:
+        if monitoring.get('collector_process', False):
+            logger.warning("Processus collecteur non disponible en mode multi-guildes, lecture dans le bot")
+        icarus_parser = server_monitor = collector_process = alert_engine = archive_search = None
+        shard_scheduler = ShardScheduler.from_config(guild_registry, update_status_message, config)
+        return config
+    
+    shard_scheduler = None
+    use_collector = os.environ.get('ICARUS_COLLECTOR', '').lower() in ('1', 'true', 'yes') or monitoring.get('collector_process', False)
+    if use_collector:
+        icarus_parser = build_parser(config, CollectorParser)
+        server_monitor = CollectorMonitor(icarus_parser, server_config=config['server'])
+        collector_process = CollectorProcess(config, interval=monitoring.get('collector_interval_seconds', 15))
+    else:
+        icarus_parser = build_parser(config)
+        server_monitor = ServerMonitor(icarus_parser, server_config=config['server'])
+        collector_process = None
+    
+    # Alertes évaluées au fil des événements conservés et des relevés
+    alert_engine = AlertEngine.from_config(config)
+    if alert_engine:
+        icarus_parser.event_listeners.append(alert_engine.on_event)
+        server_monitor.status_listeners.append(alert_engine.on_status)
+    # Historique durable (exports, analyses longues)
+    history = HistoryStore.from_config(config)
+    if history:
+        icarus_parser.event_listeners.append(history.on_event)
+        server_monitor.status_listeners.append(history.on_status)
+    archive_search = LogSearch(icarus_parser.archive) if icarus_parser.archive else None
+    guild_registry = GuildRegistry(default=GuildState(
+        None, config['discord']['channel_id'], icarus_parser, server_monitor, alert_engine, archive_search, history))
+    return config
+
+async def main():
+    """Démarre le serveur HTTP de santé puis le bot Discord"""
+    config = get_config()
+    port = int(os.environ.get('PORT', 8080))
+    metrics.install_rate_limit_counter()
+    runner = await metrics.start_http_server(port, health_check, ready_check)
+    collector_task = None
+    if collector_process:
+        collector_task = asyncio.create_task(collector_process.run(icarus_parser, server_monitor))
+    alert_tasks = [asyncio.create_task(state.alert_engine.run(client)) for state in guild_registry.states() if state.alert_engine]
+    sharding = config.get('sharding') or {}
+    if sharding.get('shard_count'):
+        # Nombre de shards imposé (sinon recommandé par Discord à la connexion)
+        client.shard_count = sharding['shard_count']
+    try:
+        async with client:
+            await client.start(config['discord']['token'])
+    finally:
+        if collector_process:
+            collector_process.stop()
+            collector_task.cancel()
+        if shard_scheduler:
+            shard_scheduler.stop()
+        chart_renderer.close()
+        for task in alert_tasks:
+            task.cancel()
+        for state in guild_registry.states():
+            if state.parser.archive:
+                state.parser.archive.close()
+            if state.history:
+                state.history.close()
+        await runner.cleanup()
+
 # === DÉMARRAGE ===
 
 if __name__ == '__main__':
+    # Configuration du logging (file + thread d'écriture, rotation de icarus_bot.log)
+    setup_logging('icarus_bot.log')
+    metrics.STARTUP_IMPORT_SECONDS.set(time.perf_counter() - _STARTED_AT)
+    
     try:
         logger.info("🚀 Démarrage du bot Discord Icarus...")
-        logger.info(f"📡 Serveur: {SERVER_IP}:{SERVER_PORT}")
-        logger.info(f"📁 FTP: {FTP_HOST}:{FTP_PORT}")
-        logger.info(f"📋 Canal Discord: {CHANNEL_ID}")
+        config = init_bot()
+        for state in guild_registry.states():
+            server, ftp = state.monitor.server_config, state.parser.ftp_config
+            logger.info("📡 Serveur: %s:%s • 📁 FTP: %s:%s • 📋 Canal Discord: %s",
+                        server['ip'], server['port'], ftp['host'], ftp['port'], state.channel_id)
         logger.info(f"Tout est OP Micka, excellent travail ! 👏")
         
-        client.run(DISCORD_TOKEN)
+        asyncio.run(main())
         
     except KeyboardInterrupt:
         logger.info("⏹️ Arrêt du bot demandé par l'utilisateur")
@@ -0,0 +1,224 @@
+"""Moteur d'alertes évalué au fil des événements et des relevés du serveur
+
+Les règles déclarées dans la section 'alerts' de la configuration sont
+compilées en tables de dispatch par type d'événement : un événement n'évalue
+que les règles qui le concernent. Trois sortes de règles :
+  - 'on': <type d'événement>  alerte à chaque événement (filtre 'where' optionnel)
+  - 'on': 'probe'             condition sur le relevé (hors ligne, port fermé, ping)
+                              maintenue pendant 'for_seconds' (anti-rebond)
+  - 'on': 'absence'           aucun événement 'event' depuis 'for_seconds'
+Chaque règle a un 'cooldown_seconds' ; les messages sont postés par une tâche
+dédiée sur le canal de la règle (ou le canal par défaut des alertes).
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+import metrics
+from icarus_core import get_french_time
+
+logger = logging.getLogger(__name__)
+
+ALERTS_SENT = metrics.REGISTRY.counter(
+    'icarus_alerts_total', "Alertes déclenchées par règle", labelnames=('rule',))
+ALERTS_SUPPRESSED = metrics.REGISTRY.counter(
+    'icarus_alerts_suppressed_total', "Alertes supprimées par le délai de récupération", labelnames=('rule',))
+
+# Conditions disponibles pour les règles 'probe' : (statut, seuil) -> bool
+PROBE_CONDITIONS = {
+    'offline': lambda status, threshold: not status['online'],
+    'port_closed': lambda status, threshold: not status['port_open'],
+    'ping_above': lambda status, threshold: bool(status['ping']) and status['ping'] > threshold,
+    'players_above': lambda status, threshold: status['players'] > threshold
+}
+
+
+class _Fields(dict):
+    """Champs de message : un champ inconnu reste affiché tel quel"""
+
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+class AlertRule:
+    """Base commune : nom, message, canal et délai de récupération par clé"""
+
+    def __init__(self, spec, default_channel_id):
+        self.name = spec['name']
+        self.message = spec['message']
+        self.channel_id = spec.get('channel_id') or default_channel_id
+        self.cooldown = timedelta(seconds=spec.get('cooldown_seconds', 0))
+        self._last_fired = {}  # {clé: datetime}
+
+    def _alert(self, now, key=None, message=None, **fields):
+        """Construit l'alerte si la règle n'est pas en période de récupération"""
+        last = self._last_fired.get(key)
+        if last is not None and now - last < self.cooldown:
+            ALERTS_SUPPRESSED.inc(rule=self.name)
+            return None
+        self._last_fired[key] = now
+        ALERTS_SENT.inc(rule=self.name)
+        fields.setdefault('rule', self.name)
+        return {
+            'rule': self.name,
+            'channel_id': self.channel_id,
+            'content': (message or self.message).format_map(_Fields(fields))
+        }
+
+
+class EventRule(AlertRule):
+    """Alerte sur chaque événement d'un type donné"""
+
+    def __init__(self, spec, default_channel_id):
+        super().__init__(spec, default_channel_id)
+        self.event_type = spec['on']
+        self.where = spec.get('where', {})
+
+    def on_event(self, event, now):
+        if any(event.get(field) != value for field, value in self.where.items()):
+            return None
+        fields = {key: value for key, value in event.items() if key != 'raw_line'}
+        fields['time'] = event['timestamp'].strftime('%H:%M:%S')
+        return self._alert(now, key=event.get('player_name'), **fields)
+
+
+class ProbeRule(AlertRule):
+    """Alerte quand une condition sur le relevé dure au moins `for_seconds`"""
+
+    def __init__(self, spec, default_channel_id):
+        super().__init__(spec, default_channel_id)
+        if spec['condition'] not in PROBE_CONDITIONS:
+            raise ValueError(f"condition inconnue: {spec['condition']}")
+        self.condition = PROBE_CONDITIONS[spec['condition']]
+        self.threshold = spec.get('threshold', 0)
+        self.duration = timedelta(seconds=spec.get('for_seconds', 0))
+        self.resolved_message = spec.get('resolved_message')
+        self._since = None
+        self._fired = False
+
+    def on_status(self, status, now):
+        if not self.condition(status, self.threshold):
+            resolved = None
+            if self._fired and self.resolved_message:
+                resolved = self._alert(now, key='resolved', message=self.resolved_message,
+                                       for_minutes=int((now - self._since).total_seconds() // 60))
+            self._since = None
+            self._fired = False
+            return resolved
+
+        if self._since is None:
+            self._since = now
+        if self._fired or now - self._since < self.duration:
+            return None
+        self._fired = True
+        return self._alert(now, for_minutes=int((now - self._since).total_seconds() // 60), **status)
+
+
+class AbsenceRule(AlertRule):
+    """Alerte quand aucun événement d'un type n'est arrivé depuis `for_seconds`"""
+
+    def __init__(self, spec, default_channel_id, started_at):
+        super().__init__(spec, default_channel_id)
+        self.event_type = spec['event']
+        self.duration = timedelta(seconds=spec['for_seconds'])
+        self._last_seen = started_at
+        self._fired = False
+
+    def on_event(self, event, now):
+        # Réarme la règle : une alerte par période d'absence
+        self._last_seen = max(self._last_seen, event['timestamp'])
+        self._fired = False
+        return None
+
+    def on_tick(self, now):
+        if self._fired or now - self._last_seen < self.duration:
+            return None
+        self._fired = True
+        return self._alert(now, for_minutes=int((now - self._last_seen).total_seconds() // 60),
+                           last_seen=self._last_seen.strftime('%H:%M'))
+
+
+class AlertEngine:
+    """Compile les règles en tables de dispatch et met les alertes en file d'envoi"""
+
+    def __init__(self, rules, default_channel_id=None, max_event_age_seconds=300, queue_size=100):
+        self.max_event_age = timedelta(seconds=max_event_age_seconds)
+        self.by_event_type = {}  # {type: [règles]}
+        self.probe_rules = []
+        self.absence_rules = []
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+        started_at = get_french_time()
+        for spec in rules:
+            try:
+                if spec['on'] == 'probe':
+                    self.probe_rules.append(ProbeRule(spec, default_channel_id))
+                elif spec['on'] == 'absence':
+                    rule = AbsenceRule(spec, default_channel_id, started_at)
+                    self.absence_rules.append(rule)
+                    self.by_event_type.setdefault(rule.event_type, []).append(rule)
+                else:
+                    rule = EventRule(spec, default_channel_id)
+                    self.by_event_type.setdefault(rule.event_type, []).append(rule)
+            except (KeyError, ValueError) as e:
+                logger.error("❌ Règle d'alerte ignorée %s: %s", spec.get('name', spec), e)
+
+        logger.info("🔔 %d règles d'alerte chargées", sum(len(r) for r in self.by_event_type.values()) + len(self.probe_rules))
+
+    @classmethod
+    def from_config(cls, config):
+        """Crée le moteur depuis la section 'alerts' (None si absente ou désactivée)"""
+        section = config.get('alerts') or {}
+        if not section.get('enabled', False):
+            return None
+        return cls(
+            section.get('rules', []),
+            default_channel_id=section.get('channel_id') or config['discord']['channel_id'],
+            max_event_age_seconds=section.get('max_event_age_seconds', 300)
+        )
+
+    def _enqueue(self, alert):
+        if alert is None:
+            return
+        try:
+            self.queue.put_nowait(alert)
+        except asyncio.QueueFull:
+            logger.warning("File d'alertes pleine, alerte %s abandonnée", alert['rule'])
+
+    def on_event(self, event):
+        """Évalue les seules règles du type de l'événement"""
+        rules = self.by_event_type.get(event['type'])
+        if not rules:
+            return
+        now = get_french_time()
+        # Les événements relus au démarrage ne déclenchent pas d'alerte
+        if now - event['timestamp'] > self.max_event_age:
+            for rule in rules:
+                if isinstance(rule, AbsenceRule):
+                    rule.on_event(event, now)
+            return
+        for rule in rules:
+            self._enqueue(rule.on_event(event, now))
+
+    def on_status(self, status):
+        """Évalue les règles de relevé et d'absence après chaque relevé du serveur"""
+        now = get_french_time()
+        for rule in self.probe_rules:
+            self._enqueue(rule.on_status(status, now))
+        for rule in self.absence_rules:
+            self._enqueue(rule.on_tick(now))
+
+    async def run(self, client):
+        """Poste les alertes en file sur leurs canaux Discord"""
+        await client.wait_until_ready()
+        while True:
+            alert = await self.queue.get()
+            channel = client.get_channel(alert['channel_id'])
+            if channel is None:
+                logger.warning("Canal d'alerte %s non trouvé (règle %s)", alert['channel_id'], alert['rule'])
+                continue
+            try:
+                await channel.send(alert['content'])
+                logger.info("🔔 Alerte %s envoyée", alert['rule'])
+            except Exception as e:
+                logger.error("❌ Erreur envoi alerte %s: %s", alert['rule'], e)
@@ -0,0 +1,145 @@
+"""Analyses vectorisées des sessions de jeu (NumPy, optionnel)
+
+Les sessions reconstituées depuis l'historique (export.session_rows) sont
+chargées une fois dans des tableaux NumPy (début, fin en secondes epoch,
+code du joueur). Toutes les analyses en dérivent sans boucle Python :
+
+- courbe de concurrence par balayage : les débuts (+1) et fins (-1) triés
+  ensemble puis cumulés donnent une fonction en escalier du nombre de
+  joueurs connectés ;
+- pic de concurrence : maximum de cette courbe ;
+- carte jour de la semaine × heure : l'intégrale de la courbe (linéaire par
+  morceaux) est interpolée aux bornes des heures, la différence donne les
+  joueur-secondes de chaque heure, moyennées par case (np.bincount) ;
+- temps de jeu par joueur : np.bincount des durées pondéré par joueur.
+
+Une année de sessions se traite en quelques millisecondes.
+"""
+from datetime import datetime
+
+from icarus_core import TIMEZONE, get_french_time
+
+HOUR = 3600
+WEEKDAYS = ('Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim')
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("Les analyses nécessitent numpy (pip install numpy)")
+    return numpy
+
+
+class SessionArrays:
+    """Sessions de jeu en tableaux NumPy (secondes epoch), bornées à [since, until]"""
+
+    def __init__(self, starts, ends, players, names, since, until):
+        self.starts = starts
+        self.ends = ends
+        self.players = players  # Code du joueur (index dans names)
+        self.names = names
+        self.since = since
+        self.until = until
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_sessions(cls, sessions, since, until):
+        """Charge des sessions (player_name, start, end) ; une session en cours se termine à `until`"""
+        np = _numpy()
+        low, high = since.timestamp(), until.timestamp()
+        codes = {}
+        starts, ends, players = [], [], []
+        for session in sessions:
+            starts.append(session['start'].timestamp())
+            ends.append(session['end'].timestamp() if session['end'] else high)
+            players.append(codes.setdefault(session['player_name'], len(codes)))
+        starts = np.clip(np.asarray(starts, dtype=np.float64), low, high)
+        ends = np.clip(np.asarray(ends, dtype=np.float64), low, high)
+        keep = ends > starts
+        return cls(starts[keep], ends[keep], np.asarray(players, dtype=np.int32)[keep], list(codes), low, high)
+
+    @classmethod
+    def from_history(cls, store, since, until=None):
+        """Sessions de l'historique sur [since, until] (par défaut jusqu'à maintenant)"""
+        from export import session_rows
+        until = until or get_french_time()
+        return cls.from_sessions(session_rows(store.iter_records('events', since, until)), since, until)
+
+    def concurrency(self):
+        """Courbe en escalier (instants, joueurs connectés à partir de chaque instant)"""
+        np = _numpy()
+        times = np.concatenate((self.starts, self.ends))
+        deltas = np.concatenate((np.ones(len(self.starts), np.int32), -np.ones(len(self.ends), np.int32)))
+        # À instant égal, les fins passent avant les débuts (une reconnexion immédiate ne compte pas double)
+        order = np.lexsort((deltas, times))
+        return times[order], np.cumsum(deltas[order])
+
+    def peak(self):
+        """Pic de concurrence : (joueurs, instant) ; (0, None) sans session"""
+        times, counts = self.concurrency()
+        if not len(counts):
+            return 0, None
+        index = int(counts.argmax())
+        return int(counts[index]), datetime.fromtimestamp(times[index], TIMEZONE)
+
+    def concurrency_at(self, instants):
+        """Joueurs connectés à chaque instant (tableau de secondes epoch)"""
+        np = _numpy()
+        times, counts = self.concurrency()
+        index = np.searchsorted(times, instants, side='right') - 1
+        return np.where(index >= 0, counts[np.maximum(index, 0)], 0)
+
+    def _occupancy(self, bounds):
+        """Joueur-secondes entre bornes successives (intégrale exacte de la courbe en escalier)"""
+        np = _numpy()
+        times, counts = self.concurrency()
+        if not len(times):
+            return np.zeros(len(bounds) - 1)
+        integral = np.concatenate(([0.0], np.cumsum(counts[:-1] * np.diff(times))))
+        at_bounds = np.interp(bounds, times, integral, left=0.0, right=integral[-1])
+        return np.diff(at_bounds)
+
+    def weekly_heatmap(self):
+        """Joueurs connectés en moyenne par (jour de la semaine, heure locale) : tableau 7 × 24"""
+        np = _numpy()
+        first = self.since - self.since % HOUR
+        bounds = np.arange(first, self.until + HOUR, HOUR, dtype=np.float64)
+        occupancy = self._occupancy(bounds)
+        # Décalage horaire local de chaque heure (heure d'été) ; le fuseau n'a que des décalages entiers
+        offsets = np.fromiter(
+            (datetime.fromtimestamp(start, TIMEZONE).utcoffset().total_seconds() for start in bounds[:-1]),
+            dtype=np.float64, count=len(bounds) - 1)
+        local = (bounds[:-1] + offsets) // HOUR
+        # 1970-01-01 était un jeudi (jour 3, lundi = 0)
+        cells = ((local // 24 + 3) % 7 * 24 + local % 24).astype(np.int64)
+        seconds = np.bincount(cells, weights=occupancy, minlength=168)
+        hours = np.bincount(cells, minlength=168)
+        return (seconds / np.maximum(hours, 1) / HOUR).reshape(7, 24)
+
+    def playtime(self, limit=None):
+        """Temps de jeu total par joueur en secondes, du plus grand au plus petit"""
+        np = _numpy()
+        totals = np.bincount(self.players, weights=self.ends - self.starts, minlength=len(self.names))
+        order = np.argsort(totals)[::-1][:limit]
+        return [(self.names[index], float(totals[index])) for index in order if totals[index] > 0]
+
+
+def summarize(sessions, top=5):
+    """Résumé pour l'embed d'activité : pic, créneaux les plus fréquentés, temps de jeu"""
+    np = _numpy()
+    heatmap = sessions.weekly_heatmap()
+    busiest = np.argsort(heatmap, axis=None)[::-1][:top]
+    players, peak_time = sessions.peak()
+    return {
+        'sessions': len(sessions),
+        'peak_players': players,
+        'peak_time': peak_time,
+        'average_players': float(sessions._occupancy(np.array([sessions.since, sessions.until]))[0]
+                                 / max(sessions.until - sessions.since, 1)),
+        'busiest_slots': [(WEEKDAYS[cell // 24], int(cell % 24), float(heatmap.flat[cell]))
+                          for cell in busiest if heatmap.flat[cell] > 0],
+        'playtime': sessions.playtime(top)
+    }
@@ -0,0 +1,38 @@
+"""Import du module Icarus hors production pour les benchmarks
+
+Icarus.py ne lit plus la configuration à l'import : on installe une copie de
+config_template.json via icarus_core.set_config puis on appelle init_bot(),
+sans jamais toucher à la vraie config.
+"""
+import importlib
+import json
+import logging
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def template_config():
+    """Retourne une copie de config_template.json"""
+    with open(os.path.join(REPO_ROOT, 'config_template.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def import_icarus(quiet=True, config=None):
+    """Importe et retourne le module Icarus initialisé avec une configuration factice"""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    already_loaded = 'Icarus' in sys.modules
+    module = importlib.import_module('Icarus')
+    if not already_loaded or config is not None:
+        import icarus_core
+        config = config or template_config()
+        icarus_core.set_config(config)
+        module.init_bot(config)
+
+    if quiet:
+        # Le parseur journalise chaque événement : on coupe l'INFO pour mesurer le code, pas le logging
+        logging.disable(logging.INFO)
+    return module
@@ -0,0 +1,278 @@
+"""Benchmarks du parseur et du store d'événements
+
+Mesure parse_log_line, convert_timestamp, add_events, get_server_stats,
+get_recent_events et create_enhanced_embed sur un log synthétique (et, si
+numpy est installé, les analyses d'une année de sessions), puis
+enregistre les résultats pour comparaison avec une exécution précédente.
+
+Utilisation :
+    python -m benchmarks.bench_core --lines 20000 --players 8 --save baseline
+    python -m benchmarks.bench_core --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks._env import REPO_ROOT, import_icarus
+from benchmarks.loggen import generate_lines
+
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Enregistre un benchmark : la fonction décorée retourne (run, opérations par run)"""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def _fresh_parser(icarus):
+    from icarus_core import IcarusLogParser
+    return IcarusLogParser()
+
+
+def _parse_all(parser, lines):
+    events = []
+    for line in lines:
+        event = parser.parse_log_line(line)
+        if event:
+            events.append(event)
+    return events
+
+
+@benchmark('parse_log_line')
+def bench_parse_log_line(icarus, lines):
+    def run():
+        _parse_all(_fresh_parser(icarus), lines)
+    return run, len(lines)
+
+
+@benchmark('convert_timestamp')
+def bench_convert_timestamp(icarus, lines):
+    parser = _fresh_parser(icarus)
+    timestamps = [line[1:line.index(']')] for line in lines]
+
+    def run():
+        convert = parser.convert_timestamp
+        for timestamp in timestamps:
+            convert(timestamp)
+    return run, len(timestamps)
+
+
+@benchmark('add_events')
+def bench_add_events(icarus, lines):
+    events = _parse_all(_fresh_parser(icarus), lines)
+    batch_size = 50
+    batches = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+
+    def run():
+        parser = _fresh_parser(icarus)
+        for batch in batches:
+            parser.add_events(batch)
+    return run, max(len(events), 1)
+
+
+def _populated_parser(icarus, lines):
+    parser = _fresh_parser(icarus)
+    parser.add_events(_parse_all(parser, lines))
+    return parser
+
+
+@benchmark('get_server_stats')
+def bench_get_server_stats(icarus, lines):
+    parser = _populated_parser(icarus, lines)
+    calls = 200
+
+    def run():
+        for _ in range(calls):
+            parser.get_server_stats()
+    return run, calls
+
+
+@benchmark('get_recent_events')
+def bench_get_recent_events(icarus, lines):
+    parser = _populated_parser(icarus, lines)
+    calls = 1000
+
+    def run():
+        for _ in range(calls):
+            parser.get_recent_events(5)
+    return run, calls
+
+
+@benchmark('create_enhanced_embed')
+def bench_create_enhanced_embed(icarus, lines):
+    # Le parseur global alimente l'embed ; les I/O réseau sont remplacées par des valeurs fixes
+    parser = icarus.icarus_parser
+    parser.add_events(_parse_all(parser, lines))
+
+    async def no_fetch():
+        return []
+
+    async def fixed_ping():
+        return 25.0
+
+    async def port_open():
+        return True
+
+    parser.read_logs_ftp = no_fetch
+    icarus.server_monitor.get_server_ping = fixed_ping
+    icarus.server_monitor.check_port = port_open
+
+    calls = 100
+    loop = asyncio.new_event_loop()
+
+    async def many():
+        for _ in range(calls):
+            await icarus.create_enhanced_embed(icarus.guild_registry.default)
+
+    def run():
+        loop.run_until_complete(many())
+    return run, calls
+
+
+def _year_of_sessions(players=8, per_day=3, seed=0):
+    import random
+    from datetime import timedelta
+    from icarus_core import get_french_time
+    rng = random.Random(seed)
+    until = get_french_time()
+    since = until - timedelta(days=365)
+    sessions = []
+    for day in range(365):
+        for player in range(players):
+            for _ in range(per_day):
+                start = since + timedelta(days=day, hours=rng.uniform(0, 24))
+                sessions.append({'player_name': f'Survivor{player:02d}', 'start': start,
+                                 'end': start + timedelta(minutes=rng.uniform(10, 180))})
+    return sessions, since, until
+
+
+if importlib.util.find_spec('numpy'):
+    @benchmark('session_analytics')
+    def bench_session_analytics(icarus, lines):
+        # Une année de sessions : chargement NumPy, concurrence, carte jour × heure et temps de jeu
+        from analytics import SessionArrays, summarize
+        sessions, since, until = _year_of_sessions()
+
+        def run():
+            summarize(SessionArrays.from_sessions(sessions, since, until))
+        return run, len(sessions)
+
+
+def measure(run, ops, repeat, warmup=1):
+    """Exécute `run` et retourne les statistiques de durée"""
+    for _ in range(warmup):
+        run()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    median = statistics.median(durations)
+    return {
+        'ops': ops,
+        'repeat': repeat,
+        'best_s': min(durations),
+        'median_s': median,
+        'per_op_us': median / ops * 1e6,
+        'ops_per_s': ops / median if median > 0 else None
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Compare deux exécutions et retourne la liste des régressions"""
+    regressions = []
+    print(f"\n{'benchmark':<24}{'base µs/op':>12}{'µs/op':>12}{'delta':>9}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base:
+            print(f"{name:<24}{'-':>12}{result['per_op_us']:>12.2f}{'new':>9}")
+            continue
+        delta = (result['per_op_us'] - base['per_op_us']) / base['per_op_us']
+        flag = ''
+        if delta > threshold:
+            flag = '  ⚠️'
+            regressions.append(name)
+        print(f"{name:<24}{base['per_op_us']:>12.2f}{result['per_op_us']:>12.2f}{delta:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du parseur Icarus")
+    parser.add_argument('--lines', type=int, default=20000, help="Taille du log synthétique")
+    parser.add_argument('--players', type=int, default=8, help="Nombre de joueurs simulés")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du générateur")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de mesures par benchmark")
+    parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS), help="Benchmarks à exécuter")
+    parser.add_argument('--save', metavar='NOM', help="Enregistre les résultats dans benchmarks/results/NOM.json")
+    parser.add_argument('--compare', metavar='FICHIER', help="Compare avec un fichier de résultats existant")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Seuil de régression (0.15 = +15%%)")
+    args = parser.parse_args(argv)
+    # Les avertissements du parseur (sauvegardes lentes du log synthétique) fausseraient l'affichage
+    logging.getLogger('icarus_core').setLevel(logging.ERROR)
+
+    icarus = import_icarus()
+    lines = generate_lines(args.lines, players=args.players, seed=args.seed)
+
+    current = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'lines': args.lines,
+            'players': args.players,
+            'seed': args.seed
+        },
+        'results': {}
+    }
+
+    print(f"{'benchmark':<24}{'ops':>8}{'median ms':>12}{'µs/op':>10}{'ops/s':>12}")
+    for name in args.only or BENCHMARKS:
+        run, ops = BENCHMARKS[name](icarus, lines)
+        result = measure(run, ops, args.repeat)
+        current['results'][name] = result
+        print(f"{name:<24}{ops:>8}{result['median_s'] * 1000:>12.2f}"
+              f"{result['per_op_us']:>10.2f}{result['ops_per_s']:>12.0f}")
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'{args.save}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Résultats enregistrés: {path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ Régressions au-delà de {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Benchmark du démarrage : coût d'import et délai jusqu'au premier statut
+
+Mesure, dans des sous-processus neufs (aucun cache de modules) :
+  - le temps d'import de icarus_core et de Icarus
+  - le délai entre le lancement et le premier embed de statut construit,
+    contre un FTP local (pyftpdlib) servant un log synthétique
+
+Utilisation :
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --skip-first-status
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import shutil
+import time
+
+from benchmarks._env import REPO_ROOT
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+# Le processus mesuré part de zéro : import, configuration, première lecture FTP, embed
+FIRST_STATUS_SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import asyncio
+from benchmarks._env import import_icarus
+from benchmarks.load_harness import harness_config
+icarus = import_icarus(config=harness_config({port}))
+imported = time.perf_counter() - start
+embed = asyncio.run(icarus.create_enhanced_embed(icarus.guild_registry.default))
+print(json.dumps({{'import_s': imported, 'first_status_s': time.perf_counter() - start}}))
+"""
+
+
+def _run_snippet(code):
+    output = subprocess.check_output([sys.executable, '-X', 'frozen_modules=off', '-c', code],
+                                     cwd=REPO_ROOT, stderr=subprocess.DEVNULL)
+    return output.decode().strip().splitlines()[-1]
+
+
+def measure_import(module, repeat):
+    """Durées d'import d'un module dans des interpréteurs neufs"""
+    code = IMPORT_SNIPPET.format(root=REPO_ROOT, module=module)
+    return [float(_run_snippet(code)) for _ in range(repeat)]
+
+
+def measure_first_status(repeat, lines, players):
+    """Délai jusqu'au premier embed contre un FTP local"""
+    from benchmarks.load_harness import LOG_PATH, _free_port, run_ftp_server
+    from benchmarks.loggen import generate_lines
+
+    root = tempfile.mkdtemp(prefix='icarus_ftp_')
+    log_file = os.path.join(root, LOG_PATH)
+    os.makedirs(os.path.dirname(log_file))
+    with open(log_file, 'w', encoding='utf-8') as f:
+        for line in generate_lines(lines, players=players):
+            f.write(line + '\n')
+
+    port = _free_port()
+    ftp_process = multiprocessing.Process(target=run_ftp_server, args=(root, port), daemon=True)
+    ftp_process.start()
+    time.sleep(0.5)
+    try:
+        code = FIRST_STATUS_SNIPPET.format(root=REPO_ROOT, port=port)
+        return [json.loads(_run_snippet(code)) for _ in range(repeat)]
+    finally:
+        ftp_process.terminate()
+        ftp_process.join()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _summary(values):
+    return f"médiane {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage du bot Icarus")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de processus mesurés")
+    parser.add_argument('--lines', type=int, default=5000, help="Taille du log servi par le FTP local")
+    parser.add_argument('--players', type=int, default=8, help="Nombre de joueurs simulés")
+    parser.add_argument('--skip-first-status', action='store_true', help="Ne mesure que les imports")
+    args = parser.parse_args(argv)
+
+    print("⏱️ Imports (interpréteur neuf)")
+    for module in ('icarus_core', 'Icarus'):
+        print(f"  {module:<14} {_summary(measure_import(module, args.repeat))}")
+
+    if args.skip_first_status:
+        return 0
+    if importlib.util.find_spec('pyftpdlib') is None:
+        print("❌ pyftpdlib est requis pour le premier statut : pip install pyftpdlib")
+        return 1
+
+    runs = measure_first_status(args.repeat, args.lines, args.players)
+    print("🚀 Lancement → premier embed (FTP local)")
+    print(f"  {'import':<14} {_summary([r['import_s'] for r in runs])}")
+    print(f"  {'premier statut':<14} {_summary([r['first_status_s'] for r in runs])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
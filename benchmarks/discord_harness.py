@@ -0,0 +1,431 @@
+"""Harnais de charge Discord : commandes et boutons pilotés contre une API simulée
+
+Remplace la passerelle et l'API REST de Discord par des objets factices
+(canal, message, contexte de commande, interaction) qui appliquent une latence
+réseau, des buckets de rate limit par route (429 + retry_after rejoués comme le
+fait discord.py) et la limite de 3 secondes des interactions. Des centaines
+d'utilisateurs simulés appellent en parallèle les handlers du bot (!status,
+!players, !logs, /status, boutons « Se Connecter » et « Statistiques ») pendant
+que la boucle de monitoring édite le message de statut. Le rapport donne, par
+action, les latences p50/p99 jusqu'à la première réponse, ainsi que les
+lectures FTP déclenchées, les 429, le retard de la boucle asyncio et la
+croissance mémoire.
+
+Le FTP local du harnais de charge (pyftpdlib) sert le log ; sans pyftpdlib
+(ou avec --no-ftp) les lectures échouent et le disjoncteur FTP est exercé.
+
+Utilisation :
+    python -m benchmarks.discord_harness --users 300 --duration 30
+    python -m benchmarks.discord_harness --users 500 --latency 0.12 --rate-limit-prob 0.02 --json out.json
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks._env import import_icarus
+from benchmarks.load_harness import LOG_PATH, _free_port, _percentile, harness_config, run_ftp_server
+from benchmarks.loggen import generate_lines
+
+# Délai d'acquittement d'une interaction imposé par Discord
+INTERACTION_DEADLINE = 3.0
+
+# Actions des utilisateurs simulés et leur poids par défaut
+DEFAULT_MIX = {
+    '!status': 2, '!players': 2, '!logs': 1, '/status': 3, 'button_connect': 4, 'button_stats': 4
+}
+
+
+class FakeDiscordAPI:
+    """API REST simulée : latence, buckets de rate limit par route et 429 aléatoires
+
+    Comme le client HTTP de discord.py, une réponse 429 n'est pas remontée à
+    l'appelant : la requête est rejouée après retry_after, le temps perdu
+    s'ajoute à la latence observée.
+    """
+
+    def __init__(self, latency=0.08, jitter=0.04, bucket_size=5, bucket_window=5.0,
+                 rate_limit_prob=0.0, retry_after=1.0, seed=0):
+        import metrics
+        self.metrics = metrics
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket_size = bucket_size
+        self.bucket_window = bucket_window
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self._buckets = {}  # {route: [début de fenêtre, requêtes]}
+        self.requests = 0
+        self.rate_limited = 0
+        self._next_id = 1
+
+    def snowflake(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _limited(self, route, bucketed):
+        if self.rate_limit_prob and self.random.random() < self.rate_limit_prob:
+            return self.retry_after
+        if not bucketed:
+            return None
+        now = time.monotonic()
+        bucket = self._buckets.get(route)
+        if bucket is None or now - bucket[0] >= self.bucket_window:
+            bucket = self._buckets[route] = [now, 0]
+        if bucket[1] >= self.bucket_size:
+            return bucket[0] + self.bucket_window - now
+        bucket[1] += 1
+        return None
+
+    async def request(self, route, bucketed=True):
+        """Simule un appel REST : latence aller-retour, 429 rejoués jusqu'au succès"""
+        while True:
+            self.requests += 1
+            await asyncio.sleep(max(0.0, self.random.gauss(self.latency, self.jitter)))
+            retry_after = self._limited(route, bucketed)
+            if retry_after is None:
+                return
+            # Ce que RateLimitCounterFilter compterait depuis le logger discord.http
+            self.rate_limited += 1
+            self.metrics.DISCORD_RATE_LIMITED.inc()
+            await asyncio.sleep(retry_after)
+
+
+class FakeMessage:
+    def __init__(self, api, channel, **payload):
+        self.api = api
+        self.channel = channel
+        self.id = api.snowflake()
+        self.author = None
+        self.embeds = [payload['embed']] if payload.get('embed') else []
+        self.payload = payload
+
+    async def edit(self, **payload):
+        await self.api.request(f'PATCH /channels/{self.channel.id}/messages')
+        self.payload.update(payload)
+        return self
+
+    async def delete(self, delay=None):
+        if delay:
+            return
+        await self.api.request(f'DELETE /channels/{self.channel.id}/messages')
+
+
+class FakeChannel:
+    def __init__(self, api, channel_id):
+        self.api = api
+        self.id = channel_id
+        self.mention = f'<#{channel_id}>'
+        self.sent = 0
+
+    async def send(self, content=None, **payload):
+        await self.api.request(f'POST /channels/{self.id}/messages')
+        self.sent += 1
+        return FakeMessage(self.api, self, content=content, **payload)
+
+    async def history(self, limit=100):
+        # Canal vide : aucun ancien message du bot à nettoyer
+        return
+        yield
+
+
+class FakeContext:
+    """Contexte de commande préfixée : mesure le délai jusqu'au premier message envoyé"""
+
+    def __init__(self, channel, guild_id):
+        self.channel = channel
+        self.guild = SimpleNamespace(id=guild_id)
+        self.author = SimpleNamespace(id=channel.api.snowflake())
+        self.started = time.perf_counter()
+        self.first_response = None
+
+    async def send(self, content=None, **payload):
+        message = await self.channel.send(content, **payload)
+        if self.first_response is None:
+            self.first_response = time.perf_counter() - self.started
+        return message
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _ack(self, route):
+        interaction = self.interaction
+        if self._done:
+            raise RuntimeError("Interaction déjà acquittée")
+        await interaction.api.request(route, bucketed=False)
+        if time.perf_counter() - interaction.started > INTERACTION_DEADLINE:
+            # Ce que Discord répond après la limite : 404 Unknown interaction (10062)
+            import discord
+            interaction.expired = True
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'),
+                                   {'code': 10062, 'message': 'Unknown interaction'})
+        self._done = True
+        interaction.first_response = time.perf_counter() - interaction.started
+
+    async def send_message(self, content=None, **payload):
+        await self._ack('POST /interactions/callback')
+
+    async def edit_message(self, **payload):
+        await self._ack('POST /interactions/callback')
+
+    async def defer(self, **payload):
+        await self._ack('POST /interactions/callback')
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **payload):
+        await self.interaction.api.request(f'POST /webhooks/{self.interaction.id}')
+        return FakeMessage(self.interaction.api, self.interaction.channel, content=content, **payload)
+
+
+class FakeInteraction:
+    """Interaction (bouton, commande slash) avec horodatage de création et limite de 3 secondes"""
+
+    def __init__(self, api, channel, guild_id):
+        import discord
+        self.api = api
+        self.id = api.snowflake()
+        self.channel = channel
+        self.guild_id = guild_id
+        self.user = SimpleNamespace(id=api.snowflake())
+        self.command = None
+        self.created_at = discord.utils.utcnow()
+        self.started = time.perf_counter()
+        self.first_response = None
+        self.expired = False
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+
+    def is_expired(self):
+        return time.perf_counter() - self.started > 15 * 60
+
+    async def original_response(self):
+        return FakeMessage(self.api, self.channel)
+
+
+class Harness:
+    """Pilote les handlers du bot avec des utilisateurs simulés"""
+
+    def __init__(self, icarus, api, args):
+        self.icarus = icarus
+        self.api = api
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.state = icarus.guild_registry.default
+        self.channel = FakeChannel(api, self.state.channel_id)
+        self.guild_id = api.snowflake()
+        self.view = None
+        self.latencies = {action: [] for action in DEFAULT_MIX}
+        self.errors = {action: 0 for action in DEFAULT_MIX}
+        self.expired = 0
+        self.monitor_cycles = []
+        self.loop_lag = []
+        self.ftp_reads = 0
+        # La passerelle est remplacée : le bot ne voit que le canal simulé
+        icarus.client.get_channel = lambda channel_id: self.channel if channel_id == self.channel.id else None
+
+    def count_ftp_reads(self):
+        parser = self.state.parser
+        fetch_log = parser._fetch_log
+
+        def counting_fetch(*args, **kwargs):
+            self.ftp_reads += 1
+            return fetch_log(*args, **kwargs)
+
+        parser._fetch_log = counting_fetch
+
+    async def run_action(self, action):
+        icarus = self.icarus
+        if action.startswith('!'):
+            target = FakeContext(self.channel, self.guild_id)
+            if action == '!status':
+                await icarus.status_command.callback(target)
+            elif action == '!players':
+                await icarus.players_command.callback(target)
+            else:
+                await icarus.logs_command.callback(target, 10)
+        else:
+            target = FakeInteraction(self.api, self.channel, self.guild_id)
+            try:
+                if action == '/status':
+                    await icarus.status_slash.callback(target)
+                elif action == 'button_connect':
+                    await self.view.connect_button.callback(target)
+                else:
+                    await self.view.stats_button.callback(target)
+            finally:
+                if target.expired:
+                    self.expired += 1
+        if target.first_response is None:
+            self.errors[action] += 1
+        else:
+            self.latencies[action].append(target.first_response)
+
+    async def user(self, deadline, actions, weights):
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.random.expovariate(1.0 / self.args.think))
+            action = self.random.choices(actions, weights)[0]
+            try:
+                await self.run_action(action)
+            except Exception:
+                self.errors[action] += 1
+
+    async def monitor(self, deadline):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            await self.icarus.update_status_message(self.state)
+            elapsed = time.perf_counter() - started
+            self.monitor_cycles.append(elapsed)
+            await asyncio.sleep(max(0.0, self.args.interval - elapsed))
+
+    async def lag_probe(self, deadline, period=0.05):
+        loop = asyncio.get_running_loop()
+        while time.monotonic() < deadline:
+            expected = loop.time() + period
+            await asyncio.sleep(period)
+            self.loop_lag.append(max(0.0, loop.time() - expected))
+
+    async def run(self):
+        # Vue persistante partagée, comme celle enregistrée par client.add_view en production
+        self.view = self.icarus.ServerConnectView()
+        self.count_ftp_reads()
+        # Premier relevé avant l'arrivée des utilisateurs (le bot publie son statut au démarrage)
+        await self.icarus.update_status_message(self.state)
+
+        mix = {action: weight for action, weight in DEFAULT_MIX.items() if action in self.args.actions}
+        actions, weights = list(mix), list(mix.values())
+        deadline = time.monotonic() + self.args.duration
+        tasks = [self.monitor(deadline), self.lag_probe(deadline)]
+        tasks += [self.user(deadline, actions, weights) for _ in range(self.args.users)]
+        await asyncio.gather(*tasks)
+
+
+def summarize(harness, memory):
+    actions = {}
+    for action, values in harness.latencies.items():
+        if not values and not harness.errors[action]:
+            continue
+        actions[action] = {
+            'count': len(values),
+            'errors': harness.errors[action],
+            'p50_ms': (_percentile(values, 0.50) or 0) * 1000,
+            'p99_ms': (_percentile(values, 0.99) or 0) * 1000,
+            'max_ms': max(values, default=0) * 1000,
+            'over_deadline': sum(1 for value in values if value > INTERACTION_DEADLINE)
+        }
+    return {
+        'actions': actions,
+        'interactions_expired': harness.expired,
+        'monitor_cycles': len(harness.monitor_cycles),
+        'monitor_cycle_p99_ms': (_percentile(harness.monitor_cycles, 0.99) or 0) * 1000,
+        'ftp_reads': harness.ftp_reads,
+        'rest_requests': harness.api.requests,
+        'rate_limited': harness.api.rate_limited,
+        'loop_lag_p99_ms': (_percentile(harness.loop_lag, 0.99) or 0) * 1000,
+        'loop_lag_max_ms': max(harness.loop_lag, default=0) * 1000,
+        **memory
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Harnais de charge Discord (API simulée)")
+    parser.add_argument('--users', type=int, default=200, help="Utilisateurs simulés en parallèle")
+    parser.add_argument('--duration', type=float, default=20, help="Durée du test (s)")
+    parser.add_argument('--think', type=float, default=2.0, help="Temps moyen entre deux actions d'un utilisateur (s)")
+    parser.add_argument('--actions', nargs='*', choices=sorted(DEFAULT_MIX), default=list(DEFAULT_MIX),
+                        help="Actions simulées")
+    parser.add_argument('--interval', type=float, default=15, help="Période de la boucle de monitoring (s)")
+    parser.add_argument('--latency', type=float, default=0.08, help="Latence moyenne de l'API Discord (s)")
+    parser.add_argument('--jitter', type=float, default=0.04, help="Écart type de la latence (s)")
+    parser.add_argument('--bucket', default='5/5', help="Rate limit par route de canal: requêtes/secondes")
+    parser.add_argument('--rate-limit-prob', type=float, default=0.0, help="Probabilité d'un 429 sur toute requête")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="retry_after des 429 aléatoires (s)")
+    parser.add_argument('--no-ftp', action='store_true', help="Pas de FTP local : lectures en échec (disjoncteur)")
+    parser.add_argument('--prefill', type=int, default=5000, help="Lignes du log servi par le FTP local")
+    parser.add_argument('--seed', type=int, default=0, help="Graine des tirages")
+    parser.add_argument('--json', metavar='FICHIER', help="Écrit le rapport complet en JSON")
+    args = parser.parse_args(argv)
+    bucket_size, bucket_window = (float(part) for part in args.bucket.split('/'))
+
+    root = ftp_process = None
+    port = _free_port()
+    if not args.no_ftp:
+        if importlib.util.find_spec('pyftpdlib') is None:
+            print("⚠️ pyftpdlib absent : lectures FTP en échec (--no-ftp)")
+            args.no_ftp = True
+    if not args.no_ftp:
+        root = tempfile.mkdtemp(prefix='icarus_ftp_')
+        log_file = os.path.join(root, LOG_PATH)
+        os.makedirs(os.path.dirname(log_file))
+        with open(log_file, 'w', encoding='utf-8') as f:
+            for line in generate_lines(args.prefill, seed=args.seed):
+                f.write(line + '\n')
+        ftp_process = multiprocessing.Process(target=run_ftp_server, args=(root, port), daemon=True)
+        ftp_process.start()
+        time.sleep(0.5)
+
+    icarus = import_icarus(config=harness_config(port))
+    api = FakeDiscordAPI(args.latency, args.jitter, int(bucket_size), bucket_window,
+                         args.rate_limit_prob, args.retry_after, args.seed)
+    harness = Harness(icarus, api, args)
+    print(f"👥 {args.users} utilisateurs • {args.duration:g}s • latence API {args.latency * 1000:.0f}ms "
+          f"• FTP {'désactivé' if args.no_ftp else f'local 127.0.0.1:{port}'}")
+
+    tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        asyncio.run(harness.run())
+    finally:
+        if ftp_process:
+            ftp_process.terminate()
+            ftp_process.join()
+        if root:
+            shutil.rmtree(root, ignore_errors=True)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # ru_maxrss est en Kio sous Linux
+    memory = {
+        'python_heap_kib': current / 1024,
+        'python_heap_peak_kib': peak / 1024,
+        'rss_growth_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    }
+
+    summary = summarize(harness, memory)
+    print(f"\n{'action':<16}{'n':>7}{'err':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'>3s':>6}")
+    for action, row in summary['actions'].items():
+        print(f"{action:<16}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+              f"{row['max_ms']:>10.1f}{row['over_deadline']:>6}")
+    print("\n📊 Résumé")
+    for key, value in summary.items():
+        if key != 'actions':
+            print(f"  {key:<24} {value if not isinstance(value, float) else round(value, 1)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'summary': summary}, f, indent=2)
+        print(f"💾 Rapport écrit: {args.json}")
+    return 1 if summary['interactions_expired'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
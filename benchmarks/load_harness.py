@@ -0,0 +1,287 @@
+"""Harnais de charge de bout en bout avec un FTP local et un log vivant
+
+Démarre un serveur FTP local (pyftpdlib) servant un Icarus.log qu'un processus
+écrivain alimente à un débit donné (avec rotations et troncatures), puis
+pilote IcarusLogParser.read_logs_ftp ou ServerMonitor.get_server_status
+contre ce serveur pour mesurer, par cycle :
+  - la latence de bout en bout des événements (écriture → détection)
+  - les octets transférés
+  - le temps CPU et le temps réel consommés
+
+Prérequis : pip install pyftpdlib
+
+Utilisation :
+    python -m benchmarks.load_harness --rate 50 --cycles 20 --interval 2
+    python -m benchmarks.load_harness --rate 200 --rotate-every 30 --truncate-every 45 --json out.json
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks._env import import_icarus, template_config
+from benchmarks.loggen import TIMEZONE, IcarusLogGenerator, generate_lines
+
+FTP_USER = 'icarus'
+FTP_PASS = 'bench'
+LOG_PATH = 'Icarus/Config/Saved/Logs/Icarus.log'
+
+# Marqueurs des lignes qui doivent produire un événement côté parseur
+EVENT_MARKERS = (
+    'ServerTryCompletePlayerInitialisation', 'DetachPlayerFromSeat', 'just entered new biome',
+    'BeginRecording', 'EndRecording', 'UpdateActiveProspectInfo', 'Connection Closed'
+)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_ftp_server(root, port):
+    """Processus serveur FTP (pyftpdlib)"""
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import FTPServer
+    import logging
+    # Sans handler racine, pyftpdlib installe le sien en INFO : on fixe le niveau avant
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('pyftpdlib').setLevel(logging.WARNING)
+
+    authorizer = DummyAuthorizer()
+    authorizer.add_user(FTP_USER, FTP_PASS, root, perm='elr')
+    handler = FTPHandler
+    handler.authorizer = authorizer
+    handler.passive_ports = None
+    server = FTPServer(('127.0.0.1', port), handler)
+    server.serve_forever()
+
+
+def run_writer(log_file, rate, players, rotate_every, truncate_every, seed, lines_written, events_written):
+    """Processus écrivain : ajoute `rate` lignes/s avec rotations et troncatures périodiques"""
+    generator = IcarusLogGenerator(players=players, seed=seed, realtime=True)
+    stream = generator.lines(float('inf'))
+    tick = 0.1
+    per_tick = rate * tick
+    budget = 0.0
+    started = last_rotate = last_truncate = time.monotonic()
+    output = open(log_file, 'a', encoding='utf-8')
+
+    try:
+        while True:
+            now = time.monotonic()
+            if rotate_every and now - last_rotate >= rotate_every:
+                # Rotation à la manière d'Unreal : Icarus.log → Icarus-backup-<date>.log
+                output.close()
+                stamp = datetime.now(TIMEZONE).strftime('%Y.%m.%d-%H.%M.%S')
+                os.replace(log_file, log_file.replace('.log', f'-backup-{stamp}.log'))
+                output = open(log_file, 'a', encoding='utf-8')
+                last_rotate = now
+            if truncate_every and now - last_truncate >= truncate_every:
+                output.truncate(0)
+                output.seek(0)
+                last_truncate = now
+
+            budget += per_tick
+            count = int(budget)
+            budget -= count
+            events = 0
+            for _ in range(count):
+                line = next(stream)
+                output.write(line + '\n')
+                if any(marker in line for marker in EVENT_MARKERS):
+                    events += 1
+            output.flush()
+            with lines_written.get_lock():
+                lines_written.value += count
+            with events_written.get_lock():
+                events_written.value += events
+
+            elapsed = time.monotonic() - started
+            time.sleep(max(0.0, tick - (elapsed % tick)))
+    finally:
+        output.close()
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[int((len(ordered) - 1) * fraction)]
+
+
+async def drive(icarus, args, lines_written, events_written):
+    """Exécute les cycles de lecture et collecte les mesures"""
+    import metrics
+
+    parser = icarus.icarus_parser
+    started_at = datetime.now(TIMEZONE)
+    seen = set()
+    latencies = []
+    cycles = []
+    emitted = []
+
+    # Capture les événements émis par chaque lecture, quel que soit le point d'entrée piloté
+    read_logs_ftp = parser.read_logs_ftp
+
+    async def capturing_read():
+        events = await read_logs_ftp()
+        emitted.extend(events)
+        return events
+
+    parser.read_logs_ftp = capturing_read
+    last_lines = lines_written.value
+
+    for cycle in range(args.cycles):
+        bytes_before = metrics.FTP_FETCH_BYTES_TOTAL.value()
+        emitted.clear()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+
+        if args.mode == 'read':
+            parser.add_events(await parser.read_logs_ftp())
+        else:
+            await icarus.server_monitor.get_server_status()
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        detected_at = datetime.now(TIMEZONE)
+
+        new_events = 0
+        duplicates = 0
+        for event in emitted:
+            key = (event['type'], event['timestamp'], event.get('player_name'))
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            new_events += 1
+            # Les lignes pré-remplies ne mesurent pas la latence de détection
+            if event['timestamp'] >= started_at:
+                latencies.append((detected_at - event['timestamp']).total_seconds())
+
+        current_lines = lines_written.value
+        row = {
+            'cycle': cycle,
+            'wall_ms': wall * 1000,
+            'cpu_ms': cpu * 1000,
+            'bytes': metrics.FTP_FETCH_BYTES_TOTAL.value() - bytes_before,
+            'lines_written': current_lines - last_lines,
+            'new_events': new_events,
+            'duplicate_events': duplicates,
+            'ftp_available': parser.ftp_available
+        }
+        last_lines = current_lines
+        cycles.append(row)
+        print(f"{cycle:>5}{row['wall_ms']:>10.1f}{row['cpu_ms']:>10.1f}{row['bytes']:>12.0f}"
+              f"{row['lines_written']:>8}{new_events:>8}{duplicates:>8}  {'✅' if row['ftp_available'] else '❌'}")
+
+        await asyncio.sleep(max(0.0, args.interval - wall))
+
+    parser.read_logs_ftp = read_logs_ftp
+    return {
+        'params': vars(args),
+        'cycles': cycles,
+        'summary': {
+            'events_written': events_written.value,
+            'events_detected_live': len(latencies),
+            'events_detected_total': len(seen),
+            'latency_p50_s': _percentile(latencies, 0.50),
+            'latency_p95_s': _percentile(latencies, 0.95),
+            'latency_max_s': max(latencies) if latencies else None,
+            'bytes_per_cycle': statistics.mean(c['bytes'] for c in cycles),
+            'cpu_ms_per_cycle': statistics.mean(c['cpu_ms'] for c in cycles),
+            'wall_ms_per_cycle': statistics.mean(c['wall_ms'] for c in cycles),
+            'duplicate_events': sum(c['duplicate_events'] for c in cycles)
+        }
+    }
+
+
+def harness_config(port):
+    """Configuration pointant vers le FTP local (le port FTP sert aussi de port de jeu pour check_port)"""
+    config = template_config()
+    config['ftp'].update({'host': '127.0.0.1', 'port': port, 'user': FTP_USER,
+                          'password': FTP_PASS, 'log_path': LOG_PATH})
+    config['server'].update({'ip': '127.0.0.1', 'port': port})
+    return config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Harnais de charge FTP de bout en bout")
+    parser.add_argument('--rate', type=float, default=50, help="Lignes écrites par seconde")
+    parser.add_argument('--players', type=int, default=8, help="Nombre de joueurs simulés")
+    parser.add_argument('--cycles', type=int, default=20, help="Nombre de cycles de lecture")
+    parser.add_argument('--interval', type=float, default=2.0, help="Intervalle entre cycles (s)")
+    parser.add_argument('--mode', choices=('status', 'read'), default='status',
+                        help="status: get_server_status, read: read_logs_ftp seul")
+    parser.add_argument('--rotate-every', type=float, default=0, help="Rotation du log toutes les N secondes")
+    parser.add_argument('--truncate-every', type=float, default=0, help="Troncature du log toutes les N secondes")
+    parser.add_argument('--prefill', type=int, default=2000, help="Lignes présentes avant le premier cycle")
+    parser.add_argument('--seed', type=int, default=0, help="Graine du générateur")
+    parser.add_argument('--json', metavar='FICHIER', help="Écrit le rapport complet en JSON")
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec('pyftpdlib') is None:
+        print("❌ pyftpdlib est requis : pip install pyftpdlib")
+        return 1
+
+    root = tempfile.mkdtemp(prefix='icarus_ftp_')
+    log_file = os.path.join(root, LOG_PATH)
+    os.makedirs(os.path.dirname(log_file))
+
+    # Historique initial (horodaté dans le passé) pour simuler un serveur déjà en route
+    with open(log_file, 'w', encoding='utf-8') as f:
+        for line in generate_lines(args.prefill, players=args.players, seed=args.seed + 1):
+            f.write(line + '\n')
+
+    port = _free_port()
+    lines_written = multiprocessing.Value('q', 0)
+    events_written = multiprocessing.Value('q', 0)
+    ftp_process = multiprocessing.Process(target=run_ftp_server, args=(root, port), daemon=True)
+    writer_process = multiprocessing.Process(
+        target=run_writer,
+        args=(log_file, args.rate, args.players, args.rotate_every, args.truncate_every,
+              args.seed, lines_written, events_written),
+        daemon=True
+    )
+    ftp_process.start()
+    writer_process.start()
+    time.sleep(0.5)
+
+    icarus = import_icarus(config=harness_config(port))
+    print(f"📡 FTP local 127.0.0.1:{port} • {args.rate:g} lignes/s • mode {args.mode}")
+    print(f"{'cycle':>5}{'wall ms':>10}{'cpu ms':>10}{'bytes':>12}{'lines':>8}{'new':>8}{'dup':>8}")
+
+    try:
+        report = asyncio.run(drive(icarus, args, lines_written, events_written))
+    finally:
+        writer_process.terminate()
+        ftp_process.terminate()
+        writer_process.join()
+        ftp_process.join()
+        shutil.rmtree(root, ignore_errors=True)
+
+    summary = report['summary']
+    print("\n📊 Résumé")
+    for key, value in summary.items():
+        print(f"  {key:<24} {value if not isinstance(value, float) else round(value, 3)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"💾 Rapport écrit: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
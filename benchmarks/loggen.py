@@ -0,0 +1,184 @@
+"""Générateur de logs Icarus synthétiques pour les benchmarks
+
+Produit des lignes au format du serveur dédié (horodatage Unreal, catégories
+Log*) : initialisation/détachement des joueurs, changements de biome,
+sauvegardes BeginRecording/EndRecording, mises à jour de mission, spam de
+craft et bruit de fond.
+
+Utilisation :
+    python -m benchmarks.loggen --lines 100000 --players 8 -o Icarus.log
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+
+# Le serveur écrit ses horodatages dans le fuseau du bot (voir Icarus.TIMEZONE)
+TIMEZONE = pytz.timezone('Europe/Paris')
+
+BIOMES = ['Forest', 'Arctic', 'Desert', 'Swamp', 'Volcanic', 'Grasslands', 'Canyons', 'Riverlands']
+PROSPECTS = ['Outpost_Olympus', 'Outpost_Styx', 'Outpost_Prometheus', 'Mission_Lost_Cargo', 'Mission_Ice_Breaker']
+RECIPES = ['Wood_Spear', 'Stone_Axe', 'Bandage', 'Fiber_Rope', 'Wood_Floor', 'Wood_Wall', 'Campfire', 'Arrow']
+STATIONS = ['Crafting_Bench', 'Character', 'Mortar_And_Pestle', 'Textiles_Bench', 'Anvil_Bench']
+NOISE = [
+    'LogStreaming: Display: FlushAsyncLoading: 1 QueuedPackages, 0 AsyncPackages',
+    'LogNet: NotifyAcceptingConnection accepted from: 10.0.0.{n}:51234',
+    'LogIcarusWorld: Spawned 12 actors in level chunk {n}',
+    'LogTemp: Warning: Unable to find socket for attachment on BP_Deployable_C_{n}',
+    'LogGarbage: Collecting garbage (reachability analysis took {n}.12ms)',
+    'LogAI: Warning: BP_Wolf_C_{n} failed to find path to target',
+    'LogIcarusWeather: Weather event tick: Storm intensity 0.{n}',
+]
+
+# Poids par défaut des types de lignes (le bruit et le craft dominent comme en production)
+DEFAULT_MIX = {
+    'noise': 60,
+    'crafting': 25,
+    'biome': 6,
+    'session': 3,
+    'save': 3,
+    'prospect': 1,
+    'connection': 2,
+}
+
+
+def format_timestamp(dt):
+    """Formate un datetime au format d'horodatage Icarus (2024.01.15-14.38.42:123)"""
+    return dt.strftime('%Y.%m.%d-%H.%M.%S') + f':{dt.microsecond // 1000:03d}'
+
+
+class IcarusLogGenerator:
+    """Simule l'activité d'un serveur Icarus et produit les lignes correspondantes"""
+
+    def __init__(self, players=4, seed=0, start=None, line_interval=0.5, mix=None, realtime=False):
+        self.rng = random.Random(seed)
+        self.player_names = [f'Survivor{i:02d}' for i in range(1, players + 1)]
+        self.character_ids = {name: 2147482000 + i * 17 for i, name in enumerate(self.player_names)}
+        self.connection_ids = {name: 2147483000 + i * 23 for i, name in enumerate(self.player_names)}
+        self.online = set()
+        self.saving = False
+        self.frame = 0
+        self.line_interval = line_interval
+        self.realtime = realtime  # Horodate chaque ligne avec l'heure réelle (écriture en direct)
+        self.now = start
+        self.mix = dict(mix or DEFAULT_MIX)
+        self._kinds = list(self.mix)
+        self._weights = [self.mix[k] for k in self._kinds]
+
+    def _prefix(self):
+        self.frame += 1
+        return f'[{format_timestamp(self.now)}][{self.frame % 1000:3d}]'
+
+    def _advance(self):
+        if self.realtime:
+            self.now = datetime.now(TIMEZONE).replace(tzinfo=None)
+            return
+        # Intervalle exponentiel autour de la moyenne, borné pour rester réaliste
+        step = min(self.rng.expovariate(1 / self.line_interval), self.line_interval * 20)
+        self.now += timedelta(seconds=step)
+
+    def _character(self, name):
+        return f'BP_IcarusPlayerCharacterSurvival_C_{self.character_ids[name]}'
+
+    def _connect(self, name):
+        self.online.add(name)
+        cid = self.connection_ids[name]
+        return [
+            f'{self._prefix()}LogNet: Login request: ?Name={name}?SplitscreenCount=1 userId: Steam:7656119{cid}',
+            f'{self._prefix()}LogNet: Join request: /Game/Maps/Terrains/Terrain_016?Name={name}?SplitscreenCount=1 '
+            f'IpConnection_{cid}',
+            f'{self._prefix()}LogIcarusPlayerController: Display: ServerTryCompletePlayerInitialisation '
+            f'{self._character(name)} IpConnection_{cid} Name={name}',
+        ]
+
+    def _disconnect(self, name):
+        self.online.discard(name)
+        cid = self.connection_ids[name]
+        if self.rng.random() < 0.7:
+            return [f'{self._prefix()}LogIcarusPlayerController: DetachPlayerFromSeat '
+                    f'{self._character(name)} Name={name}']
+        return [f'{self._prefix()}LogNet: UNetConnection::Close: Name: IpConnection_{cid}, '
+                f'Driver: GameNetDriver, Connection Closed']
+
+    def _lines_for(self, kind):
+        online = sorted(self.online)
+        if kind == 'session':
+            offline = [p for p in self.player_names if p not in self.online]
+            if offline and (not online or self.rng.random() < 0.6):
+                return self._connect(self.rng.choice(offline))
+            if online:
+                return self._disconnect(self.rng.choice(online))
+            return []
+        if kind == 'biome' and online:
+            name = self.rng.choice(online)
+            return [f'{self._prefix()}LogIcarusBiome: {self._character(name)} just entered new biome: '
+                    f'{self.rng.choice(BIOMES)}']
+        if kind == 'crafting' and online:
+            name = self.rng.choice(online)
+            return [f'{self._prefix()}LogIcarusCrafting: Crafting {self._character(name)} Requested Add '
+                    f'{self.rng.choice(RECIPES)} to {self.rng.choice(STATIONS)}']
+        if kind == 'save':
+            self.saving = not self.saving
+            marker = 'BeginRecording' if self.saving else 'EndRecording'
+            return [f'{self._prefix()}LogIcarusSaveSystem: Display: {marker}']
+        if kind == 'prospect':
+            key = self.rng.choice(PROSPECTS)
+            return [f'{self._prefix()}LogIcarusProspect: UpdateActiveProspectInfo ProspectID: '
+                    f'{self.rng.randint(1, 999)} ProspectDTKey: {key}']
+        if kind == 'connection' and online:
+            name = self.rng.choice(online)
+            return [f'{self._prefix()}LogNet: Remote address for IpConnection_{self.connection_ids[name]} '
+                    f'{self._character(name)} updated']
+        return [f'{self._prefix()}{self.rng.choice(NOISE).format(n=self.rng.randint(1, 999))}']
+
+    def lines(self, count):
+        """Génère `count` lignes de log"""
+        produced = 0
+        while produced < count:
+            self._advance()
+            kind = self.rng.choices(self._kinds, self._weights)[0]
+            for line in self._lines_for(kind):
+                if produced >= count:
+                    break
+                yield line
+                produced += 1
+
+
+def generate_lines(count, players=4, seed=0, start=None, line_interval=0.5, mix=None):
+    """Génère `count` lignes se terminant approximativement à l'heure actuelle si `start` est omis"""
+    if start is None:
+        # Première passe pour connaître la durée simulée (la séquence ne dépend que de la graine)
+        now = datetime.now(TIMEZONE).replace(tzinfo=None)
+        dry_run = IcarusLogGenerator(players=players, seed=seed, start=now,
+                                     line_interval=line_interval, mix=mix)
+        for _ in dry_run.lines(count):
+            pass
+        start = now - (dry_run.now - now)
+    generator = IcarusLogGenerator(players=players, seed=seed, start=start,
+                                   line_interval=line_interval, mix=mix)
+    return list(generator.lines(count))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère un log Icarus synthétique")
+    parser.add_argument('--lines', type=int, default=10000, help="Nombre de lignes à générer")
+    parser.add_argument('--players', type=int, default=4, help="Nombre de joueurs simulés")
+    parser.add_argument('--seed', type=int, default=0, help="Graine aléatoire")
+    parser.add_argument('--interval', type=float, default=0.5, help="Intervalle moyen entre lignes (s)")
+    parser.add_argument('-o', '--output', help="Fichier de sortie (stdout par défaut)")
+    args = parser.parse_args(argv)
+
+    lines = generate_lines(args.lines, players=args.players, seed=args.seed, line_interval=args.interval)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for line in lines:
+            output.write(line + '\n')
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
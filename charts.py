@@ -0,0 +1,174 @@
+"""Graphiques PNG de l'historique, rendus dans un pool de processus
+
+Les séries (joueurs connectés, ping, durée des sauvegardes) sont lues dans
+l'historique par un thread, puis le rendu matplotlib (optionnel) se fait dans
+un processus du pool : ni la lecture ni le dessin ne bloquent la boucle
+asyncio, et le GIL du bot n'est pas partagé avec matplotlib.
+
+Une image est mise en cache par (historique, graphique, période, tranche de
+temps) : toutes les demandes d'une même tranche (5 minutes pour le jour, 1
+heure pour la semaine) réutilisent le PNG, et les demandes simultanées d'une
+image en cours de rendu attendent le même rendu.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import metrics
+from icarus_core import TIMEZONE, get_french_time
+
+logger = logging.getLogger(__name__)
+
+CHART_RENDER_DURATION = metrics.REGISTRY.histogram(
+    'icarus_chart_render_seconds', "Durée du rendu d'un graphique (lecture de l'historique + dessin)",
+    labelnames=('chart',))
+CHART_REQUESTS = metrics.REGISTRY.counter(
+    'icarus_chart_requests_total', "Demandes de graphique, servies par le cache ou rendues",
+    labelnames=('chart', 'result'))
+
+# {graphique: (titre, libellé de l'axe, type d'enregistrement, champ)}
+CHARTS = {
+    'players': ("Joueurs connectés", "Joueurs", 'probes', 'players'),
+    'ping': ("Ping du serveur", "Ping (ms)", 'probes', 'ping_ms'),
+    'saves': ("Durée des sauvegardes", "Durée (s)", 'events', 'duration_seconds'),
+}
+# {période: (durée affichée, tranche de cache en secondes)}
+PERIODS = {
+    'day': (timedelta(days=1), 300),
+    'week': (timedelta(days=7), 3600),
+}
+
+
+def load_series(history, chart, since, until):
+    """Instants (secondes epoch) et valeurs de la série sur [since, until]"""
+    _, _, kind, field = CHARTS[chart]
+    times, values = [], []
+    for record in history.iter_records(kind, since, until):
+        if chart == 'saves' and record.get('type') != 'game_save_complete':
+            continue
+        value = record.get(field)
+        if value is None:
+            continue
+        times.append(record['timestamp'].timestamp())
+        values.append(value)
+    return times, values
+
+
+def render_png(chart, period, times, values, since, until):
+    """Dessine le graphique et retourne le PNG (exécuté dans un processus du pool)"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.dates as mdates
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise RuntimeError("Les graphiques nécessitent matplotlib (pip install matplotlib)")
+    from datetime import datetime
+    from io import BytesIO
+
+    title, ylabel, _, _ = CHARTS[chart]
+    dates = [datetime.fromtimestamp(t, TIMEZONE) for t in times]
+    figure, axes = plt.subplots(figsize=(8, 3), dpi=100)
+    try:
+        if chart == 'saves':
+            axes.plot(dates, values, marker='o', markersize=3, linewidth=1, color='#3498DB')
+        elif chart == 'players':
+            axes.step(dates, values, where='post', linewidth=1.2, color='#2ECC71')
+            axes.yaxis.get_major_locator().set_params(integer=True)
+        else:
+            axes.plot(dates, values, linewidth=0.8, color='#E67E22')
+        axes.set_title(f"{title} ({'24 h' if period == 'day' else '7 jours'})")
+        axes.set_ylabel(ylabel)
+        axes.set_xlim(datetime.fromtimestamp(since, TIMEZONE), datetime.fromtimestamp(until, TIMEZONE))
+        axes.set_ylim(bottom=0)
+        axes.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M' if period == 'day' else '%d/%m', tz=TIMEZONE))
+        axes.grid(alpha=0.3)
+        if not times:
+            axes.text(0.5, 0.5, "Aucune donnée", transform=axes.transAxes, ha='center', va='center')
+        figure.tight_layout()
+        output = BytesIO()
+        figure.savefig(output, format='png')
+        return output.getvalue()
+    finally:
+        plt.close(figure)
+
+
+class ChartRenderer:
+    """Rendu des graphiques dans un pool de processus, avec cache par tranche de temps"""
+
+    def __init__(self, processes=1, cache_size=32):
+        self.processes = processes
+        self.cache_size = cache_size
+        self._pool = None
+        self._cache = OrderedDict()  # {clé: PNG} (LRU)
+        self._pending = {}  # {clé: Future} rendus en cours
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('charts') or {}
+        return cls(processes=section.get('processes', 1), cache_size=section.get('cache_size', 32))
+
+    def _executor(self):
+        if self._pool is None:
+            # 'spawn' comme le collecteur : pas de fork du processus qui porte la boucle Discord
+            self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    async def render(self, history, chart, period='day', thread_executor=None):
+        """PNG du graphique sur la période ; retourne (png, servi par le cache)"""
+        if chart not in CHARTS:
+            raise ValueError(f"Graphique inconnu: {chart} ({', '.join(CHARTS)})")
+        if period not in PERIODS:
+            raise ValueError(f"Période inconnue: {period} ({', '.join(PERIODS)})")
+        span, bucket_seconds = PERIODS[period]
+        now = get_french_time()
+        bucket = int(now.timestamp() // bucket_seconds)
+        key = (history.directory, chart, period, bucket)
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            CHART_REQUESTS.inc(chart=chart, result='hit')
+            return self._cache[key], True
+        if key in self._pending:
+            CHART_REQUESTS.inc(chart=chart, result='hit')
+            return await asyncio.shield(self._pending[key]), True
+
+        CHART_REQUESTS.inc(chart=chart, result='miss')
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            png = await self._render(history, chart, period, now - span, now, thread_executor)
+            future.set_result(png)
+        except BaseException as e:
+            # Demande annulée (BaseException) : les demandes en attente du même rendu reçoivent une erreur
+            future.set_exception(RuntimeError("Rendu du graphique interrompu, réessayez")
+                                 if isinstance(e, asyncio.CancelledError) else e)
+            # Exception déjà transmise à l'appelant : évite l'avertissement si personne d'autre n'attendait
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+        self._cache[key] = png
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return png, False
+
+    async def _render(self, history, chart, period, since, until, thread_executor):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            times, values = await loop.run_in_executor(thread_executor, load_series, history, chart, since, until)
+            return await loop.run_in_executor(self._executor(), render_png, chart, period, times, values,
+                                              since.timestamp(), until.timestamp())
+        finally:
+            CHART_RENDER_DURATION.observe(time.perf_counter() - started, chart=chart)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
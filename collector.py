@@ -0,0 +1,251 @@
+"""Collecteur de logs dans un processus séparé de la passerelle Discord
+
+Le processus collecteur possède la lecture FTP, le décodage, l'analyse des
+lignes et le calcul des statistiques. Il publie à chaque cycle, sur un Pipe,
+un instantané compact (statut, joueurs, statistiques) et le delta des
+événements lus. Côté bot, CollectorParser et CollectorMonitor exposent la même
+interface que IcarusLogParser / ServerMonitor sans aucune I/O : une rafale
+d'analyse (reprise après coupure) ne retarde ni les heartbeats ni les
+acquittements d'interactions.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+
+import metrics
+import spans
+from icarus_core import IcarusLogParser, ServerMonitor, get_french_time
+from log_archive import LogArchive
+from log_mirror import LogMirror
+from logging_setup import DATE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Métriques alimentées par le collecteur et recopiées dans le registre du bot
+COLLECTOR_METRICS = (
+    'icarus_ftp_fetch_bytes', 'icarus_ftp_fetch_bytes_total', 'icarus_ftp_fetch_duration_seconds',
+    'icarus_ftp_fetch_errors_total', 'icarus_log_lines_parsed_total', 'icarus_log_lines_parsed_per_second',
+    'icarus_events_total', 'icarus_stage_duration_seconds', 'icarus_save_duration_seconds',
+    'icarus_save_interval_seconds', 'icarus_save_regressions_total', 'icarus_server_log_lines_per_second',
+    'icarus_server_log_max_gap_seconds', 'icarus_server_log_silence_seconds', 'icarus_server_log_gap_seconds',
+    'icarus_archive_bytes_total', 'icarus_archive_blocks_total', 'icarus_ftp_breaker_state',
+    'icarus_ftp_breaker_state_seconds_total', 'icarus_ftp_breaker_transitions_total', 'icarus_ftp_short_circuited_total',
+    'icarus_log_mirror_bytes', 'icarus_log_mirror_resets_total', 'icarus_log_mirror_resumed_bytes_total'
+)
+
+
+def build_parser(config, parser_class=IcarusLogParser):
+    """Crée un parseur à partir de la configuration (section 'monitoring' optionnelle)
+
+    Le parseur côté bot du mode collecteur ne lit pas le FTP : il n'a pas de
+    miroir et ouvre l'archive en lecture seule (le collecteur en est l'unique
+    écrivain).
+    """
+    monitoring = config.get('monitoring', {})
+    writer = not issubclass(parser_class, CollectorParser)
+    return parser_class(
+        ftp_config=config['ftp'],
+        player_timeout_minutes=monitoring.get('player_timeout_minutes', 45),
+        event_retention_hours=monitoring.get('event_retention_hours', 24),
+        activity_window_minutes=monitoring.get('activity_window_minutes', 120),
+        max_events=monitoring.get('max_events', 2000),
+        save_regression_factor=monitoring.get('save_regression_factor', 2.0),
+        stall_gap_seconds=monitoring.get('stall_gap_seconds', 120),
+        crash_loop_restarts=monitoring.get('crash_loop_restarts', 3),
+        crash_loop_minutes=monitoring.get('crash_loop_minutes', 15),
+        archive=LogArchive.from_config(config, read_only=not writer),
+        breaker_failure_threshold=monitoring.get('ftp_breaker_failures', 3),
+        breaker_probe_seconds=monitoring.get('ftp_breaker_probe_seconds', 30),
+        breaker_max_probe_seconds=monitoring.get('ftp_breaker_max_probe_seconds', 600),
+        mirror=LogMirror.from_config(config) if writer else None
+    )
+
+
+# === PROCESSUS COLLECTEUR ===
+
+def run_collector(conn, config, interval):
+    """Point d'entrée du processus collecteur"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)-8s [collecteur] %(message)s',
+        datefmt=DATE_FORMAT
+    )
+    spans.recorder.enabled = config.get('monitoring', {}).get('spans_enabled', True)
+    try:
+        asyncio.run(_collect(conn, config, interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+async def _collect(conn, config, interval):
+    loop = asyncio.get_running_loop()
+    parser = build_parser(config)
+    monitor = ServerMonitor(parser, server_config=config['server'])
+    logger.info("🛰️ Collecteur démarré (cycle de %ss)", interval)
+
+    try:
+        while True:
+            started = time.monotonic()
+            status = await monitor.get_server_status()
+            snapshot = {
+                'time': monitor.last_status_time,
+                'status': status,
+                'events': monitor.last_events,
+                'stats': monitor.last_stats,
+                'connected_players': parser.connected_players,
+                'current_prospect': parser.current_prospect,
+                'ftp_available': parser.ftp_available,
+                'last_ftp_check': parser.last_ftp_check,
+                'stale_since': parser.stale_since,
+                'archive_buffer': parser.archive.buffered_lines() if parser.archive else None,
+                'metrics': metrics.REGISTRY.export_state(COLLECTOR_METRICS),
+                'stages': spans.recorder.summary()
+            }
+            try:
+                conn.send(('snapshot', snapshot))
+            except (BrokenPipeError, OSError):
+                # Le bot est parti : le collecteur s'arrête avec lui
+                return
+
+            # Attend la fin du cycle ou l'arrêt demandé par le bot ('stop')
+            remaining = max(0.0, interval - (time.monotonic() - started))
+            if await loop.run_in_executor(None, conn.poll, remaining):
+                try:
+                    command = conn.recv()
+                except EOFError:
+                    return
+                if command == 'stop':
+                    return
+    finally:
+        # Le bloc en cours est compressé avant la fin du processus
+        if parser.archive:
+            parser.archive.close()
+
+
+# === CÔTÉ BOT ===
+
+class CollectorParser(IcarusLogParser):
+    """Parseur côté bot alimenté par les instantanés du collecteur (aucune I/O)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._stats = None
+
+    async def read_logs_ftp(self):
+        # Les lignes sont lues par le collecteur : les événements arrivent via apply_snapshot
+        return []
+
+    def apply_snapshot(self, snapshot):
+        self.connected_players = snapshot['connected_players']
+        self.current_prospect = snapshot['current_prospect']
+        self.ftp_available = snapshot['ftp_available']
+        self.last_ftp_check = snapshot['last_ftp_check']
+        self.stale_since = snapshot['stale_since']
+        self._stats = snapshot['stats']
+        if self.archive is not None and snapshot['archive_buffer'] is not None:
+            # Bloc pas encore compressé par le collecteur : visible par !rawlogs et !search
+            self.archive.set_buffered_lines(snapshot['archive_buffer'])
+        self.add_events(snapshot['events'])
+
+    def get_server_stats(self):
+        if self._stats is None:
+            return super().get_server_stats()
+        return self._stats
+
+
+class CollectorMonitor(ServerMonitor):
+    """Moniteur côté bot servant le dernier statut publié par le collecteur"""
+
+    def __init__(self, parser, server_config=None, first_status_timeout=30.0):
+        super().__init__(parser, server_config)
+        self.first_status_timeout = first_status_timeout
+        self._ready = asyncio.Event()
+
+    async def get_server_status(self):
+        if self.last_status is None:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.first_status_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("⏳ Aucun instantané du collecteur après %ss", self.first_status_timeout)
+                return self.offline_status()
+        return self.last_status
+
+    def apply_snapshot(self, snapshot):
+        self.last_status = snapshot['status']
+        self.last_status_time = snapshot['time']
+        self.last_stats = snapshot['stats']
+        self.last_events = snapshot['events']
+        self._ready.set()
+        IcarusLogParser._notify(self.status_listeners, self.last_status)
+
+
+class CollectorProcess:
+    """Démarre le processus collecteur et applique ses instantanés côté bot"""
+
+    def __init__(self, config, interval=15.0, restart_delay=5.0):
+        self.config = config
+        self.interval = interval
+        self.restart_delay = restart_delay
+        self.process = None
+        self.snapshots = 0
+        self.last_snapshot_time = None
+        self._conn = None
+        self._stopping = False
+
+    def start(self):
+        # 'spawn' : le collecteur ne copie ni la boucle asyncio ni la connexion Discord du bot
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=run_collector,
+            args=(child_conn, self.config, self.interval),
+            name='icarus-collector',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        logger.info("🛰️ Processus collecteur lancé (pid %s)", self.process.pid)
+
+    async def run(self, parser, monitor):
+        """Reçoit les instantanés et relance le collecteur s'il s'arrête"""
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            if self.process is None or not self.process.is_alive():
+                self.start()
+            try:
+                # recv (désérialisation comprise) s'exécute hors de la boucle
+                kind, payload = await loop.run_in_executor(None, self._conn.recv)
+            except (EOFError, OSError):
+                if self._stopping:
+                    return
+                logger.error("❌ Collecteur arrêté (code %s), relance dans %ss",
+                             self.process.exitcode if self.process else None, self.restart_delay)
+                self._conn.close()
+                self.process = None
+                await asyncio.sleep(self.restart_delay)
+                continue
+
+            if kind == 'snapshot':
+                parser.apply_snapshot(payload)
+                monitor.apply_snapshot(payload)
+                metrics.REGISTRY.import_state(payload['metrics'])
+                spans.recorder.merge_remote(payload['stages'])
+                self.snapshots += 1
+                self.last_snapshot_time = get_french_time()
+
+    def stop(self):
+        self._stopping = True
+        if self.process is None:
+            return
+        try:
+            self._conn.send('stop')
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
+        self.process = None
@@ -0,0 +1,211 @@
+"""Export en masse de l'historique : événements, sessions de jeu et relevés
+
+Les enregistrements de l'historique (history.py) sont relus en flux, jour par
+jour, et écrits par paquets de `chunk_rows` lignes en CSV, JSON Lines ou
+Parquet (pyarrow, optionnel) : la mémoire reste bornée par un paquet quelle
+que soit la période exportée. Les colonnes sont fixes pour chaque jeu de
+données, un fichier exporté se charge donc tel quel dans un tableur ou pandas.
+
+Utilisation :
+    python export.py sessions -f parquet -o sessions.parquet --since 2025-01-01
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+from icarus_core import CONFIG_FILE, TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+EVENT_COLUMNS = ('timestamp', 'type', 'player_name', 'biome_name', 'prospect_id', 'prospect_name',
+                 'duration_seconds', 'gap_seconds', 'downtime_seconds', 'restarts', 'details')
+SESSION_COLUMNS = ('player_name', 'start', 'end', 'duration_seconds', 'end_reason')
+PROBE_COLUMNS = ('timestamp', 'online', 'port_open', 'ping_ms', 'players', 'stale')
+
+# Colonnes non textuelles (schéma Parquet)
+NUMERIC_COLUMNS = {'duration_seconds': 'float', 'gap_seconds': 'float', 'downtime_seconds': 'float',
+                   'restarts': 'int', 'ping_ms': 'float', 'players': 'int',
+                   'online': 'bool', 'port_open': 'bool', 'stale': 'bool'}
+TIME_COLUMNS = ('timestamp', 'start', 'end')
+
+
+def event_rows(records):
+    """Une ligne par événement ; les champs hors colonnes fixes vont dans 'details' (JSON)"""
+    for record in records:
+        row = {column: record.get(column) for column in EVENT_COLUMNS[:-1]}
+        extra = {key: value for key, value in record.items() if key not in row}
+        row['details'] = json.dumps(extra, default=str, ensure_ascii=False) if extra else None
+        yield row
+
+
+def session_rows(records):
+    """Sessions de jeu reconstituées au fil des événements
+
+    Une connexion ouvre une session, la déconnexion du joueur la ferme et un
+    redémarrage du serveur ferme toutes les sessions ouvertes. Un joueur
+    retiré pour inactivité n'a pas d'événement de déconnexion : sa session
+    est fermée à sa dernière activité connue quand il se reconnecte. Les
+    sessions encore ouvertes en fin de période sont exportées sans fin.
+    """
+    open_sessions = {}  # {joueur: [début, dernière activité]}
+
+    def close(player, end, reason):
+        start, _ = open_sessions.pop(player)
+        return {'player_name': player, 'start': start, 'end': end,
+                'duration_seconds': (end - start).total_seconds() if end else None, 'end_reason': reason}
+
+    for record in records:
+        kind, player, timestamp = record['type'], record.get('player_name'), record['timestamp']
+        if kind == 'player_connect':
+            if player in open_sessions:
+                yield close(player, open_sessions[player][1], 'inactivity')
+            open_sessions[player] = [timestamp, timestamp]
+        elif kind == 'player_disconnect' and player in open_sessions:
+            yield close(player, timestamp, 'disconnect')
+        elif kind == 'server_restart':
+            for name in list(open_sessions):
+                yield close(name, timestamp, 'restart')
+        elif player in open_sessions:
+            open_sessions[player][1] = timestamp
+    for name in list(open_sessions):
+        yield close(name, None, 'open')
+
+
+def probe_rows(records):
+    for record in records:
+        yield {column: record.get(column) for column in PROBE_COLUMNS}
+
+
+DATASETS = {
+    'events': ('events', EVENT_COLUMNS, event_rows),
+    'sessions': ('events', SESSION_COLUMNS, session_rows),
+    'probes': ('probes', PROBE_COLUMNS, probe_rows),
+}
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _write_csv(chunks, columns, out):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='', write_through=True)
+    writer = csv.DictWriter(text, fieldnames=columns)
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows({column: _iso(row[column]) for column in columns} for row in chunk)
+    text.detach()
+
+
+def _write_jsonl(chunks, columns, out):
+    for chunk in chunks:
+        out.write(''.join(json.dumps({column: _iso(row[column]) for column in columns}, default=str,
+                                     ensure_ascii=False) + '\n' for row in chunk).encode('utf-8'))
+
+
+def _write_parquet(chunks, columns, out):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("L'export Parquet nécessite pyarrow (pip install pyarrow)")
+
+    types = {'float': pa.float64(), 'int': pa.int64(), 'bool': pa.bool_()}
+    schema = pa.schema([
+        (column, pa.timestamp('us', tz=str(TIMEZONE)) if column in TIME_COLUMNS
+         else types.get(NUMERIC_COLUMNS.get(column), pa.string()))
+        for column in columns
+    ])
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+
+
+WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+
+def export(store, dataset, fmt, out, since=None, until=None, chunk_rows=5000):
+    """Écrit le jeu de données de [since, until] dans `out` (fichier binaire) et retourne le nombre de lignes"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Jeu de données inconnu: {dataset} ({', '.join(DATASETS)})")
+    if fmt not in WRITERS:
+        raise ValueError(f"Format inconnu: {fmt} ({', '.join(FORMATS)})")
+    kind, columns, to_rows = DATASETS[dataset]
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = counted(to_rows(store.iter_records(kind, since, until)))
+    WRITERS[fmt](_chunks(rows, chunk_rows), columns, out)
+    return count
+
+
+def _parse_date(value):
+    return TIMEZONE.localize(datetime.fromisoformat(value)) if value else None
+
+
+def _history_section(path):
+    """Section 'history' de config.json, sans exiger le reste de la configuration du bot"""
+    try:
+        with open(path, encoding='utf-8') as config_file:
+            return json.load(config_file).get('history') or {}
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    from history import HistoryStore
+
+    parser = argparse.ArgumentParser(description="Exporte l'historique du serveur Icarus")
+    parser.add_argument('dataset', choices=sorted(DATASETS))
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv')
+    parser.add_argument('-o', '--output', help="Fichier de sortie (défaut : sortie standard)")
+    parser.add_argument('--since', help="Début de la période (AAAA-MM-JJ[THH:MM])")
+    parser.add_argument('--until', help="Fin de la période (AAAA-MM-JJ[THH:MM])")
+    parser.add_argument('--chunk-rows', type=int, default=5000)
+    parser.add_argument('--directory', help="Dossier de l'historique (défaut : section 'history' de la configuration)")
+    parser.add_argument('--config', default=CONFIG_FILE, help="Fichier de configuration (défaut : %(default)s)")
+    args = parser.parse_args(argv)
+
+    directory = args.directory
+    if directory is None:
+        section = _history_section(args.config)
+        if not section.get('enabled', False):
+            parser.error("historique désactivé (section 'history' de la configuration), précisez --directory")
+        directory = section.get('directory', 'history')
+    if not os.path.isdir(directory):
+        parser.error(f"dossier d'historique introuvable: {directory}")
+    store = HistoryStore(directory)
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        count = export(store, args.dataset, args.format, out, _parse_date(args.since), _parse_date(args.until),
+                       args.chunk_rows)
+    finally:
+        if args.output:
+            out.close()
+    print(f"{count} lignes exportées", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Fonctionnement multi-guildes : un serveur Icarus par guilde Discord, réparti par shard
+
+La section 'guilds' de la configuration déclare, pour chaque guilde, son canal
+et ses sections 'server' / 'ftp' (complétées par les sections globales). Chaque
+guilde a son propre parseur, moniteur, message de statut et, si elle en déclare,
+ses alertes. Les guildes sont réparties par shard avec la formule de Discord
+((guild_id >> 22) % shard_count) : chaque shard a sa boucle de monitoring et son
+pool de threads pour les lectures FTP, et ses guildes sont décalées dans la
+période. Une mise à jour lente n'est jamais attendue : si elle tourne encore à
+son prochain tour, ce tour est sauté et compté, les autres guildes continuent.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import spans
+from alerts import AlertEngine
+from collector import build_parser
+from history import HistoryStore
+from icarus_core import ServerMonitor
+from log_search import LogSearch
+from logging_setup import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+GUILDS_PER_SHARD = metrics.REGISTRY.gauge(
+    'icarus_shard_guilds', "Guildes suivies par shard", labelnames=('shard',))
+GUILD_UPDATE_DURATION = metrics.REGISTRY.histogram(
+    'icarus_guild_update_duration_seconds', "Durée de la mise à jour du statut d'une guilde", labelnames=('shard',))
+GUILD_UPDATES_SKIPPED = metrics.REGISTRY.counter(
+    'icarus_guild_updates_skipped_total', "Tours sautés car la mise à jour précédente de la guilde tournait encore",
+    labelnames=('shard',))
+
+# Sections propres à une guilde, fusionnées sur les sections globales
+GUILD_SECTIONS = ('server', 'ftp', 'monitoring', 'archive', 'history', 'mirror')
+
+
+def shard_for(guild_id, shard_count):
+    """Shard qui reçoit les événements de la guilde (formule de Discord)"""
+    return (guild_id >> 22) % shard_count
+
+
+class GuildState:
+    """Serveur Icarus suivi pour une guilde et état de son message de statut"""
+
+    def __init__(self, guild_id, channel_id, parser, monitor, alert_engine=None, archive_search=None, history=None):
+        self.guild_id = guild_id  # None : mode mono-guilde, l'état sert toutes les guildes
+        self.channel_id = channel_id
+        self.parser = parser
+        self.monitor = monitor
+        self.alert_engine = alert_engine
+        self.archive_search = archive_search
+        self.history = history
+        self.status_message = None
+        self.last_update_time = None
+
+    @classmethod
+    def from_config(cls, config, spec):
+        """Crée l'état d'une guilde de la section 'guilds' (sections fusionnées sur la configuration globale)"""
+        guild_id = int(spec['guild_id'])
+        merged = dict(config)
+        for section in GUILD_SECTIONS:
+            if section in spec:
+                merged[section] = {**config.get(section, {}), **spec[section]}
+        merged['discord'] = {**config['discord'], 'channel_id': spec['channel_id']}
+        # Alertes : uniquement celles déclarées par la guilde (canaux de cette guilde)
+        merged['alerts'] = spec.get('alerts')
+        for section, default_directory in (('archive', 'archive'), ('history', 'history'), ('mirror', 'mirror')):
+            stored = merged.get(section) or {}
+            if stored.get('enabled') and 'directory' not in spec.get(section, {}):
+                merged[section] = {**stored, 'directory': os.path.join(stored.get('directory', default_directory), str(guild_id))}
+
+        parser = build_parser(merged)
+        monitor = ServerMonitor(parser, server_config=merged['server'])
+        alert_engine = AlertEngine.from_config(merged)
+        if alert_engine:
+            parser.event_listeners.append(alert_engine.on_event)
+            monitor.status_listeners.append(alert_engine.on_status)
+        history = HistoryStore.from_config(merged)
+        if history:
+            parser.event_listeners.append(history.on_event)
+            monitor.status_listeners.append(history.on_status)
+        archive_search = LogSearch(parser.archive) if parser.archive else None
+        return cls(guild_id, spec['channel_id'], parser, monitor, alert_engine, archive_search, history)
+
+
+class GuildRegistry:
+    """États par guilde ; en mode mono-guilde, un état par défaut répond pour toutes les guildes"""
+
+    def __init__(self, default=None):
+        self.default = default
+        self.guilds = {}  # {guild_id: GuildState}
+
+    @classmethod
+    def from_config(cls, config):
+        """Crée le registre depuis la section 'guilds' (None si absente ou vide)"""
+        specs = config.get('guilds') or []
+        if not specs:
+            return None
+        registry = cls()
+        for spec in specs:
+            registry.add(GuildState.from_config(config, spec))
+        return registry
+
+    @property
+    def multi_guild(self):
+        return bool(self.guilds)
+
+    def add(self, state):
+        self.guilds[state.guild_id] = state
+
+    def get(self, guild_id):
+        """État de la guilde (None si la guilde n'est pas configurée)"""
+        return self.guilds.get(guild_id, self.default)
+
+    def states(self):
+        if self.guilds:
+            return list(self.guilds.values())
+        return [self.default] if self.default else []
+
+    def for_shard(self, shard_id, shard_count):
+        """Guildes dont les événements arrivent sur ce shard"""
+        return [state for guild_id, state in self.guilds.items() if shard_for(guild_id, shard_count) == shard_id]
+
+
+class ShardScheduler:
+    """Mises à jour de statut des guildes, une boucle par shard
+
+    Dans un shard, les N guildes démarrent à intervalle/N les unes des autres
+    (charge FTP lissée sur la période) et chaque mise à jour est une tâche
+    indépendante. Les lectures bloquantes d'un shard passent par son propre
+    pool de threads : un FTP lent n'occupe que les threads de son shard.
+    """
+
+    def __init__(self, registry, update, interval=15.0, threads_per_shard=4):
+        self.registry = registry
+        self.update = update  # Coroutine appelée avec le GuildState
+        self.interval = interval
+        self.threads_per_shard = threads_per_shard
+        self._tasks = {}  # {shard_id: Task}
+        self._executors = {}  # {shard_id: ThreadPoolExecutor}
+
+    @classmethod
+    def from_config(cls, registry, update, config):
+        section = config.get('sharding') or {}
+        return cls(
+            registry,
+            update,
+            interval=section.get('interval_seconds', 15),
+            threads_per_shard=section.get('threads_per_shard', 4)
+        )
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def start(self, shard_ids, shard_count):
+        """Lance une boucle par shard servi par ce processus"""
+        for shard_id in shard_ids:
+            if shard_id in self._tasks:
+                continue
+            guilds = self.registry.for_shard(shard_id, shard_count)
+            GUILDS_PER_SHARD.set(len(guilds), shard=shard_id)
+            if not guilds:
+                continue
+            executor = self._executors[shard_id] = ThreadPoolExecutor(
+                max_workers=self.threads_per_shard, thread_name_prefix=f'icarus-shard-{shard_id}')
+            for state in guilds:
+                state.parser.executor = executor
+                if state.history:
+                    state.history.executor = executor
+            self._tasks[shard_id] = asyncio.create_task(self._run_shard(shard_id, guilds))
+            logger.info("🧩 Shard %s/%s : %d guilde(s) suivie(s)", shard_id, shard_count, len(guilds))
+
+    async def _run_shard(self, shard_id, guilds):
+        loop = asyncio.get_running_loop()
+        running = {}  # {guild_id: Task} mise à jour en cours
+        step = self.interval / len(guilds)
+        cycle_start = loop.time()
+        while True:
+            for index, state in enumerate(guilds):
+                await asyncio.sleep(max(0.0, cycle_start + index * step - loop.time()))
+                task = running.get(state.guild_id)
+                if task is not None and not task.done():
+                    GUILD_UPDATES_SKIPPED.inc(shard=shard_id)
+                    logger.warning("⏳ Guilde %s : mise à jour précédente encore en cours, tour sauté", state.guild_id,
+                                   extra=RATE_LIMITED)
+                    continue
+                running[state.guild_id] = asyncio.create_task(self._update(shard_id, state))
+            cycle_start += self.interval
+            if cycle_start < loop.time():
+                # Boucle en retard (mise en veille, boucle saturée) : on repart de maintenant
+                cycle_start = loop.time()
+
+    async def _update(self, shard_id, state):
+        started = time.perf_counter()
+        # Une mise à jour de guilde est un cycle pour !profile (une seule profilée à la fois)
+        profiled = spans.profiler.start_cycle()
+        try:
+            with spans.span('cycle'):
+                await self.update(state)
+        except Exception as e:
+            logger.error("❌ Guilde %s : erreur de mise à jour: %s", state.guild_id, e)
+        finally:
+            if profiled:
+                spans.profiler.end_cycle()
+            GUILD_UPDATE_DURATION.observe(time.perf_counter() - started, shard=shard_id)
+
+    def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        self._executors.clear()
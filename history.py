@@ -0,0 +1,200 @@
+"""Historique durable des événements et des relevés du serveur
+
+Les événements conservés par le parseur et chaque relevé du moniteur (en
+ligne, port, ping, joueurs) sont ajoutés, une ligne JSON par enregistrement, à
+un fichier par jour : `events-AAAA.MM.JJ.jsonl` et `probes-AAAA.MM.JJ.jsonl`.
+Contrairement au store en mémoire (borné à `max_events` et à quelques heures),
+cet historique couvre `retention_days` et se relit en flux, jour par jour,
+pour les exports et les analyses sur de longues périodes.
+
+Les abonnés (appelés sur la boucle asyncio) ne font que sérialiser
+l'enregistrement dans une file en mémoire : les fichiers sont écrits et vidés
+une fois par cycle de monitoring, dans un thread.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from icarus_core import get_french_time
+from logging_setup import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# Champs propres au parseur, inutiles hors du processus
+_INTERNAL_FIELDS = ('raw_line', 'seq')
+
+
+def _day(dt):
+    return dt.strftime('%Y.%m.%d')
+
+
+class HistoryStore:
+    """Enregistrements JSON Lines par jour, pour les événements ('events') et les relevés ('probes')"""
+
+    KINDS = ('events', 'probes')
+
+    def __init__(self, directory='history', retention_days=365):
+        self.directory = directory
+        self.retention = timedelta(days=retention_days)
+        self._files = {}  # {kind: (jour, fichier ouvert en ajout)}
+        self._pending = deque()  # [(kind, jour, ligne JSON)] en attente d'écriture
+        self._lock = threading.Lock()  # Une seule écriture à la fois (thread du pool ou arrêt)
+        self._flushing = None  # Écriture en cours dans le pool
+        self.executor = None  # Pool des écritures (None : pool par défaut de la boucle)
+        os.makedirs(directory, exist_ok=True)
+        # Au redémarrage, la fin du log est relue : les événements déjà enregistrés sont ignorés
+        self._resume_after, self._resume_seen = self._latest_events()
+
+    @classmethod
+    def from_config(cls, config):
+        """Crée l'historique depuis la section 'history' (None si absente ou désactivée)"""
+        section = config.get('history') or {}
+        if not section.get('enabled', False):
+            return None
+        return cls(
+            directory=section.get('directory', 'history'),
+            retention_days=section.get('retention_days', 365)
+        )
+
+    def path(self, kind, day):
+        return os.path.join(self.directory, f'{kind}-{day}.jsonl')
+
+    def days(self, kind):
+        """Jours enregistrés, du plus ancien au plus récent"""
+        prefix = kind + '-'
+        return sorted(name[len(prefix):-6] for name in os.listdir(self.directory)
+                      if name.startswith(prefix) and name.endswith('.jsonl'))
+
+    @staticmethod
+    def _event_key(event):
+        return event['timestamp'], event.get('type'), event.get('player_name')
+
+    def _latest_events(self):
+        """Horodatage du dernier événement enregistré et clés des événements enregistrés à cet instant"""
+        for day in reversed(self.days('events')):
+            last, seen = None, Counter()
+            for record in self._read_day('events', day):
+                if record['timestamp'] != last:
+                    last, seen = record['timestamp'], Counter()
+                seen[self._event_key(record)] += 1
+            if last is not None:
+                return last, seen
+        return None, Counter()
+
+    # === ÉCRITURE ===
+
+    def _append(self, kind, timestamp, record):
+        self._pending.append((kind, _day(timestamp), json.dumps(record, default=str, ensure_ascii=False) + '\n'))
+
+    def _write(self, kind, day, line):
+        current = self._files.get(kind)
+        if current is None or current[0] != day:
+            if current is not None:
+                current[1].close()
+                self.prune(get_french_time())
+            current = self._files[kind] = (day, open(self.path(kind, day), 'a', encoding='utf-8'))
+        current[1].write(line)
+
+    def on_event(self, event):
+        """Abonné du parseur : enregistre un événement conservé"""
+        timestamp = event['timestamp']
+        if self._resume_after is not None:
+            if timestamp < self._resume_after:
+                return
+            # Même instant que le dernier enregistré : seuls les événements déjà écrits sont ignorés
+            key = self._event_key(event)
+            if timestamp == self._resume_after and self._resume_seen[key] > 0:
+                self._resume_seen[key] -= 1
+                return
+        record = {key: value for key, value in event.items() if key not in _INTERNAL_FIELDS}
+        record['timestamp'] = timestamp.isoformat()
+        self._append('events', timestamp, record)
+
+    def on_status(self, status):
+        """Abonné du moniteur : enregistre le relevé ; les fichiers sont écrits une fois par cycle"""
+        now = get_french_time()
+        self._append('probes', now, {
+            'timestamp': now.isoformat(),
+            'online': status['online'],
+            'port_open': status['port_open'],
+            'ping_ms': status['ping'] or None,
+            'players': status['players'],
+            'stale': status.get('stale_since') is not None
+        })
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Écrit la file dans un thread du pool (tout de suite hors de la boucle asyncio)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        # Écriture précédente pas terminée (disque lent) : la file sera écrite au prochain cycle
+        if self._flushing is None or self._flushing.done():
+            self._flushing = loop.run_in_executor(self.executor, self.flush)
+            self._flushing.add_done_callback(self._flush_done)
+
+    @staticmethod
+    def _flush_done(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("❌ Erreur écriture de l'historique: %s", future.exception(), extra=RATE_LIMITED)
+
+    def flush(self):
+        """Écrit les enregistrements en attente et vide les fichiers (bloquant)"""
+        with self._lock:
+            while self._pending:
+                self._write(*self._pending.popleft())
+            for _, handle in self._files.values():
+                handle.flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for _, handle in self._files.values():
+                handle.close()
+            self._files.clear()
+
+    def prune(self, now):
+        """Supprime les jours plus anciens que la durée de conservation"""
+        oldest = _day(now - self.retention)
+        removed = 0
+        for kind in self.KINDS:
+            for day in self.days(kind):
+                if day < oldest:
+                    os.remove(self.path(kind, day))
+                    removed += 1
+        if removed:
+            logger.info("📚 %d fichiers d'historique expirés supprimés", removed)
+        return removed
+
+    # === LECTURE ===
+
+    def _read_day(self, kind, day):
+        try:
+            with open(self.path(kind, day), encoding='utf-8') as history_file:
+                for line in history_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Ligne en cours d'écriture (lecture depuis un autre thread)
+                        continue
+                    record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+                    yield record
+        except FileNotFoundError:
+            return
+
+    def iter_records(self, kind, since=None, until=None):
+        """Enregistrements de [since, until] en flux, jour par jour (un seul jour en mémoire à la fois)"""
+        low = _day(since) if since else ''
+        high = _day(until) if until else '9999'
+        for day in self.days(kind):
+            if not low <= day <= high:
+                continue
+            for record in self._read_day(kind, day):
+                if (since is None or record['timestamp'] >= since) and (until is None or record['timestamp'] <= until):
+                    yield record
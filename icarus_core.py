@@ -0,0 +1,1344 @@
+"""Cœur du bot Icarus : configuration, parseur de logs et surveillance du serveur
+
+Ce module n'a aucun effet de bord à l'import (pas de lecture de config, pas de
+client Discord) : il peut être utilisé par les outils, benchmarks et processus
+annexes sans token ni config.json.
+"""
+import asyncio
+import bisect
+import ftplib
+import heapq
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import ping3
+import pytz
+
+import metrics
+import spans
+from logging_setup import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# Configuration du fuseau horaire français
+TIMEZONE = pytz.timezone('Europe/Paris')
+
+# Fichier de configuration (surchargeable pour les déploiements)
+CONFIG_FILE = os.environ.get('ICARUS_CONFIG', 'config.json')
+
+# Variables d'environnement (définies par cloudbuild.yaml) → (section, clé, type)
+ENV_OVERRIDES = {
+    'DISCORD_TOKEN': ('discord', 'token', str),
+    'CHANNEL_ID': ('discord', 'channel_id', int),
+    'SERVER_IP': ('server', 'ip', str),
+    'SERVER_PORT': ('server', 'port', int),
+    'SERVER_PASSWORD': ('server', 'password', str),
+    'FTP_HOST': ('ftp', 'host', str),
+    'FTP_PORT': ('ftp', 'port', int),
+    'FTP_USER': ('ftp', 'user', str),
+    'FTP_PASS': ('ftp', 'password', str),
+    'LOG_PATH': ('ftp', 'log_path', str),
+}
+
+_config = None
+
+def load_config(path=None):
+    """Charge config.json (optionnel) puis applique les variables d'environnement"""
+    path = path or CONFIG_FILE
+    config = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        logger.info("📄 %s absent, configuration lue depuis l'environnement", path)
+    except json.JSONDecodeError as e:
+        logger.error("❌ Erreur dans le fichier %s: %s", path, e)
+        raise
+    
+    for env_name, (section, key, cast) in ENV_OVERRIDES.items():
+        value = os.environ.get(env_name)
+        if value:
+            config.setdefault(section, {})[key] = cast(value)
+    
+    missing = [
+        env_name for env_name, (section, key, _) in ENV_OVERRIDES.items()
+        if key not in config.get(section, {})
+    ]
+    if missing:
+        logger.error("❌ Configuration incomplète, manquant: %s. Utilisez config_template.json comme modèle.", ', '.join(missing))
+        raise KeyError(f"Configuration incomplète: {', '.join(missing)}")
+    
+    return config
+
+def get_config():
+    """Retourne la configuration, chargée au premier appel"""
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+def set_config(config):
+    """Remplace la configuration active (outils, benchmarks)"""
+    global _config
+    _config = config
+
+def get_french_time():
+    """Retourne l'heure française actuelle"""
+    return datetime.now(TIMEZONE)
+
+class PrefixIndex:
+    """Index de noms trié pour l'autocomplétion par préfixe (bisect, insensible à la casse)"""
+    
+    def __init__(self, max_size=2000):
+        self.max_size = max_size
+        self._keys = []  # [(nom normalisé, nom affiché)] trié
+        self._names = set()
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def add(self, name):
+        if not name or name in self._names or len(self._keys) >= self.max_size:
+            return
+        self._names.add(name)
+        bisect.insort(self._keys, (name.casefold(), name))
+    
+    def complete(self, prefix, limit=25):
+        """Retourne au plus `limit` noms commençant par `prefix`"""
+        key = prefix.casefold().strip()
+        matches = []
+        for folded, name in self._keys[bisect.bisect_left(self._keys, (key,)):]:
+            if not folded.startswith(key) or len(matches) >= limit:
+                break
+            matches.append(name)
+        return matches
+
+class ActivityCounters:
+    """Compteurs agrégés par joueur et par minute pour les lignes très fréquentes
+    
+    Les lignes de craft et d'activité du personnage ne deviennent pas des
+    événements : elles incrémentent {minute: {joueur: compteurs}}, borné à
+    `window_minutes` minutes glissantes.
+    """
+    
+    def __init__(self, window_minutes=120):
+        self.window = timedelta(minutes=window_minutes)
+        self.minutes = OrderedDict()  # {'AAAA.MM.JJ-HH.MM': (minute, {player_name: compteurs})}
+        self._cutoff = ''  # Dernier horodatage brut compté lors des lectures précédentes
+        self._latest = ''
+        self._version = 0  # Incrémenté à chaque ligne comptée (invalide le résumé en cache)
+        self._summary_cache = (None, None)
+    
+    def is_new(self, timestamp_str):
+        """Indique si la ligne n'a pas déjà été comptée (le log est relu à chaque cycle)"""
+        if timestamp_str <= self._cutoff:
+            return False
+        if timestamp_str > self._latest:
+            self._latest = timestamp_str
+        return True
+    
+    def commit(self):
+        """Valide la lecture en cours : ses lignes ne seront plus recomptées"""
+        self._cutoff = self._latest
+    
+    def _player_counters(self, timestamp_str, player_name, convert_timestamp):
+        """Retourne (compteurs, minute si première activité du joueur dans la minute)"""
+        key = timestamp_str[:16]
+        entry = self.minutes.get(key)
+        if entry is None:
+            minute = convert_timestamp(key + '.00')
+            if minute is None:
+                return None, None
+            entry = self.minutes[key] = (minute, {})
+            self._prune(minute)
+        counters = entry[1].get(player_name)
+        if counters is not None:
+            return counters, None
+        counters = entry[1][player_name] = {'crafts': 0, 'actions': 0, 'stations': {}}
+        return counters, entry[0]
+    
+    def _prune(self, newest):
+        while self.minutes:
+            oldest_key = next(iter(self.minutes))
+            if newest - self.minutes[oldest_key][0] < self.window:
+                break
+            del self.minutes[oldest_key]
+    
+    def record_craft(self, timestamp_str, player_name, station, convert_timestamp):
+        counters, first_seen = self._player_counters(timestamp_str, player_name, convert_timestamp)
+        if counters is not None:
+            self._version += 1
+            counters['crafts'] += 1
+            counters['stations'][station] = counters['stations'].get(station, 0) + 1
+        return first_seen
+    
+    def record_action(self, timestamp_str, player_name, convert_timestamp):
+        counters, first_seen = self._player_counters(timestamp_str, player_name, convert_timestamp)
+        if counters is not None:
+            self._version += 1
+            counters['actions'] += 1
+        return first_seen
+    
+    def summary(self, since):
+        """Totaux par joueur et par station depuis `since` (en cache tant que rien ne change)"""
+        since = since.replace(second=0, microsecond=0)
+        cache_key = (since, self._version)
+        if self._summary_cache[0] == cache_key:
+            return self._summary_cache[1]
+        
+        players = {}
+        stations = {}
+        for minute, per_player in reversed(self.minutes.values()):
+            if minute < since:
+                break
+            for player_name, counters in per_player.items():
+                totals = players.setdefault(player_name, {'crafts': 0, 'actions': 0})
+                totals['crafts'] += counters['crafts']
+                totals['actions'] += counters['actions']
+                for station, count in counters['stations'].items():
+                    stations[station] = stations.get(station, 0) + count
+        summary = {
+            'crafts': sum(totals['crafts'] for totals in players.values()),
+            'players': players,
+            'stations': stations
+        }
+        self._summary_cache = (cache_key, summary)
+        return summary
+
+class SaveTracker:
+    """Apparie BeginRecording/EndRecording en sauvegardes et suit leur durée
+    
+    Une sauvegarde est signalée en régression quand sa durée dépasse
+    `regression_factor` fois la médiane des sauvegardes précédentes.
+    """
+    
+    def __init__(self, window=200, regression_factor=2.0, min_samples=5, min_duration=1.0):
+        self.durations = deque(maxlen=window)  # Secondes, de la plus ancienne à la plus récente
+        self.intervals = deque(maxlen=window)
+        self.regression_factor = regression_factor
+        self.min_samples = min_samples
+        self.min_duration = min_duration
+        self.regressions = 0
+        self.last_save = None  # {'end', 'duration', 'regression'}
+        self._begin = None
+        self._last_begin = None
+    
+    def begin(self, timestamp):
+        # Un second BeginRecording sans fin : la sauvegarde précédente est abandonnée
+        self._begin = timestamp
+    
+    def end(self, timestamp):
+        """Clôt la sauvegarde en cours et retourne ses mesures (None sans début connu)"""
+        begin, self._begin = self._begin, None
+        if begin is None or timestamp < begin:
+            return None
+        
+        duration = (timestamp - begin).total_seconds()
+        interval = (begin - self._last_begin).total_seconds() if self._last_begin else None
+        self._last_begin = begin
+        
+        baseline = _percentile(self.durations, 0.50) if len(self.durations) >= self.min_samples else None
+        regression = bool(baseline is not None and duration >= self.min_duration
+                          and duration > baseline * self.regression_factor)
+        
+        self.durations.append(duration)
+        metrics.SAVE_DURATION.observe(duration)
+        if interval is not None:
+            self.intervals.append(interval)
+            metrics.SAVE_INTERVAL.observe(interval)
+        if regression:
+            self.regressions += 1
+            metrics.SAVE_REGRESSIONS.inc()
+        
+        self.last_save = {'end': timestamp, 'duration': duration, 'regression': regression}
+        return {'duration_seconds': duration, 'interval_seconds': interval, 'baseline_seconds': baseline,
+                'regression': regression}
+    
+    def summary(self):
+        """Statistiques des sauvegardes récentes (durées et intervalles en secondes)"""
+        return {
+            'count': len(self.durations),
+            'p50': _percentile(self.durations, 0.50),
+            'p95': _percentile(self.durations, 0.95),
+            'interval_p50': _percentile(self.intervals, 0.50),
+            'regressions': self.regressions,
+            'last': self.last_save,
+            'in_progress': self._begin is not None
+        }
+
+def _percentile(values, fraction):
+    """Percentile par rang (None si vide)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[int((len(ordered) - 1) * fraction)]
+
+class LogFlow:
+    """Débit et écarts d'horodatage de toutes les lignes du log, sans les conserver
+    
+    Chaque ligne horodatée n'alimente que des compteurs par seconde (fenêtre
+    glissante) et l'écart avec la ligne précédente. En sortent trois sortes
+    d'incidents, retournés comme événements :
+      - 'server_stall'      aucune ligne pendant au moins `stall_gap_seconds`
+      - 'server_restart'    ouverture d'un nouveau log (marqueur ou rotation du fichier)
+      - 'server_crash_loop' `crash_loop_restarts` redémarrages en `crash_loop_minutes`
+    """
+    
+    # Marqueurs d'ouverture d'un nouveau log Unreal (démarrage du serveur)
+    RESTART_MARKERS = ('Log file open', 'LogInit: Display: Running engine', 'LogInit: Build:')
+    
+    def __init__(self, stall_gap_seconds=120, crash_loop_restarts=3, crash_loop_minutes=15, window_seconds=60):
+        self.stall_gap = stall_gap_seconds
+        self.crash_loop_restarts = crash_loop_restarts
+        self.crash_loop_window = timedelta(minutes=crash_loop_minutes)
+        self.window = window_seconds
+        self.seconds = deque()  # [[seconde (epoch), lignes]] de la fenêtre, en temps du log
+        self.gaps = deque()  # [(seconde (epoch), écart)] des écarts d'au moins une seconde
+        self.restarts = deque()  # Horodatages des redémarrages récents
+        self.last_time = None
+        self.lines = 0
+        self._minutes = {}  # {'AAAA.MM.JJ-HH.MM': datetime} : une conversion par minute de log
+        self._restart_pending = False
+        self._last_crash_loop = None
+        self.last_restart = None  # Dernier démarrage du serveur vu dans le log
+    
+    def note_restart(self):
+        """Signale un redémarrage (rotation du fichier) : daté par la prochaine ligne"""
+        self._restart_pending = True
+    
+    def _line_time(self, timestamp_str, convert_timestamp):
+        minute = self._minutes.get(timestamp_str[:16])
+        if minute is None:
+            minute = convert_timestamp(timestamp_str[:16] + '.00')
+            if minute is None:
+                return None
+            if len(self._minutes) > 1440:
+                self._minutes.clear()
+            self._minutes[timestamp_str[:16]] = minute
+        try:
+            return minute + timedelta(seconds=int(timestamp_str[17:19]), milliseconds=int(timestamp_str[20:23] or 0))
+        except ValueError:
+            return None
+    
+    def observe(self, line, convert_timestamp):
+        """Compte une ligne ; retourne la liste des incidents détectés (souvent vide)"""
+        if not line.startswith('[') or line[24:25] != ']':
+            # Ligne sans horodatage (en-tête du log, suite d'une ligne multiple)
+            if line.startswith(self.RESTART_MARKERS):
+                self._restart_pending = True
+            return ()
+        if self.RESTART_MARKERS[1] in line or self.RESTART_MARKERS[2] in line:
+            self._restart_pending = True
+        
+        timestamp = self._line_time(line[1:24], convert_timestamp)
+        if timestamp is None:
+            return ()
+        
+        self.lines += 1
+        second = int(timestamp.timestamp())
+        if self.seconds and self.seconds[-1][0] == second:
+            self.seconds[-1][1] += 1
+        else:
+            self.seconds.append([second, 1])
+            while self.seconds and self.seconds[0][0] <= second - self.window:
+                self.seconds.popleft()
+            while self.gaps and self.gaps[0][0] <= second - self.window * 10:
+                self.gaps.popleft()
+        
+        previous, self.last_time = self.last_time, max(timestamp, self.last_time or timestamp)
+        gap = (timestamp - previous).total_seconds() if previous else 0.0
+        if gap >= 1:
+            self.gaps.append((second, gap))
+            metrics.LOG_GAP.observe(gap)
+        
+        incidents = []
+        if self._restart_pending:
+            self._restart_pending = False
+            incidents.append(self._restart(timestamp, previous, gap))
+            crash_loop = self._crash_loop(timestamp)
+            if crash_loop:
+                incidents.append(crash_loop)
+        elif gap >= self.stall_gap:
+            incidents.append({
+                'timestamp': timestamp,
+                'type': 'server_stall',
+                'gap_seconds': gap,
+                'stalled_since': previous
+            })
+            logger.warning("🧊 Serveur figé: aucune ligne de log pendant %.0fs (depuis %s)",
+                           gap, previous.strftime('%H:%M:%S'))
+        return incidents
+    
+    def _restart(self, timestamp, previous, gap):
+        self.restarts.append(timestamp)
+        self.last_restart = timestamp
+        logger.warning("🔁 Redémarrage du serveur détecté à %s", timestamp.strftime('%H:%M:%S'))
+        return {
+            'timestamp': timestamp,
+            'type': 'server_restart',
+            'downtime_seconds': gap if previous else None
+        }
+    
+    def _crash_loop(self, timestamp):
+        while self.restarts and timestamp - self.restarts[0] > self.crash_loop_window:
+            self.restarts.popleft()
+        if len(self.restarts) < self.crash_loop_restarts:
+            return None
+        # Un seul événement par boucle : réarmé après une fenêtre sans nouvelle boucle
+        if self._last_crash_loop and timestamp - self._last_crash_loop <= self.crash_loop_window:
+            self._last_crash_loop = timestamp
+            return None
+        self._last_crash_loop = timestamp
+        logger.error("💥 Boucle de crash: %d redémarrages en %d min",
+                     len(self.restarts), self.crash_loop_window.total_seconds() // 60)
+        return {
+            'timestamp': timestamp,
+            'type': 'server_crash_loop',
+            'restarts': len(self.restarts),
+            'window_minutes': int(self.crash_loop_window.total_seconds() // 60)
+        }
+    
+    def summary(self, now):
+        """Débit (lignes/s), plus grand écart récent et silence depuis la dernière ligne"""
+        if self.last_time is None:
+            return {'lines_per_second': None, 'max_gap_seconds': None, 'silence_seconds': None, 'stalled': False,
+                    'restarts': 0, 'last_restart': None}
+        newest = int(self.last_time.timestamp())
+        lines = sum(count for second, count in self.seconds if second > newest - self.window)
+        summary = {
+            'lines_per_second': lines / self.window,
+            'max_gap_seconds': max((gap for _, gap in self.gaps), default=0.0),
+            'silence_seconds': max(0.0, (now - self.last_time).total_seconds()),
+            'stalled': (now - self.last_time).total_seconds() >= self.stall_gap,
+            'restarts': sum(1 for restart in self.restarts if now - restart <= self.crash_loop_window),
+            'last_restart': self.last_restart
+        }
+        metrics.LOG_LINE_RATE.set(summary['lines_per_second'])
+        metrics.LOG_MAX_GAP.set(summary['max_gap_seconds'])
+        metrics.LOG_SILENCE.set(summary['silence_seconds'])
+        return summary
+
+class CircuitBreaker:
+    """Disjoncteur autour de la source de logs : fermé, ouvert, semi-ouvert
+    
+    Après `failure_threshold` échecs consécutifs le disjoncteur s'ouvre : les
+    lectures sont refusées immédiatement au lieu d'attendre le délai de
+    connexion. Passé `probe_interval` secondes, une seule lecture d'essai est
+    autorisée (semi-ouvert) ; son succès referme le disjoncteur, son échec le
+    rouvre avec un intervalle doublé (jusqu'à `max_probe_interval`).
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    
+    def __init__(self, failure_threshold=3, probe_interval=30, max_probe_interval=600):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.state = self.CLOSED
+        self.failures = 0
+        self.since = get_french_time()
+        self._interval = probe_interval
+        self._opened_at = None
+        self._accounted_at = time.monotonic()
+        for state in (self.CLOSED, self.OPEN, self.HALF_OPEN):
+            metrics.FTP_BREAKER_STATE.set(1 if state == self.state else 0, state=state)
+    
+    def _account(self):
+        now = time.monotonic()
+        metrics.FTP_BREAKER_SECONDS.inc(now - self._accounted_at, state=self.state)
+        self._accounted_at = now
+    
+    def _transition(self, state):
+        self._account()
+        metrics.FTP_BREAKER_STATE.set(0, state=self.state)
+        metrics.FTP_BREAKER_STATE.set(1, state=state)
+        metrics.FTP_BREAKER_TRANSITIONS.inc(state=state)
+        self.state = state
+        self.since = get_french_time()
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            logger.warning("⛔ Disjoncteur FTP ouvert après %d échec(s), prochain essai dans %ss",
+                           self.failures, self._interval)
+        elif state == self.CLOSED:
+            logger.info("✅ Disjoncteur FTP refermé")
+    
+    def allow(self):
+        """Indique si une lecture peut être tentée maintenant"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self._interval:
+            self._transition(self.HALF_OPEN)
+            return True
+        metrics.FTP_SHORT_CIRCUITED.inc()
+        return False
+    
+    def record_success(self):
+        self.failures = 0
+        self._interval = self.probe_interval
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self._interval = min(self._interval * 2, self.max_probe_interval)
+            self._transition(self.OPEN)
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+    
+    def summary(self):
+        """État courant, depuis quand, et délai avant le prochain essai (disjoncteur ouvert)"""
+        self._account()
+        next_probe = None
+        if self.state == self.OPEN:
+            next_probe = max(0.0, self._interval - (time.monotonic() - self._opened_at))
+        return {
+            'state': self.state,
+            'since': self.since,
+            'failures': self.failures,
+            'next_probe_seconds': next_probe
+        }
+
+class IcarusLogParser:
+    """Parseur de logs spécialisé pour Icarus avec gestion exacte des joueurs"""
+    
+    # Octets relus au premier passage et retard maximal rattrapé en une lecture
+    INITIAL_TAIL_BYTES = 256 * 1024
+    MAX_CATCHUP_BYTES = 4 * 1024 * 1024
+    
+    def __init__(self, ftp_config=None, player_timeout_minutes=45, event_retention_hours=24, activity_window_minutes=120,
+                 max_events=2000, save_regression_factor=2.0, stall_gap_seconds=120, crash_loop_restarts=3,
+                 crash_loop_minutes=15, archive=None, breaker_failure_threshold=3, breaker_probe_seconds=30,
+                 breaker_max_probe_seconds=600, mirror=None):
+        self._ftp_config = ftp_config  # None: section 'ftp' de la configuration globale
+        self.events = []  # Trié par (timestamp, seq) croissant
+        self.max_events = max_events
+        self._event_seq = 0  # Numéro d'arrivée : départage les événements de même timestamp (curseurs)
+        self.event_listeners = []  # Appelés pour chaque nouvel événement conservé (alertes)
+        self.player_timeout = timedelta(minutes=player_timeout_minutes)
+        self.event_retention = timedelta(hours=event_retention_hours)
+        self._expiry_heap = []  # [(échéance d'inactivité, séquence, player_name)], invalidation paresseuse
+        self._expiry_seq = 0
+        self.connected_players = {}  # {player_name: {'connect_time': datetime, 'last_seen': datetime, 'name': str}}
+        
+        # Index d'attribution O(1) des lignes aux joueurs
+        self.character_index = {}  # {id acteur BP_IcarusPlayerCharacterSurvival_C_: player_name}
+        self.connection_index = {}  # {id IpConnection_/SteamNetConnection_: player_name}
+        self.recent_players = OrderedDict()  # Joueurs connectés du moins au plus récemment actif
+        
+        # Durées des sauvegardes (appariement BeginRecording/EndRecording)
+        self.saves = SaveTracker(regression_factor=save_regression_factor)
+        
+        # Débit et écarts de toutes les lignes : blocages, redémarrages, boucles de crash
+        self.log_flow = LogFlow(stall_gap_seconds, crash_loop_restarts, crash_loop_minutes)
+        
+        # Archive compressée des lignes brutes (None : désactivée)
+        self.archive = archive
+        
+        # Miroir local du log distant : reprise sans re-téléchargement au redémarrage (None : désactivé)
+        self.mirror = mirror
+        
+        # Noms vus dans les événements, pour l'autocomplétion des commandes slash
+        self.name_index = {'player': PrefixIndex(), 'biome': PrefixIndex(), 'prospect': PrefixIndex()}
+        
+        # Lignes très fréquentes (craft, personnage) : compteurs par minute plutôt qu'événements
+        self.activity = ActivityCounters(activity_window_minutes)
+        
+        self.ftp_available = False
+        self.last_ftp_check = None
+        
+        # Disjoncteur FTP : serveur FTP injoignable, on sert le dernier état lu (marqué périmé)
+        self.breaker = CircuitBreaker(breaker_failure_threshold, breaker_probe_seconds, breaker_max_probe_seconds)
+        self.stale_since = None  # Premier échec depuis la dernière lecture réussie
+        
+        # Lecture incrémentale du log (position de reprise et ligne incomplète)
+        self._offset = None
+        self._partial = b''
+        self._read_lock = None
+        self.executor = None  # Pool des lectures bloquantes (None : pool par défaut de la boucle)
+        self.current_prospect = "Unknown"
+        
+        # Patterns regex précis pour détecter les événements exacts d'Icarus
+        self.patterns = {
+            # === CONNEXIONS ===
+            'player_connect': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*ServerTryCompletePlayerInitialisation.*Name=(\w+)', re.IGNORECASE),
+            'player_login': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Login request.*Name=(\w+)', re.IGNORECASE),
+            'player_join': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Join request.*Name=(\w+)', re.IGNORECASE),
+            
+            # === DÉCONNEXIONS ===
+            'player_disconnect': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*DetachPlayerFromSeat.*Name=(\w+)', re.IGNORECASE),
+            'session_exit': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Session.*Exit.*Success', re.IGNORECASE),
+            'connection_lost': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Connection.*(?:Lost|Closed)', re.IGNORECASE),
+            
+            # === CHANGEMENTS DE BIOME ===
+            'biome_change': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*just entered new biome:\s*(\w+)', re.IGNORECASE),
+            
+            # === SAUVEGARDES ===
+            'game_save_begin': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*BeginRecording', re.IGNORECASE),
+            'game_save_end': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*EndRecording', re.IGNORECASE),
+            
+            # === MISSIONS ===
+            'prospect_update': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*UpdateActiveProspectInfo.*ProspectID:\s*(\w+).*ProspectDTKey:\s*(\w+)', re.IGNORECASE),
+            
+            # === ACTIVITÉS DIVERSES ===
+            'crafting_activity': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*Crafting.*Requested Add (\S+) to (\S+)', re.IGNORECASE),
+            'character_activity': re.compile(r'\[(\d{4}\.\d{2}\.\d{2}-\d{2}\.\d{2}\.\d{2}:\d+)\].*BP_IcarusPlayerCharacterSurvival_C_(\d+)', re.IGNORECASE)
+        }
+        
+        # Identifiants d'acteur et de connexion présents dans les lignes
+        self.id_patterns = {
+            'character': re.compile(r'BP_IcarusPlayerCharacterSurvival_C_(\d+)'),
+            'connection': re.compile(r'\b(?:Ip|Steam\w*)Connection_(\d+)')
+        }
+    
+    def _extract_id(self, kind, line):
+        """Extrait l'identifiant d'acteur ou de connexion d'une ligne"""
+        match = self.id_patterns[kind].search(line)
+        return match.group(1) if match else None
+    
+    def _index_player(self, player_name, line):
+        """Associe les identifiants d'acteur/connexion de la ligne au joueur"""
+        data = self.connected_players.get(player_name)
+        for kind, index in (('character', self.character_index), ('connection', self.connection_index)):
+            ref = self._extract_id(kind, line)
+            if not ref:
+                continue
+            index[ref] = player_name
+            if data is not None:
+                data[f'{kind}_id'] = ref
+    
+    def _touch_player(self, player_name, timestamp):
+        """Met à jour la dernière activité d'un joueur, son rang de récence et son échéance"""
+        self.connected_players[player_name]['last_seen'] = timestamp
+        self.recent_players[player_name] = None
+        self.recent_players.move_to_end(player_name)
+        
+        self._expiry_seq += 1
+        heapq.heappush(self._expiry_heap, (timestamp + self.player_timeout, self._expiry_seq, player_name))
+        
+        # Compacte le tas quand les entrées périmées dominent
+        if len(self._expiry_heap) > 4 * len(self.connected_players) + 64:
+            self._expiry_heap = [
+                entry for entry in self._expiry_heap
+                if entry[2] in self.connected_players
+                and entry[0] == self.connected_players[entry[2]]['last_seen'] + self.player_timeout
+            ]
+            heapq.heapify(self._expiry_heap)
+    
+    def _remove_player(self, player_name):
+        """Retire un joueur et ses entrées d'index"""
+        data = self.connected_players.pop(player_name, None)
+        self.recent_players.pop(player_name, None)
+        if data is None:
+            return
+        for kind, index in (('character', self.character_index), ('connection', self.connection_index)):
+            ref = data.get(f'{kind}_id')
+            if ref and index.get(ref) == player_name:
+                del index[ref]
+    
+    def _most_recent_player(self):
+        """Joueur connecté le plus récemment actif (repli sans identifiant)"""
+        return next(reversed(self.recent_players)) if self.recent_players else None
+    
+    def resolve_player(self, line, kinds=('character', 'connection')):
+        """Attribue une ligne à un joueur connecté par identifiant, sinon au plus récemment actif"""
+        for kind in kinds:
+            ref = self._extract_id(kind, line)
+            if ref:
+                index = self.character_index if kind == 'character' else self.connection_index
+                player_name = index.get(ref)
+                if player_name in self.connected_players:
+                    return player_name
+        return self._most_recent_player()
+    
+    def convert_timestamp(self, timestamp_str):
+        """Convertit un timestamp Icarus en datetime"""
+        try:
+            if ':' in timestamp_str:
+                main_part, milliseconds = timestamp_str.split(':', 1)
+            else:
+                main_part = timestamp_str
+                milliseconds = "000"
+            
+            parts = main_part.split('-')
+            if len(parts) >= 2:
+                date_str = parts[0].replace('.', '-')
+                time_str = parts[1].replace('.', ':')
+                
+                full_timestamp = f"{date_str} {time_str}"
+                dt = datetime.strptime(full_timestamp, '%Y-%m-%d %H:%M:%S')
+                
+                if milliseconds.isdigit():
+                    microseconds = min(int(milliseconds[:3]) * 1000, 999999)
+                    dt = dt.replace(microsecond=microseconds)
+                
+                return TIMEZONE.localize(dt) if dt.tzinfo is None else dt
+            
+        except Exception as e:
+            logger.error("Erreur parsing timestamp %s: %s", timestamp_str, e, extra=RATE_LIMITED)
+        
+        return None
+    
+    @property
+    def ftp_config(self):
+        return self._ftp_config if self._ftp_config is not None else get_config()['ftp']
+    
+    def _tail_start(self, offset, size):
+        """Position de reprise : suite du fichier, sinon fin récente (premier passage, rotation, retard)"""
+        if offset is None or size < offset:
+            # Premier passage ou fichier tronqué/remplacé par une rotation
+            return max(0, size - self.INITIAL_TAIL_BYTES)
+        if size - offset > self.MAX_CATCHUP_BYTES:
+            # Retard trop important (longue coupure) : on saute au plus récent
+            return size - self.MAX_CATCHUP_BYTES
+        return offset
+    
+    def _fetch_log(self, ftp_config, offset):
+        """Télécharge la partie nouvelle du fichier de log (bloquant, hors de la boucle asyncio)
+        
+        Retourne (octets, position de départ, taille du fichier au moment du SIZE). Le fichier peut
+        grandir pendant le RETR : la position de reprise est start + len(octets), pas la taille.
+        """
+        ftp = None
+        fetch_start = time.perf_counter()
+        try:
+            with spans.span('ftp_connect'):
+                ftp = ftplib.FTP()
+                ftp.connect(ftp_config['host'], ftp_config['port'], timeout=30)
+                ftp.login(ftp_config['user'], ftp_config['password'])
+            
+            # Taille du fichier (SIZE exige le mode binaire) ; sans SIZE on relit tout
+            try:
+                ftp.voidcmd('TYPE I')
+                size = ftp.size(ftp_config['log_path'])
+            except ftplib.error_perm:
+                size = None
+            start = self._tail_start(offset, size) if size is not None else 0
+            
+            # Lecture de la partie nouvelle du fichier log (REST)
+            bio = BytesIO()
+            if size is None or start < size:
+                with spans.span('ftp_transfer'):
+                    ftp.retrbinary(f"RETR {ftp_config['log_path']}", bio.write, rest=start or None)
+            raw = bio.getvalue()
+            
+            metrics.FTP_FETCH_DURATION.observe(time.perf_counter() - fetch_start)
+            metrics.FTP_FETCH_BYTES.observe(len(raw))
+            metrics.FTP_FETCH_BYTES_TOTAL.inc(len(raw))
+            return raw, start, start + len(raw) if size is None else max(size, start + len(raw))
+        finally:
+            if ftp:
+                try:
+                    ftp.quit()
+                except:
+                    try:
+                        ftp.close()
+                    except:
+                        pass
+    
+    def _new_lines(self, raw, start):
+        """Découpe les octets lus en lignes complètes, la ligne en cours d'écriture est gardée"""
+        if start != self._offset:
+            # Saut (premier passage, rotation, retard) : la première ligne est probablement coupée
+            self._partial = b''
+            if start > 0:
+                raw = raw.partition(b'\n')[2]
+        
+        complete, _, self._partial = (self._partial + raw).rpartition(b'\n')
+        return complete.decode('utf-8', errors='ignore').split('\n') if complete else []
+    
+    async def read_logs_ftp(self):
+        """Lit les nouvelles lignes de logs depuis le serveur FTP"""
+        events = []
+        
+        if self._read_lock is None:
+            self._read_lock = asyncio.Lock()
+        
+        # Une seule lecture à la fois : la position de reprise est partagée
+        async with self._read_lock:
+            if not self.breaker.allow():
+                # Disjoncteur ouvert : réponse immédiate avec le dernier état connu
+                logger.debug("⛔ Lecture FTP évitée (disjoncteur ouvert)", extra=RATE_LIMITED)
+                return events
+            
+            loop = asyncio.get_running_loop()
+            first_read = self._offset is None
+            resumed = []
+            if first_read and self.mirror is not None and self.mirror.length:
+                # Redémarrage : la fin récente est relue dans le miroir, le FTP reprend à sa suite
+                start, raw = await loop.run_in_executor(self.executor, self.mirror.tail, self.INITIAL_TAIL_BYTES)
+                resumed = self._new_lines(raw, start)
+                self._offset = start + len(raw)
+                logger.info("🪞 Reprise depuis le miroir local: %d lignes, lecture FTP à partir de l'octet %d",
+                            len(resumed), self._offset)
+            
+            try:
+                logger.info("🔄 Connexion FTP...")
+                raw, start, size = await loop.run_in_executor(self.executor, self._fetch_log, self.ftp_config, self._offset)
+            except Exception as e:
+                logger.error("❌ Erreur FTP: %s", e, extra=RATE_LIMITED)
+                metrics.FTP_FETCH_ERRORS.inc()
+                self.breaker.record_failure()
+                self.ftp_available = False
+                if resumed:
+                    # La reprise depuis le miroir sera refaite à la prochaine lecture
+                    self._offset, self._partial = None, b''
+                if self.stale_since is None:
+                    self.stale_since = get_french_time()
+                return events
+            
+            self.breaker.record_success()
+            self.stale_since = None
+            
+            if self._offset is not None and size < self._offset:
+                # Fichier plus court qu'à la lecture précédente : nouveau log, le serveur a redémarré
+                self.log_flow.note_restart()
+            elif self._offset is not None and start > self._offset:
+                # Retard sauté : l'écart avec la dernière ligne lue ne vient pas du serveur
+                self.log_flow.last_time = None
+            lines = self._new_lines(raw, start)
+            # Reprise après les octets réellement lus (la taille du SIZE ne sert qu'à détecter une rotation)
+            self._offset = start + len(raw)
+            
+            if self.mirror is not None:
+                try:
+                    await loop.run_in_executor(self.executor, self.mirror.append, raw, start, size)
+                except OSError as e:
+                    logger.error("❌ Erreur miroir du log: %s", e, extra=RATE_LIMITED)
+            
+            # Toutes les lignes lues sont archivées, y compris celles qui ne deviennent pas des événements
+            if self.archive is not None:
+                try:
+                    await loop.run_in_executor(self.executor, self.archive.append, lines)
+                except OSError as e:
+                    logger.error("❌ Erreur archive des logs: %s", e, extra=RATE_LIMITED)
+        
+        # Premier passage : seules les 400 dernières lignes sont analysées (miroir compris)
+        if first_read:
+            lines = (resumed + lines)[-400:]
+        
+        logger.info("📋 Analyse de %d lignes de logs", len(lines))
+        
+        parse_start = time.perf_counter()
+        with spans.span('parse_log_line'):
+            for line in lines:
+                if not line.strip():
+                    continue
+                
+                for incident in self.log_flow.observe(line, self.convert_timestamp):
+                    self._apply_incident(incident)
+                    events.append(incident)
+                    metrics.EVENTS_TOTAL.inc(type=incident['type'])
+                
+                event = self.parse_log_line(line)
+                if event:
+                    events.append(event)
+                    metrics.EVENTS_TOTAL.inc(type=event['type'])
+        
+        self.activity.commit()
+        
+        parse_duration = time.perf_counter() - parse_start
+        metrics.LOG_LINES_PARSED.inc(len(lines))
+        if parse_duration > 0 and lines:
+            metrics.LOG_LINES_PER_SECOND.set(len(lines) / parse_duration)
+        
+        self.ftp_available = True
+        self.last_ftp_check = get_french_time()
+        logger.info("✅ %d événements extraits - %d joueurs connectés", len(events), len(self.connected_players))
+        
+        # Liste les joueurs connectés
+        if self.connected_players:
+            logger.info("👥 Joueurs: %s", ', '.join(self.connected_players))
+        
+        return events
+    
+    def _apply_incident(self, incident):
+        """Un redémarrage déconnecte tout le monde : les joueurs réapparaîtront à leur reconnexion"""
+        if incident['type'] == 'server_restart':
+            for player_name in list(self.connected_players):
+                self._remove_player(player_name)
+    
+    def parse_log_line(self, line):
+        """Parse une ligne de log avec détection précise des événements Icarus"""
+        if not line.strip():
+            return None
+            
+        try:
+            # === INDEX DES CONNEXIONS (Join request) ===
+            match = 'Join request' in line and self.patterns['player_join'].search(line)
+            if match:
+                self._index_player(match.group(2).strip(), line)
+                return None
+            
+            # === DÉTECTION DES CONNEXIONS (ServerTryCompletePlayerInitialisation) ===
+            match = self.patterns['player_connect'].search(line)
+            if match and len(match.groups()) >= 2:
+                timestamp_str = match.group(1)
+                player_name = match.group(2).strip()
+                timestamp = self.convert_timestamp(timestamp_str)
+                
+                if timestamp and player_name and len(player_name) > 2:
+                    # Vérifie si c'est un nouveau joueur
+                    if player_name not in self.connected_players:
+                        self.connected_players[player_name] = {
+                            'connect_time': timestamp,
+                            'last_seen': timestamp,
+                            'name': player_name
+                        }
+                        self._touch_player(player_name, timestamp)
+                        self._index_player(player_name, line)
+                        
+                        logger.info("🟢 CONNEXION détectée: %s", player_name)
+                        return {
+                            'timestamp': timestamp,
+                            'type': 'player_connect',
+                            'player_name': player_name,
+                            'raw_line': line.strip()
+                        }
+                    else:
+                        # Met à jour la dernière activité
+                        self._touch_player(player_name, timestamp)
+                        self._index_player(player_name, line)
+            
+            # === DÉTECTION DES DÉCONNEXIONS (DetachPlayerFromSeat) ===
+            match = self.patterns['player_disconnect'].search(line)
+            if match and len(match.groups()) >= 2:
+                timestamp_str = match.group(1)
+                player_name = match.group(2).strip()
+                timestamp = self.convert_timestamp(timestamp_str)
+                
+                if timestamp and player_name in self.connected_players:
+                    self._remove_player(player_name)
+                    logger.info("🔴 DÉCONNEXION détectée: %s", player_name)
+                    return {
+                        'timestamp': timestamp,
+                        'type': 'player_disconnect',
+                        'player_name': player_name,
+                        'raw_line': line.strip()
+                    }
+            
+            # === DÉTECTION DES CHANGEMENTS DE BIOME ===
+            match = self.patterns['biome_change'].search(line)
+            if match and len(match.groups()) >= 2:
+                timestamp_str = match.group(1)
+                biome_name = match.group(2).strip()
+                timestamp = self.convert_timestamp(timestamp_str)
+                
+                if timestamp and biome_name:
+                    # Attribue le changement de biome via l'acteur du personnage (repli: joueur le plus récent)
+                    active_player = self.resolve_player(line, kinds=('character',))
+                    if active_player:
+                        # Met à jour l'activité du joueur
+                        self._touch_player(active_player, timestamp)
+                    
+                    logger.info("🌍 CHANGEMENT DE BIOME: %s → %s", active_player or 'Joueur', biome_name)
+                    return {
+                        'timestamp': timestamp,
+                        'type': 'biome_change',
+                        'player_name': active_player,
+                        'biome_name': biome_name,
+                        'raw_line': line.strip()
+                    }
+            
+            # === DÉTECTION DES SAUVEGARDES (BeginRecording/EndRecording) ===
+            match = self.patterns['game_save_begin'].search(line)
+            if match:
+                timestamp_str = match.group(1)
+                timestamp = self.convert_timestamp(timestamp_str)
+                
+                if timestamp:
+                    self.saves.begin(timestamp)
+                    logger.info("💾 SAUVEGARDE détectée")
+                    return {
+                        'timestamp': timestamp,
+                        'type': 'game_save',
+                        'raw_line': line.strip()
+                    }
+            
+            match = self.patterns['game_save_end'].search(line)
+            if match:
+                timestamp_str = match.group(1)
+                timestamp = self.convert_timestamp(timestamp_str)
+                
+                if timestamp:
+                    # Met à jour l'activité de tous les joueurs connectés
+                    for player_name in list(self.connected_players):
+                        self._touch_player(player_name, timestamp)
+                    
+                    event = {
+                        'timestamp': timestamp,
+                        'type': 'game_save_complete',
+                        'raw_line': line.strip()
+                    }
+                    save = self.saves.end(timestamp)
+                    if save:
+                        event.update(save)
+                        if save['regression']:
+                            logger.warning("🐢 Sauvegarde lente: %.1fs (médiane récente %.1fs)",
+                                           save['duration_seconds'], save['baseline_seconds'])
+                    return event
+            
+            # === DÉTECTION DES MISSIONS ===
+            match = self.patterns['prospect_update'].search(line)
+            if match and len(match.groups()) >= 3:
+                timestamp_str = match.group(1)
+                prospect_id = match.group(2)
+                prospect_key = match.group(3).strip()
+                timestamp = self.convert_timestamp(timestamp_str)
+                
+                if timestamp:
+                    prospect_name = prospect_key.replace('_', ' ').title()
+                    self.current_prospect = prospect_name
+                    
+                    # Met à jour l'activité des joueurs connectés
+                    for player_name in list(self.connected_players):
+                        self._touch_player(player_name, timestamp)
+                    
+                    logger.info("🎯 MISSION mise à jour: %s", prospect_name)
+                    return {
+                        'timestamp': timestamp,
+                        'type': 'prospect_update',
+                        'prospect_id': prospect_id,
+                        'prospect_name': prospect_name,
+                        'raw_line': line.strip()
+                    }
+            
+            # === AUTRES DÉCONNEXIONS GÉNÉRIQUES ===
+            for pattern_name in ['session_exit', 'connection_lost']:
+                match = self.patterns[pattern_name].search(line)
+                if match:
+                    timestamp_str = match.group(1)
+                    timestamp = self.convert_timestamp(timestamp_str)
+                    
+                    if timestamp and self.connected_players:
+                        # Attribue via la connexion ou l'acteur (repli: joueur le plus récemment actif)
+                        disconnecting_player = self.resolve_player(line)
+                        self._remove_player(disconnecting_player)
+                        
+                        logger.info("🔴 DÉCONNEXION générique: %s", disconnecting_player)
+                        return {
+                            'timestamp': timestamp,
+                            'type': 'player_disconnect',
+                            'player_name': disconnecting_player,
+                            'raw_line': line.strip()
+                        }
+            
+            # === ACTIVITÉ AGRÉGÉE (craft, personnage) ===
+            if 'BP_IcarusPlayerCharacterSurvival_C_' in line:
+                self._record_activity(line)
+            
+        except Exception as e:
+            logger.error("Erreur parsing ligne: %s", e, extra=RATE_LIMITED)
+        
+        return None
+    
+    def _record_activity(self, line):
+        """Compte une ligne de craft ou d'activité du personnage (aucun événement émis)"""
+        match = 'Crafting' in line and self.patterns['crafting_activity'].search(line)
+        if not match:
+            match = self.patterns['character_activity'].search(line)
+            if not match:
+                return
+        
+        timestamp_str = match.group(1)
+        if not self.activity.is_new(timestamp_str):
+            return
+        
+        # Seuls les acteurs connus sont comptés : pas de repli sur le joueur le plus récent
+        player_name = self.character_index.get(self._extract_id('character', line))
+        if player_name not in self.connected_players:
+            return
+        
+        if match.re is self.patterns['crafting_activity']:
+            first_seen = self.activity.record_craft(timestamp_str, player_name, match.group(3), self.convert_timestamp)
+        else:
+            first_seen = self.activity.record_action(timestamp_str, player_name, self.convert_timestamp)
+        
+        # Une mise à jour d'activité par joueur et par minute suffit à l'expiration
+        if first_seen and first_seen > self.connected_players[player_name]['last_seen']:
+            self._touch_player(player_name, first_seen)
+    
+    @staticmethod
+    def _notify(listeners, payload):
+        """Appelle les abonnés sans laisser une erreur interrompre le cycle"""
+        for listener in listeners:
+            try:
+                listener(payload)
+            except Exception as e:
+                logger.error("Erreur abonné %s: %s", getattr(listener, '__qualname__', listener), e,
+                             extra=RATE_LIMITED)
+    
+    def _index_names(self, event):
+        """Alimente l'index d'autocomplétion avec les noms portés par l'événement"""
+        for kind, field in (('player', 'player_name'), ('biome', 'biome_name'), ('prospect', 'prospect_name')):
+            name = event.get(field)
+            if name:
+                self.name_index[kind].add(name)
+    
+    def add_events(self, new_events):
+        """Ajoute de nouveaux événements en conservant l'ordre chronologique"""
+        cutoff_time = get_french_time() - self.event_retention
+        
+        # Ajoute les nouveaux événements (en fin de liste dans le cas courant)
+        for event in new_events:
+            if event and event.get('timestamp') and event['timestamp'] > cutoff_time:
+                self._event_seq += 1
+                event['seq'] = self._event_seq
+                if not self.events or event['timestamp'] >= self.events[-1]['timestamp']:
+                    self.events.append(event)
+                else:
+                    bisect.insort_right(self.events, event, key=lambda x: x['timestamp'])
+                self._index_names(event)
+                self._notify(self.event_listeners, event)
+        
+        # Limite (on garde les 80% les plus récents pour ne pas couper à chaque ajout)
+        if len(self.events) > self.max_events:
+            del self.events[:-(self.max_events * 4 // 5)]
+        
+        # Nettoie les données anciennes
+        self.cleanup_old_data()
+    
+    def cleanup_old_data(self):
+        """Expire les événements anciens et les joueurs inactifs (ne touche que les entrées échues)"""
+        current_time = get_french_time()
+        
+        # Événements triés : on coupe le préfixe antérieur à la rétention
+        expired = bisect.bisect_right(self.events, current_time - self.event_retention, key=lambda x: x['timestamp'])
+        if expired:
+            del self.events[:expired]
+        
+        # Logs indisponibles : l'inactivité des joueurs n'est pas observable, la liste est gardée telle quelle
+        if self.stale_since is not None:
+            return
+        
+        # Joueurs inactifs : dépile uniquement les échéances dépassées
+        while self._expiry_heap and self._expiry_heap[0][0] < current_time:
+            deadline, _, player_name = heapq.heappop(self._expiry_heap)
+            data = self.connected_players.get(player_name)
+            # Entrée périmée : joueur parti ou activité plus récente
+            if data is None or data['last_seen'] + self.player_timeout != deadline:
+                continue
+            
+            self._remove_player(player_name)
+            logger.info("🔴 Joueur retiré (inactif %dmin): %s", self.player_timeout.total_seconds() // 60, player_name)
+    
+    def get_recent_events(self, count=5, **filters):
+        """Retourne les événements récents, du plus récent au plus ancien
+        
+        `filters` restreint aux événements dont les champs valent exactement
+        les valeurs données (ex. player_name='Survivor01').
+        """
+        filters = {field: value for field, value in filters.items() if value}
+        recent = []
+        for event in reversed(self.events):
+            if all(event.get(field) == value for field, value in filters.items()):
+                recent.append(event)
+                if len(recent) >= count:
+                    break
+        return recent
+    
+    @staticmethod
+    def event_cursor(event):
+        """Curseur de pagination stable d'un événement (survit aux purges du store)"""
+        return (event['timestamp'], event['seq'])
+    
+    def _scan_events(self, start, stop, step, matches, limit):
+        """Parcourt self.events de start (inclus) vers stop (exclu) et retourne jusqu'à `limit` correspondances"""
+        found = []
+        for index in range(start, stop, step):
+            event = self.events[index]
+            if matches(event):
+                found.append(event)
+                if len(found) >= limit:
+                    break
+        return found
+    
+    def get_timeline_page(self, before=None, after=None, page_size=10, player_name=None, event_type=None,
+                          since=None, until=None):
+        """Page de la timeline : `page_size` événements antérieurs au curseur `before`
+        (ou postérieurs au curseur `after`), filtrés par joueur, type et plage de temps.
+        
+        Seuls les événements de la page (et ceux écartés par les filtres joueur/type)
+        sont parcourus : les bornes de temps et les curseurs sont résolus par bisect.
+        Retourne (événements du plus récent au plus ancien, plus_anciens, plus_récents).
+        """
+        key = self.event_cursor
+        low = bisect.bisect_left(self.events, (since,), key=key) if since else 0
+        high = bisect.bisect_right(self.events, (until, float('inf')), key=key) if until else len(self.events)
+        
+        def matches(event):
+            return ((not player_name or event.get('player_name') == player_name)
+                    and (not event_type or event['type'] == event_type))
+        
+        if after is not None:
+            start = max(low, bisect.bisect_right(self.events, after, key=key))
+            newer = self._scan_events(start, high, 1, matches, page_size + 1)
+            page = newer[:page_size][::-1]
+            has_newer = len(newer) > page_size
+            has_older = bool(self._scan_events(min(start, high) - 1, low - 1, -1, matches, 1))
+        else:
+            end = min(high, bisect.bisect_left(self.events, before, key=key)) if before is not None else high
+            page = self._scan_events(end - 1, low - 1, -1, matches, page_size + 1)
+            has_older = len(page) > page_size
+            page = page[:page_size]
+            has_newer = before is not None and bool(self._scan_events(max(end, low), high, 1, matches, 1))
+        
+        return page, has_older, has_newer
+    
+    def get_server_stats(self):
+        """Génère des statistiques exactes"""
+        now = get_french_time()
+        
+        # Nettoie d'abord les données anciennes
+        self.cleanup_old_data()
+        
+        # Événements récents (2 heures) : suffixe du store trié
+        recent_events = self.events[bisect.bisect_right(self.events, now - timedelta(hours=2), key=lambda x: x['timestamp']):]
+        
+        # Compte les événements
+        connections = len([e for e in recent_events if e['type'] == 'player_connect'])
+        disconnections = len([e for e in recent_events if e['type'] == 'player_disconnect'])
+        saves = len([e for e in recent_events if e['type'] == 'game_save'])
+        
+        # JOUEURS ACTUELLEMENT CONNECTÉS (valeur exacte)
+        current_active_players = len(self.connected_players)
+        active_player_names = [data['name'] for data in self.connected_players.values()]
+        
+        # Activité agrégée de la dernière heure (craft, personnage)
+        activity = self.activity.summary(now - timedelta(hours=1))
+        recent_crafts = activity['crafts']
+        
+        # Activité par heure (dernières 24h) : suffixe du store trié, sans parcourir les événements plus anciens
+        # (la concurrence des joueurs sur de longues périodes est calculée par analytics.py)
+        last_day = self.events[bisect.bisect_right(self.events, now - timedelta(hours=24), key=lambda x: x['timestamp']):]
+        activity_by_hour = dict(Counter(event['timestamp'].hour for event in last_day))
+        
+        return {
+            'active_players': current_active_players,
+            'active_player_names': active_player_names,
+            'connections': connections,
+            'disconnections': disconnections,
+            'recent_saves': saves,
+            'current_prospect': self.current_prospect,
+            'total_events': len(self.events),
+            'recent_events': recent_events[-5:] if recent_events else [],
+            'recent_crafts': recent_crafts,
+            'saves': self.saves.summary(),
+            'log_flow': self.log_flow.summary(now),
+            'log_source': {'stale_since': self.stale_since, 'breaker': self.breaker.summary()},
+            'player_activity': activity['players'],
+            'crafting_stations': activity['stations'],
+            'activity_by_hour': activity_by_hour
+        }
+
+class ServerMonitor:
+    """Classe pour gérer la surveillance du serveur"""
+    
+    def __init__(self, parser, server_config=None):
+        self.parser = parser
+        self._server_config = server_config  # None: section 'server' de la configuration globale
+        self.last_check = None
+        self.last_status = None  # Dernier instantané de statut (servi par /healthz sans I/O)
+        self.last_status_time = None
+        self.last_stats = None  # Statistiques calculées avec le dernier statut (bouton Statistiques)
+        self.last_events = []  # Événements lus lors du dernier cycle
+        self.status_listeners = []  # Appelés après chaque relevé (alertes)
+    
+    @property
+    def server_config(self):
+        return self._server_config if self._server_config is not None else get_config()['server']
+    
+    @staticmethod
+    def offline_status():
+        """Statut par défaut quand aucune donnée n'est disponible"""
+        return {
+            'name': 'Frères de Survie - Icarus',
+            'players': 0,
+            'players_list': [],
+            'max_players': 8,
+            'map': 'Unknown',
+            'ping': 0,
+            'port_open': False,
+            'online': False,
+            'recent_events': [],
+            'connections': 0,
+            'disconnections': 0,
+            'recent_saves': 0
+        }
+    
+    @spans.timed('ping')
+    async def get_server_ping(self):
+        """Mesure le ping du serveur"""
+        try:
+            loop = asyncio.get_running_loop()
+            ping = await loop.run_in_executor(self.parser.executor, ping3.ping, self.server_config['ip'], 3)
+            return round(ping * 1000, 1) if ping else None
+        except Exception as e:
+            logger.warning("Erreur ping: %s", e, extra=RATE_LIMITED)
+            return None
+    
+    @spans.timed('port_check')
+    async def check_port(self):
+        """Vérifie si le port est ouvert"""
+        try:
+            future = asyncio.open_connection(self.server_config['ip'], self.server_config['port'])
+            reader, writer = await asyncio.wait_for(future, timeout=5)
+            writer.close()
+            await writer.wait_closed()
+            return True
+        except Exception:
+            return False
+    
+    async def get_server_status(self):
+        """Récupère le statut complet du serveur"""
+        try:
+            # Lecture des logs FTP et tests de connectivité en parallèle
+            log_events, ping, port_open = await asyncio.gather(
+                self.parser.read_logs_ftp(),
+                self.get_server_ping(),
+                self.check_port()
+            )
+            with spans.span('add_events'):
+                self.parser.add_events(log_events)
+            self.last_events = log_events
+            
+            # Récupère les stats
+            with spans.span('get_server_stats'):
+                stats = self.parser.get_server_stats()
+            self.last_stats = stats
+            
+            status = {
+                'name': 'Frères de Survie - Icarus',
+                'players': stats['active_players'],
+                'players_list': stats['active_player_names'],
+                'max_players': 8,
+                'map': stats['current_prospect'],
+                'ping': ping if ping else 0,
+                'port_open': port_open,
+                # Logs indisponibles : le port du jeu suffit à dire que le serveur tourne
+                'online': self.parser.ftp_available or (self.parser.stale_since is not None and port_open),
+                'stale_since': self.parser.stale_since,
+                'breaker': stats['log_source']['breaker']['state'],
+                'recent_events': stats['recent_events'],
+                'connections': stats['connections'],
+                'disconnections': stats['disconnections'],
+                'recent_saves': stats['recent_saves'],
+                'saves': stats['saves'],
+                'log_flow': stats['log_flow']
+            }
+            
+        except Exception as e:
+            logger.error("Erreur get_server_status: %s", e)
+            status = self.offline_status()
+            self.last_events = []
+        
+        self.last_status = status
+        self.last_status_time = get_french_time()
+        IcarusLogParser._notify(self.status_listeners, status)
+        return status
@@ -0,0 +1,290 @@
+"""Archive locale compressée des lignes brutes du log du serveur
+
+Les lignes lues par le parseur sont regroupées en blocs compressés
+indépendamment (gzip, ou zstd si le module `zstandard` est installé) et
+ajoutés à un segment par jour : `icarus-AAAA.MM.JJ.log.gz`. Un index à côté
+(`icarus-AAAA.MM.JJ.log.gz.idx`, une ligne JSON par bloc) donne la position, la
+taille et la plage d'horodatages de chaque bloc : une fenêtre de temps ne
+décompresse que les blocs qui la recouvrent. Un second fichier (`.tri`, une
+ligne par bloc) liste les trigrammes du bloc pour la recherche (log_search).
+
+Les horodatages Icarus (2024.01.15-14.38.42:123) se comparent comme des
+chaînes : l'index les garde tels quels.
+"""
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+import metrics
+from icarus_core import get_french_time
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BYTES = metrics.REGISTRY.counter(
+    'icarus_archive_bytes_total', "Octets archivés (avant et après compression)", labelnames=('stage',))
+ARCHIVE_BLOCKS = metrics.REGISTRY.counter(
+    'icarus_archive_blocks_total', "Blocs compressés écrits dans l'archive")
+ARCHIVE_READ_BLOCKS = metrics.REGISTRY.counter(
+    'icarus_archive_read_blocks_total', "Blocs décompressés pour répondre à une lecture de l'archive")
+
+
+def format_log_time(dt):
+    """Horodatage au format des logs Icarus (comparable comme chaîne)"""
+    return dt.strftime('%Y.%m.%d-%H.%M.%S') + f':{dt.microsecond // 1000:03d}'
+
+
+def block_trigrams(text):
+    """Trigrammes (en minuscules) d'un bloc de lignes, hors ceux qui chevauchent deux lignes"""
+    low = text.lower()
+    trigrams = {low[i:i + 3] for i in range(len(low) - 2)}
+    return {trigram for trigram in trigrams if '\n' not in trigram and '\r' not in trigram}
+
+
+def _line_time(line):
+    if line.startswith('[') and line[24:25] == ']':
+        return line[1:24]
+    return None
+
+
+class _Gzip:
+    extension = '.log.gz'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class _Zstd:
+    extension = '.log.zst'
+
+    def __init__(self, level):
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+
+class LogArchive:
+    """Archive des lignes brutes en blocs compressés indexés par plage de temps"""
+
+    def __init__(self, directory='archive', block_bytes=256 * 1024, max_block_age_seconds=300, codec='gzip',
+                 level=6, retention_days=14, read_only=False):
+        self.directory = directory
+        # Lecture seule : l'archive est écrite par un autre processus (collecteur), qui publie son bloc en cours
+        self.read_only = read_only
+        self.block_bytes = block_bytes
+        self.max_block_age = max_block_age_seconds
+        self.retention = timedelta(days=retention_days)
+        self.codec = self._make_codec(codec, level)
+        self._buffer = []  # Lignes du bloc en cours (non compressées)
+        self._buffer_bytes = 0
+        self._buffer_started = None  # time.monotonic() de la première ligne du bloc
+        self._last_time = ''  # Dernier horodatage vu : date les lignes qui n'en ont pas
+        self._lock = threading.Lock()
+        self._block_counts = {}  # {jour: blocs écrits dans le segment}
+        os.makedirs(directory, exist_ok=True)
+        # Au redémarrage, la fin du log est relue : ce qui est déjà archivé est ignoré
+        self._archived_until = self._latest_archived()
+        self._skipping = False
+
+    @classmethod
+    def from_config(cls, config, read_only=False):
+        """Crée l'archive depuis la section 'archive' (None si absente ou désactivée)"""
+        section = config.get('archive') or {}
+        if not section.get('enabled', False):
+            return None
+        return cls(
+            directory=section.get('directory', 'archive'),
+            block_bytes=section.get('block_kib', 256) * 1024,
+            max_block_age_seconds=section.get('max_block_age_seconds', 300),
+            codec=section.get('codec', 'gzip'),
+            level=section.get('level', 6),
+            retention_days=section.get('retention_days', 14),
+            read_only=read_only
+        )
+
+    @staticmethod
+    def _make_codec(name, level):
+        if name == 'zstd':
+            try:
+                return _Zstd(level)
+            except ImportError:
+                logger.warning("Module zstandard absent, archive compressée en gzip")
+        return _Gzip(level)
+
+    def _latest_archived(self):
+        for day in reversed(self.days()):
+            blocks = self.load_index(day)
+            if blocks:
+                return blocks[-1]['last']
+        return ''
+
+    def segment_paths(self, day):
+        """Chemins (données, index des blocs, trigrammes) du segment d'un jour 'AAAA.MM.JJ'"""
+        data_path = os.path.join(self.directory, f'icarus-{day}{self.codec.extension}')
+        return data_path, data_path + '.idx', data_path + '.tri'
+
+    def days(self):
+        """Jours archivés, du plus ancien au plus récent"""
+        return sorted(name[7:17] for name in os.listdir(self.directory)
+                      if name.startswith('icarus-') and name.endswith(self.codec.extension + '.idx'))
+
+    # === ÉCRITURE ===
+
+    def append(self, lines):
+        """Ajoute des lignes complètes ; compresse le bloc quand il est plein ou trop ancien"""
+        if self.read_only:
+            raise RuntimeError("Archive des logs ouverte en lecture seule")
+        with self._lock:
+            for line in lines:
+                if not line:
+                    continue
+                timestamp = _line_time(line)
+                if timestamp:
+                    self._skipping = timestamp <= self._archived_until
+                if self._skipping:
+                    continue
+                if timestamp and timestamp[:10] != self._last_time[:10] and self._buffer:
+                    # Changement de jour : le bloc en cours reste dans le segment de la veille
+                    self._flush()
+                    self.prune(get_french_time())
+                if timestamp:
+                    self._last_time = timestamp
+                if not self._buffer:
+                    self._buffer_started = time.monotonic()
+                self._buffer.append(line)
+                self._buffer_bytes += len(line) + 1
+                if self._buffer_bytes >= self.block_bytes:
+                    self._flush()
+            if self._buffer and time.monotonic() - self._buffer_started >= self.max_block_age:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        times = [t for t in map(_line_time, self._buffer) if t]
+        first = times[0] if times else self._last_time
+        last = times[-1] if times else self._last_time
+        text = '\n'.join(self._buffer) + '\n'
+        raw = text.encode('utf-8')
+        block = self.codec.compress(raw)
+
+        day = (first or format_log_time(get_french_time()))[:10]
+        data_path, index_path, trigram_path = self.segment_paths(day)
+        if day not in self._block_counts:
+            self._block_counts[day] = len(self.load_index(day))
+        with open(data_path, 'ab') as data_file:
+            offset = data_file.tell()
+            data_file.write(block)
+        entry = {'offset': offset, 'length': len(block), 'first': first, 'last': last,
+                 'lines': len(self._buffer), 'raw_bytes': len(raw)}
+        with open(index_path, 'a', encoding='utf-8') as index_file:
+            index_file.write(json.dumps(entry) + '\n')
+        # Trigrammes écrits après le bloc : un bloc sans ligne .tri est simplement parcouru en entier
+        with open(trigram_path, 'a', encoding='utf-8', newline='\n') as trigram_file:
+            trigram_file.write(f"{self._block_counts[day]}\t{''.join(block_trigrams(text))}\n")
+        self._block_counts[day] += 1
+
+        ARCHIVE_BLOCKS.inc()
+        ARCHIVE_BYTES.inc(len(raw), stage='raw')
+        ARCHIVE_BYTES.inc(len(block), stage='compressed')
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def close(self):
+        """Compresse le bloc en cours (arrêt du bot ou du collecteur)"""
+        if not self.read_only:
+            self.flush()
+
+    def prune(self, now):
+        """Supprime les segments plus anciens que la durée de conservation"""
+        oldest = format_log_time(now - self.retention)[:10]
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('icarus-') and name[7:17] < oldest:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+        if removed:
+            logger.info("🗄️ %d fichiers d'archive expirés supprimés", removed)
+        return removed
+
+    # === LECTURE ===
+
+    def load_index(self, day):
+        """Entrées des blocs d'un jour, dans l'ordre d'écriture"""
+        _, index_path, _ = self.segment_paths(day)
+        try:
+            with open(index_path, encoding='utf-8') as index_file:
+                return [json.loads(line) for line in index_file if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def read_window(self, start, end, limit=None):
+        """Lignes brutes horodatées dans [start, end] (datetimes), dans l'ordre du log
+
+        Seuls les blocs dont la plage recouvre la fenêtre sont décompressés ;
+        le bloc en cours d'écriture est lu en mémoire.
+        """
+        low, high = format_log_time(start), format_log_time(end)
+        lines = []
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while format_log_time(day)[:10] <= high[:10]:
+            day_key = format_log_time(day)[:10]
+            blocks = [b for b in self.load_index(day_key) if b['last'] >= low and b['first'] <= high]
+            if blocks:
+                data_path, _, _ = self.segment_paths(day_key)
+                with open(data_path, 'rb') as data_file:
+                    for block in blocks:
+                        lines.extend(self._select(self.read_block(data_file, block).split('\n'), low, high))
+            day += timedelta(days=1)
+
+        lines.extend(self._select(self.buffered_lines(), low, high))
+        return lines[-limit:] if limit else lines
+
+    def read_block(self, data_file, entry):
+        """Décompresse un bloc d'un segment ouvert en binaire"""
+        data_file.seek(entry['offset'])
+        ARCHIVE_READ_BLOCKS.inc()
+        return self.codec.decompress(data_file.read(entry['length'])).decode('utf-8', errors='ignore')
+
+    def buffered_lines(self):
+        """Lignes du bloc en cours, pas encore compressées"""
+        with self._lock:
+            return list(self._buffer)
+
+    def set_buffered_lines(self, lines):
+        """Lecture seule : remplace le bloc en cours par celui publié par le processus écrivain"""
+        with self._lock:
+            self._buffer = list(lines)
+
+    @staticmethod
+    def _select(block_lines, low, high):
+        """Filtre les lignes d'un bloc ; une ligne sans horodatage suit la précédente"""
+        selected = []
+        keep = False
+        for line in block_lines:
+            timestamp = _line_time(line)
+            if timestamp:
+                keep = low <= timestamp <= high
+            if keep and line:
+                selected.append(line)
+        return selected
+
@@ -0,0 +1,210 @@
+"""Miroir local du fichier de log distant, lu par mmap
+
+Chaque lecture FTP incrémentale ajoute ses octets, tels quels, à une copie
+locale de la fin du log distant (`mirror/Icarus.log`). Le miroir couvre une
+plage contiguë du fichier distant : le fichier `.json` à côté donne la
+position distante de son premier octet (`base`) et la longueur validée. Une
+rotation ou un saut de lecture (retard, premier passage sans miroir)
+recommence le miroir à la nouvelle position ; au-delà de `max_mib`, seule
+la seconde moitié est gardée.
+
+Au redémarrage, le parseur reprend la lecture FTP à la fin du miroir (REST)
+et relit la fin récente depuis le disque : rien n'est re-téléchargé. `!rawlogs`
+lit aussi ses fenêtres dans le miroir quand il les couvre : la position de
+départ est trouvée par dichotomie dans un mmap du fichier, sans le copier en
+mémoire ni décompresser de bloc d'archive.
+"""
+import json
+import logging
+import mmap
+import os
+import threading
+from collections import deque
+
+import metrics
+from log_archive import format_log_time
+
+logger = logging.getLogger(__name__)
+
+MIRROR_BYTES = metrics.REGISTRY.gauge(
+    'icarus_log_mirror_bytes', "Taille du miroir local du log distant")
+MIRROR_RESETS = metrics.REGISTRY.counter(
+    'icarus_log_mirror_resets_total', "Miroirs recommencés (rotation du log, saut de lecture)")
+MIRROR_RESUMED_BYTES = metrics.REGISTRY.counter(
+    'icarus_log_mirror_resumed_bytes_total', "Octets relus depuis le miroir au démarrage au lieu du FTP")
+
+
+class LogMirror:
+    """Copie locale d'une plage contiguë du log distant, [base, base + longueur)"""
+
+    def __init__(self, directory='mirror', filename='Icarus.log', max_bytes=64 * 1024 * 1024):
+        self.path = os.path.join(directory, filename)
+        self.meta_path = self.path + '.json'
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.base, self.length = self._load()
+        MIRROR_BYTES.set(self.length)
+
+    @classmethod
+    def from_config(cls, config):
+        """Crée le miroir depuis la section 'mirror' (None si absente ou désactivée)"""
+        section = config.get('mirror') or {}
+        if not section.get('enabled', False):
+            return None
+        return cls(
+            directory=section.get('directory', 'mirror'),
+            max_bytes=section.get('max_mib', 64) * 1024 * 1024
+        )
+
+    def _load(self):
+        """Position et longueur validées ; les octets au-delà (arrêt pendant une écriture) sont ignorés"""
+        try:
+            with open(self.meta_path, encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            size = os.path.getsize(self.path)
+        except (OSError, ValueError):
+            return 0, 0
+        if size < meta['length']:
+            logger.warning("🪞 Miroir du log incomplet, il sera recommencé")
+            return 0, 0
+        if size > meta['length']:
+            os.truncate(self.path, meta['length'])
+        return meta['base'], meta['length']
+
+    def _save_meta(self):
+        temporary = self.meta_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as meta_file:
+            json.dump({'base': self.base, 'length': self.length}, meta_file)
+        os.replace(temporary, self.meta_path)
+
+    @property
+    def remote_end(self):
+        """Position distante qui suit le dernier octet du miroir (reprise REST)"""
+        return self.base + self.length
+
+    # === ÉCRITURE (lecteur FTP) ===
+
+    def append(self, raw, start, size):
+        """Ajoute les octets lus à la position distante `start` (fichier distant de `size` octets)"""
+        with self._lock:
+            if start != self.remote_end or size < self.remote_end:
+                # Rotation ou saut : le miroir doit rester contigu, il recommence à `start`
+                if self.length:
+                    MIRROR_RESETS.inc()
+                    logger.info("🪞 Miroir du log recommencé à l'octet %d", start)
+                self.base, self.length = start, 0
+                self._save_meta()
+                # Nouveau fichier plutôt que troncature : un mmap ouvert par une lecture reste valide
+                temporary = self.path + '.tmp'
+                with open(temporary, 'wb'):
+                    pass
+                os.replace(temporary, self.path)
+            if raw:
+                with open(self.path, 'ab') as mirror_file:
+                    mirror_file.write(raw)
+                self.length += len(raw)
+                self._save_meta()
+            if self.length > self.max_bytes:
+                self._compact()
+            MIRROR_BYTES.set(self.length)
+
+    def _compact(self):
+        """Garde la seconde moitié du miroir, coupée à une fin de ligne"""
+        with open(self.path, 'rb') as mirror_file, mmap.mmap(mirror_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            newline = view.find(b'\n', self.length - self.max_bytes // 2)
+            cut = newline + 1 if newline >= 0 else self.length - self.max_bytes // 2
+            temporary = self.path + '.tmp'
+            with open(temporary, 'wb') as compacted:
+                compacted.write(memoryview(view)[cut:self.length])
+        os.replace(temporary, self.path)
+        self.base += cut
+        self.length -= cut
+        self._save_meta()
+
+    # === LECTURE (mmap) ===
+
+    def _view(self):
+        """(position distante, mmap en lecture seule) de la partie validée ; mmap None si le miroir est vide"""
+        with self._lock:
+            if not self.length:
+                return self.base, None
+            with open(self.path, 'rb') as mirror_file:
+                return self.base, mmap.mmap(mirror_file.fileno(), self.length, access=mmap.ACCESS_READ)
+
+    def tail(self, nbytes):
+        """(position distante, octets) des `nbytes` derniers octets du miroir"""
+        base, view = self._view()
+        if view is None:
+            return base, b''
+        with view:
+            low = max(len(view) - nbytes, 0)
+            MIRROR_RESUMED_BYTES.inc(len(view) - low)
+            return base + low, view[low:]
+
+    def covers(self, start):
+        """Indique si le miroir remonte jusqu'à `start` (datetime)"""
+        _, view = self._view()
+        if view is None:
+            return False
+        with view:
+            first = self._next_time(view, 0)
+        return first is not None and first <= format_log_time(start).encode()
+
+    def read_window(self, start, end, limit=None):
+        """Lignes horodatées dans [start, end] (datetimes), dans l'ordre du log (comme LogArchive.read_window)
+
+        La première ligne de la fenêtre est trouvée par dichotomie sur les positions du mmap ; les
+        lignes sont délimitées dans le mmap et seules celles retenues sont décodées (via un memoryview).
+        """
+        low, high = format_log_time(start).encode(), format_log_time(end).encode()
+        _, view = self._view()
+        if view is None:
+            return []
+        lines = deque(maxlen=limit)
+        with view, memoryview(view) as data:
+            position = self._seek(view, low)
+            keep = False
+            while True:
+                newline = view.find(b'\n', position)
+                if newline < 0:
+                    break  # Ligne en cours d'écriture côté serveur
+                timestamp = self._line_time(view, position)
+                if timestamp:
+                    if timestamp > high:
+                        break
+                    keep = timestamp >= low
+                if keep and newline > position:
+                    lines.append(str(data[position:newline], 'utf-8', 'ignore'))
+                position = newline + 1
+        return list(lines)
+
+    @staticmethod
+    def _line_time(view, position):
+        """Horodatage (bytes) de la ligne qui commence à `position`, None si elle n'en a pas"""
+        if view[position:position + 1] == b'[' and view[position + 24:position + 25] == b']':
+            return view[position + 1:position + 24]
+        return None
+
+    def _next_time(self, view, position):
+        """Horodatage de la première ligne horodatée à partir de `position` (début de ligne)"""
+        while position < len(view):
+            timestamp = self._line_time(view, position)
+            if timestamp:
+                return timestamp
+            position = view.find(b'\n', position) + 1
+            if not position:
+                break
+        return None
+
+    def _seek(self, view, low):
+        """Début de la première ligne dont l'horodatage (ou celui de la suivante) atteint `low`"""
+        lo, hi = 0, len(view)
+        while lo < hi:
+            middle = (lo + hi) // 2
+            timestamp = self._next_time(view, view.rfind(b'\n', 0, middle) + 1)
+            if timestamp is None or timestamp >= low:
+                hi = middle
+            else:
+                lo = middle + 1
+        return view.rfind(b'\n', 0, lo) + 1
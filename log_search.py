@@ -0,0 +1,170 @@
+"""Recherche plein texte dans l'archive des logs bruts
+
+L'index est partitionné par jour comme l'archive : pour chaque segment, le
+fichier `.tri` associe à chaque bloc ses trigrammes. Une partition est
+chargée en mémoire sous forme d'index inversé {trigramme: bitset des blocs}
+puis complétée au fil des nouvelles lignes du fichier. Dès qu'un jour plus
+récent existe, la partition est figée et n'est plus jamais relue.
+
+Une requête ne décompresse que les blocs qui contiennent tous ses
+trigrammes, du plus récent au plus ancien, et s'arrête aux premières
+correspondances.
+"""
+import logging
+import threading
+import time
+
+import metrics
+from log_archive import format_log_time
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DURATION = metrics.REGISTRY.histogram(
+    'icarus_search_duration_seconds', "Durée d'une recherche dans l'archive des logs")
+SEARCH_CANDIDATE_BLOCKS = metrics.REGISTRY.counter(
+    'icarus_search_candidate_blocks_total', "Blocs retenus par l'index de trigrammes (décompressés ou non)")
+
+
+def query_trigrams(query):
+    low = query.lower()
+    return {low[i:i + 3] for i in range(len(low) - 2)}
+
+
+class _Partition:
+    """Index inversé des trigrammes d'un jour d'archive"""
+
+    def __init__(self, day):
+        self.day = day
+        self.postings = {}  # {trigramme: bitset des numéros de blocs}
+        self.indexed = 0  # Bitset des blocs présents dans le fichier .tri
+        self.blocks = []  # Entrées de l'index des blocs (.idx)
+        self.sealed = False
+        self._position = 0  # Octets du .tri déjà lus
+
+    def refresh(self, archive, sealed):
+        """Lit les blocs ajoutés depuis le dernier appel (rien si la partition est figée)"""
+        if self.sealed:
+            return
+        self.blocks = archive.load_index(self.day)
+        _, _, trigram_path = archive.segment_paths(self.day)
+        try:
+            with open(trigram_path, 'rb') as trigram_file:
+                trigram_file.seek(self._position)
+                for line in trigram_file:
+                    if not line.endswith(b'\n'):
+                        break  # Ligne en cours d'écriture : relue au prochain appel
+                    self._position += len(line)
+                    block_no, _, trigrams = line[:-1].decode('utf-8').partition('\t')
+                    bit = 1 << int(block_no)
+                    self.indexed |= bit
+                    postings = self.postings
+                    for i in range(0, len(trigrams), 3):
+                        trigram = trigrams[i:i + 3]
+                        postings[trigram] = postings.get(trigram, 0) | bit
+        except FileNotFoundError:
+            pass
+        self.sealed = sealed
+
+    def candidates(self, trigrams):
+        """Bitset des blocs pouvant contenir tous les trigrammes (blocs non indexés inclus)"""
+        everything = (1 << len(self.blocks)) - 1
+        unindexed = everything & ~self.indexed
+        matches = everything & self.indexed
+        for trigram in trigrams:
+            matches &= self.postings.get(trigram, 0)
+            if not matches:
+                break
+        return matches | unindexed
+
+
+class LogSearch:
+    """Recherche des lignes contenant un texte (insensible à la casse) dans l'archive"""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.partitions = {}  # {jour: _Partition}
+        self._lock = threading.Lock()  # Recherches exécutées dans des threads : une à la fois
+
+    def _partition(self, day, newest_day):
+        partition = self.partitions.get(day)
+        if partition is None:
+            partition = self.partitions[day] = _Partition(day)
+        partition.refresh(self.archive, sealed=day < newest_day)
+        return partition
+
+    def search(self, query, since, until, limit=15):
+        """Dernières lignes contenant `query` entre `since` et `until`
+
+        Retourne (lignes dans l'ordre du log, statistiques de la recherche).
+        """
+        with self._lock:
+            return self._search(query, since, until, limit)
+
+    def _search(self, query, since, until, limit):
+        started = time.perf_counter()
+        needle = query.lower()
+        low, high = format_log_time(since), format_log_time(until)
+        trigrams = query_trigrams(query)
+        found = []
+        stats = {'blocks': 0, 'candidates': 0, 'scanned': 0}
+
+        # Bloc en cours d'écriture : quelques centaines de lignes au plus, parcourues directement
+        for line in reversed(self.archive.buffered_lines()):
+            if len(found) >= limit:
+                break
+            if needle in line.lower() and low <= line[1:24] <= high:
+                found.append(line)
+
+        days = self.archive.days()
+        self.partitions = {day: partition for day, partition in self.partitions.items() if day in days}
+        newest_day = days[-1] if days else ''
+        for day in reversed(days):
+            if len(found) >= limit or day < low[:10]:
+                break
+            if day > high[:10]:
+                continue
+            partition = self._partition(day, newest_day)
+            candidates = partition.candidates(trigrams)
+            stats['blocks'] += len(partition.blocks)
+            stats['candidates'] += bin(candidates).count('1')
+            if not candidates:
+                continue
+
+            data_path, _, _ = self.archive.segment_paths(day)
+            with open(data_path, 'rb') as data_file:
+                for block_no in range(len(partition.blocks) - 1, -1, -1):
+                    entry = partition.blocks[block_no]
+                    if not candidates >> block_no & 1 or entry['last'] < low or entry['first'] > high:
+                        continue
+                    stats['scanned'] += 1
+                    for line in reversed(self._matching_lines(self.archive.read_block(data_file, entry), needle)):
+                        if low <= line[1:24] <= high or not line.startswith('['):
+                            found.append(line)
+                            if len(found) >= limit:
+                                break
+                    if len(found) >= limit:
+                        break
+
+        SEARCH_CANDIDATE_BLOCKS.inc(stats['candidates'])
+        stats['seconds'] = time.perf_counter() - started
+        SEARCH_DURATION.observe(stats['seconds'])
+        found.reverse()
+        return found, stats
+
+    @staticmethod
+    def _matching_lines(text, needle):
+        """Lignes d'un bloc contenant `needle` : recherche sur le texte entier plutôt que ligne par ligne"""
+        haystack = text.lower()
+        if len(haystack) != len(text):
+            # Minuscules de longueur différente (rare en Unicode) : repli ligne par ligne
+            return [line for line in text.split('\n') if needle in line.lower()]
+        lines = []
+        position = haystack.find(needle)
+        while position != -1:
+            start = text.rfind('\n', 0, position) + 1
+            end = text.find('\n', position)
+            if end == -1:
+                end = len(text)
+            lines.append(text[start:end])
+            position = haystack.find(needle, end)
+        return lines
@@ -0,0 +1,130 @@
+"""Configuration du logging non bloquant du bot Icarus
+
+Les enregistrements sont déposés dans une file par un QueueHandler (coût
+minimal sur la boucle Discord : le message seul est construit) puis mis en
+forme et écrits par un QueueListener sur un thread dédié : une écriture
+disque lente ne bloque jamais la boucle.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s %(levelname)-8s %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler qui laisse la mise en forme (horodatage, niveau) au thread du listener
+
+    Le message est construit avant la mise en file, comme le QueueHandler
+    standard : les arguments %-style peuvent être des objets que la boucle
+    modifie ensuite (joueurs connectés, listes d'événements). Seuls les appels
+    qui passent le niveau et le filtre paient l'interpolation.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        # Les traces d'exception référencent des frames vivantes : elles sont rendues tout de suite
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# À passer en `extra=` aux appels connus pour se répéter (erreurs FTP, relances, tours sautés)
+RATE_LIMITED = {'rate_limited': True}
+
+
+class RateLimitFilter(logging.Filter):
+    """Limite les messages répétitifs : au plus `burst` par modèle et par fenêtre
+
+    Seuls les enregistrements marqués `extra=RATE_LIMITED` sont limités : les
+    journaux d'événements (connexions, sauvegardes, lectures FTP réussies)
+    passent tous. Les messages sont regroupés par (logger, niveau, modèle
+    %-style) ; les suppressions sont signalées une fois la fenêtre suivante
+    ouverte.
+    """
+
+    def __init__(self, burst=5, window=60.0):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._buckets = {}  # {clé: [début de fenêtre, émis, supprimés]}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'rate_limited', False):
+            return True
+
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > 1024:
+                self._prune(now)
+            bucket = self._buckets.get(key)
+            if bucket is None or now - bucket[0] >= self.window:
+                suppressed = bucket[2] if bucket else 0
+                self._buckets[key] = [now, 1, 0]
+                if suppressed and isinstance(record.args, tuple):
+                    # Sans arguments, le message n'a jamais été formaté : on échappe ses '%'
+                    msg = str(record.msg) if record.args else str(record.msg).replace('%', '%%')
+                    record.msg = msg + " (+%d messages similaires supprimés)"
+                    record.args = record.args + (suppressed,)
+                return True
+
+            if bucket[1] < self.burst:
+                bucket[1] += 1
+                return True
+
+            bucket[2] += 1
+            return False
+
+    def _prune(self, now):
+        # Un message non paramétré crée une clé par texte : on oublie les fenêtres closes
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket[0] < self.window or bucket[2]
+        }
+
+
+def setup_logging(log_file='icarus_bot.log', level=logging.INFO, max_bytes=5 * 1024 * 1024,
+                  backup_count=3, rate_limit_burst=3, rate_limit_window=60.0):
+    """Installe le logging via file + listener (idempotent) et retourne le listener"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(burst=rate_limit_burst, window=rate_limit_window))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Vide la file et arrête le thread d'écriture"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
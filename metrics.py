@@ -0,0 +1,335 @@
+"""Métriques Prometheus et serveur HTTP de santé du bot Icarus"""
+import bisect
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Buckets par défaut (en secondes) adaptés aux durées FTP / Discord
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Buckets pour les tailles de téléchargement (en octets)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_labels(labelnames, values, extra=None):
+    """Formate les labels au format texte Prometheus"""
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    """Formate une valeur numérique Prometheus"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base commune des métriques avec labels"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Labels attendus pour {self.name}: {self.labelnames}, reçus: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.metric_type}'
+        ]
+        lines.extend(self._render_samples())
+        return '\n'.join(lines)
+
+    def _render_samples(self):
+        return []
+
+
+class Counter(_Metric):
+    """Compteur monotone"""
+
+    metric_type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Un compteur ne peut pas décroître")
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self):
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Valeur instantanée"""
+
+    metric_type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = float(value)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self):
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histogramme à buckets cumulés"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {labels: [bucket_counts, sum, count]}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _render_samples(self):
+        samples = []
+        for key, (bucket_counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                samples.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            samples.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            samples.append(f'{self.name}_count{labels} {count}')
+        return samples
+
+
+class MetricsRegistry:
+    """Registre des métriques exposées sur /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrique déjà enregistrée: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Génère l'exposition texte Prometheus de toutes les métriques"""
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+    def export_state(self, names=None):
+        """Exporte les séries des métriques (picklable) pour un autre processus"""
+        state = {}
+        for name, metric in self._metrics.items():
+            if names is None or name in names:
+                state[name] = dict(metric._series if isinstance(metric, Histogram) else metric._values)
+        return state
+
+    def import_state(self, state):
+        """Fusionne les séries exportées par un autre processus (elles font foi pour leurs labels)"""
+        for name, series in state.items():
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            if isinstance(metric, Histogram):
+                metric._series.update(series)
+            else:
+                metric._values.update(series)
+
+
+REGISTRY = MetricsRegistry()
+
+# === FTP ===
+FTP_FETCH_BYTES = REGISTRY.histogram(
+    'icarus_ftp_fetch_bytes', "Octets téléchargés par lecture FTP", buckets=BYTES_BUCKETS)
+FTP_FETCH_BYTES_TOTAL = REGISTRY.counter(
+    'icarus_ftp_fetch_bytes_total', "Total des octets téléchargés depuis le FTP")
+FTP_FETCH_DURATION = REGISTRY.histogram(
+    'icarus_ftp_fetch_duration_seconds', "Durée d'une lecture FTP (connexion + transfert)")
+FTP_FETCH_ERRORS = REGISTRY.counter(
+    'icarus_ftp_fetch_errors_total', "Nombre de lectures FTP en échec")
+
+# === DISJONCTEUR FTP ===
+FTP_BREAKER_STATE = REGISTRY.gauge(
+    'icarus_ftp_breaker_state', "État du disjoncteur FTP (1 pour l'état courant)", labelnames=('state',))
+FTP_BREAKER_SECONDS = REGISTRY.counter(
+    'icarus_ftp_breaker_state_seconds_total', "Temps passé dans chaque état du disjoncteur FTP", labelnames=('state',))
+FTP_BREAKER_TRANSITIONS = REGISTRY.counter(
+    'icarus_ftp_breaker_transitions_total', "Passages du disjoncteur FTP dans chaque état", labelnames=('state',))
+FTP_SHORT_CIRCUITED = REGISTRY.counter(
+    'icarus_ftp_short_circuited_total', "Lectures FTP évitées pendant que le disjoncteur est ouvert")
+
+# === PARSING ===
+LOG_LINES_PARSED = REGISTRY.counter(
+    'icarus_log_lines_parsed_total', "Nombre de lignes de logs analysées")
+LOG_LINES_PER_SECOND = REGISTRY.gauge(
+    'icarus_log_lines_parsed_per_second', "Débit d'analyse des lignes lors du dernier cycle")
+EVENTS_TOTAL = REGISTRY.counter(
+    'icarus_events_total', "Événements détectés par type", labelnames=('type',))
+
+# === FLUX DE LOGS DU SERVEUR ===
+LOG_LINE_RATE = REGISTRY.gauge(
+    'icarus_server_log_lines_per_second', "Lignes écrites par le serveur par seconde (horodatages du log, 60s)")
+LOG_MAX_GAP = REGISTRY.gauge(
+    'icarus_server_log_max_gap_seconds', "Plus grand écart récent entre deux lignes de log consécutives")
+LOG_SILENCE = REGISTRY.gauge(
+    'icarus_server_log_silence_seconds', "Temps écoulé depuis la dernière ligne de log du serveur")
+LOG_GAP = REGISTRY.histogram(
+    'icarus_server_log_gap_seconds', "Écarts d'au moins une seconde entre deux lignes de log consécutives",
+    buckets=(1, 2, 5, 10, 30, 60, 120, 300, 900, 3600))
+
+# === DISCORD ===
+EMBED_BUILD_DURATION = REGISTRY.histogram(
+    'icarus_embed_build_duration_seconds', "Durée de construction de l'embed de statut")
+DISCORD_EDIT_DURATION = REGISTRY.histogram(
+    'icarus_discord_edit_duration_seconds', "Latence d'édition du message de statut Discord")
+DISCORD_RATE_LIMITED = REGISTRY.counter(
+    'icarus_discord_rate_limited_total', "Réponses 429 reçues de l'API Discord")
+INTERACTION_ACK_DURATION = REGISTRY.histogram(
+    'icarus_interaction_ack_seconds', "Délai entre la création d'une interaction et son acquittement (limite Discord: 3s)",
+    labelnames=('component',), buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0))
+INTERACTION_EXPIRED = REGISTRY.counter(
+    'icarus_interaction_expired_total', "Interactions expirées avant acquittement", labelnames=('component',))
+
+# === SAUVEGARDES ===
+SAVE_DURATION = REGISTRY.histogram(
+    'icarus_save_duration_seconds', "Durée des sauvegardes du monde (BeginRecording → EndRecording)",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0))
+SAVE_INTERVAL = REGISTRY.histogram(
+    'icarus_save_interval_seconds', "Intervalle entre deux sauvegardes successives",
+    buckets=(60, 120, 300, 600, 900, 1800, 3600, 7200))
+SAVE_REGRESSIONS = REGISTRY.counter(
+    'icarus_save_regressions_total', "Sauvegardes nettement plus lentes que la médiane récente")
+
+# === DÉMARRAGE ===
+STARTUP_IMPORT_SECONDS = REGISTRY.gauge(
+    'icarus_startup_import_seconds', "Durée d'import du module principal du bot")
+TIME_TO_FIRST_STATUS = REGISTRY.gauge(
+    'icarus_time_to_first_status_seconds', "Délai entre le lancement et la publication du premier statut")
+
+
+class RateLimitCounterFilter(logging.Filter):
+    """Compte les 429 signalés par le logger HTTP de discord.py"""
+
+    def filter(self, record):
+        if record.name == 'discord.http' and 'responded with 429' in record.msg:
+            DISCORD_RATE_LIMITED.inc()
+        return True
+
+
+def install_rate_limit_counter():
+    """Branche le compteur de 429 sur le logger 'discord.http'"""
+    logging.getLogger('discord.http').addFilter(RateLimitCounterFilter())
+
+
+async def start_http_server(port, health_check, ready_check, host='0.0.0.0'):
+    """Démarre le serveur HTTP embarqué (/healthz, /readyz, /metrics)
+
+    health_check et ready_check sont des fonctions synchrones sans I/O
+    retournant un tuple (ok, payload).
+    """
+    from aiohttp import web
+    
+    def _json_response(ok, payload):
+        return web.Response(
+            text=json.dumps(payload, default=str),
+            status=200 if ok else 503,
+            content_type='application/json'
+        )
+
+    async def healthz(request):
+        return _json_response(*health_check())
+
+    async def readyz(request):
+        return _json_response(*ready_check())
+
+    async def metrics(request):
+        return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/healthz', healthz)
+    app.router.add_get('/readyz', readyz)
+    app.router.add_get('/metrics', metrics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info("🩺 Serveur HTTP de santé démarré sur le port %s", port)
+    return runner
+
+
+class Timer:
+    """Chronomètre une section et l'observe dans un histogramme"""
+
+    def __init__(self, histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
@@ -0,0 +1,201 @@
+"""Spans de chronométrage par étape du cycle de monitoring et profilage à la demande"""
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import time
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+STAGE_DURATION = metrics.REGISTRY.histogram(
+    'icarus_stage_duration_seconds', "Durée de chaque étape du cycle de monitoring", labelnames=('stage',))
+
+
+class _NullSpan:
+    """Span inactif partagé : aucun coût quand l'instrumentation est désactivée"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class SpanRecorder:
+    """Conserve une fenêtre glissante des durées par étape"""
+
+    def __init__(self, window=200, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self._samples = {}  # {stage: deque[durée en secondes]}
+        self._remote = {}  # Résumé publié par le processus collecteur
+
+    def span(self, name):
+        """Context manager chronométrant l'étape `name`"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Décorateur chronométrant une fonction (synchrone ou coroutine)"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, duration):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(duration)
+        STAGE_DURATION.observe(duration, stage=name)
+
+    def merge_remote(self, summary):
+        """Enregistre le résumé des étapes mesurées dans un autre processus"""
+        self._remote = dict(summary)
+
+    def summary(self):
+        """Retourne {étape: {'count', 'last', 'p50', 'p95', 'max'}} en millisecondes"""
+        result = dict(self._remote)
+        for name, samples in self._samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            last = len(ordered) - 1
+            result[name] = {
+                'count': len(ordered),
+                'last': samples[-1] * 1000,
+                'p50': ordered[int(last * 0.50)] * 1000,
+                'p95': ordered[int(last * 0.95)] * 1000,
+                'max': ordered[-1] * 1000
+            }
+        return result
+
+    def reset(self):
+        self._samples.clear()
+        self._remote = {}
+
+
+class CycleProfiler:
+    """Capture un profil (cProfile ou pyinstrument) sur N cycles de monitoring"""
+
+    ENGINES = ('cprofile', 'pyinstrument')
+
+    def __init__(self):
+        self._remaining = 0
+        self._engine = None
+        self._profiler = None
+        self._future = None
+        self._in_cycle = False
+
+    @property
+    def active(self):
+        return self._future is not None
+
+    async def capture(self, cycles, engine='cprofile'):
+        """Attend la fin de `cycles` cycles profilés et retourne le rapport texte"""
+        if self.active:
+            raise RuntimeError("Un profilage est déjà en cours")
+        if engine not in self.ENGINES:
+            raise ValueError(f"Moteur inconnu: {engine} (disponibles: {', '.join(self.ENGINES)})")
+
+        if engine == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                raise RuntimeError("pyinstrument n'est pas installé (pip install pyinstrument)")
+            self._profiler = Profiler(async_mode='disabled')
+        else:
+            self._profiler = cProfile.Profile()
+
+        self._engine = engine
+        self._remaining = cycles
+        self._future = asyncio.get_running_loop().create_future()
+        logger.info("🔬 Profilage %s démarré pour %d cycle(s)", engine, cycles)
+        try:
+            return await self._future
+        finally:
+            if self._in_cycle:
+                self._stop()
+            self._future = None
+            self._profiler = None
+
+    def start_cycle(self):
+        """Démarre un cycle profilé ; False si aucune capture n'attend ou si un cycle est déjà profilé"""
+        if not self.active or self._remaining <= 0 or self._in_cycle:
+            return False
+        self._in_cycle = True
+        if self._engine == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        return True
+
+    def end_cycle(self):
+        # Ignore un cycle déjà en cours au moment où la capture a été demandée
+        if not self._in_cycle:
+            return
+        self._stop()
+
+        self._remaining -= 1
+        if self._remaining == 0 and not self._future.done():
+            self._future.set_result(self._report())
+            logger.info("🔬 Profilage terminé")
+
+    def _stop(self):
+        self._in_cycle = False
+        if self._engine == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def _report(self):
+        if self._engine == 'pyinstrument':
+            return self._profiler.output_text(unicode=True, color=False)
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(40)
+        return stream.getvalue()
+
+
+# Instances partagées par le bot
+recorder = SpanRecorder()
+span = recorder.span
+timed = recorder.timed
+profiler = CycleProfiler()
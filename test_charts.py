@@ -0,0 +1,66 @@
+"""Tests du cache de rendu des graphiques (rendu remplacé par une coroutine contrôlée)"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from charts import ChartRenderer
+
+HISTORY = SimpleNamespace(directory='history')
+
+
+def test_concurrent_requests_share_one_render_and_hit_the_cache():
+    renders = []
+
+    async def render(history, chart, period, since, until, executor):
+        renders.append(chart)
+        await asyncio.sleep(0.01)
+        return b'png'
+
+    async def scenario():
+        renderer = ChartRenderer()
+        renderer._render = render
+        results = await asyncio.gather(*(renderer.render(HISTORY, 'ping') for _ in range(3)))
+        return results, await renderer.render(HISTORY, 'ping')
+
+    results, again = asyncio.run(scenario())
+    assert renders == ['ping']
+    assert [cached for _, cached in results] == [False, True, True]
+    assert again == (b'png', True)
+
+
+def test_cancelled_render_releases_waiters():
+    async def render(history, chart, period, since, until, executor):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        renderer = ChartRenderer()
+        renderer._render = render
+        owner = asyncio.create_task(renderer.render(HISTORY, 'players'))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(renderer.render(HISTORY, 'players'))
+        await asyncio.sleep(0)
+        owner.cancel()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(waiter, timeout=1)
+        assert not renderer._pending
+
+    asyncio.run(scenario())
+
+
+def test_failed_render_is_not_cached():
+    calls = []
+
+    async def render(history, chart, period, since, until, executor):
+        calls.append(chart)
+        raise RuntimeError("matplotlib absent")
+
+    async def scenario():
+        renderer = ChartRenderer()
+        renderer._render = render
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await renderer.render(HISTORY, 'saves')
+
+    asyncio.run(scenario())
+    assert calls == ['saves', 'saves']
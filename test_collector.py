@@ -0,0 +1,48 @@
+"""Tests du mode collecteur côté bot : parseur alimenté par les instantanés"""
+import pytest
+
+from collector import CollectorParser, build_parser
+from icarus_core import IcarusLogParser
+
+LINE = '[2026.10.19-14.38.42:123]LogTemp: Display: ligne {}'
+
+
+@pytest.fixture
+def config(tmp_path):
+    return {
+        'ftp': {'host': 'ftp.test', 'port': 21, 'user': 'u', 'password': 'p', 'log_path': 'Icarus.log'},
+        'archive': {'enabled': True, 'directory': str(tmp_path / 'archive')},
+        'mirror': {'enabled': True, 'directory': str(tmp_path / 'mirror')},
+    }
+
+
+def snapshot(**overrides):
+    result = {'connected_players': {}, 'current_prospect': 'Unknown', 'ftp_available': True,
+              'last_ftp_check': None, 'stale_since': None, 'stats': {'active_players': 0},
+              'events': [], 'archive_buffer': None}
+    result.update(overrides)
+    return result
+
+
+def test_collector_side_parser_owns_mirror_and_writable_archive(config):
+    parser = build_parser(config)
+    assert type(parser) is IcarusLogParser
+    assert parser.mirror is not None
+    assert not parser.archive.read_only
+
+
+def test_bot_side_parser_has_no_mirror_and_a_read_only_archive(config):
+    parser = build_parser(config, CollectorParser)
+    assert parser.mirror is None
+    assert parser.archive.read_only
+    with pytest.raises(RuntimeError):
+        parser.archive.append([LINE.format(1)])
+
+
+def test_snapshot_publishes_the_collector_block_not_yet_compressed(config):
+    writer = build_parser(config)
+    writer.archive.append([LINE.format(1), LINE.format(2)])
+    reader = build_parser(config, CollectorParser)
+    reader.apply_snapshot(snapshot(archive_buffer=writer.archive.buffered_lines()))
+    assert reader.archive.buffered_lines() == [LINE.format(1), LINE.format(2)]
+    assert reader.get_server_stats() == {'active_players': 0}
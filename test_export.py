@@ -0,0 +1,40 @@
+"""Tests de l'outil d'export : historique lu sans configuration complète du bot"""
+import json
+from datetime import timedelta
+
+import pytest
+
+import export
+from history import HistoryStore
+from icarus_core import get_french_time
+
+
+@pytest.fixture
+def history_dir(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history'))
+    store.on_event({'type': 'player_connect', 'player_name': 'Player01',
+                    'timestamp': get_french_time() - timedelta(minutes=5)})
+    store.close()
+    return tmp_path / 'history'
+
+
+def exported(tmp_path, *argv):
+    output = tmp_path / 'events.jsonl'
+    export.main(['events', '-f', 'jsonl', '-o', str(output), *argv])
+    return [json.loads(line)['player_name'] for line in output.read_text(encoding='utf-8').splitlines()]
+
+
+def test_directory_option_needs_no_config(tmp_path, history_dir):
+    assert exported(tmp_path, '--directory', str(history_dir), '--config', str(tmp_path / 'absent.json')) \
+        == ['Player01']
+
+
+def test_only_history_section_of_config_is_read(tmp_path, history_dir):
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'history': {'enabled': True, 'directory': str(history_dir)}}), encoding='utf-8')
+    assert exported(tmp_path, '--config', str(config)) == ['Player01']
+
+
+def test_disabled_history_without_directory_is_an_error(tmp_path):
+    with pytest.raises(SystemExit):
+        export.main(['events', '--config', str(tmp_path / 'absent.json')])
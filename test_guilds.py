@@ -0,0 +1,65 @@
+"""Tests du monitoring multi-guildes : répartition par shard et boucles de mise à jour"""
+import asyncio
+from types import SimpleNamespace
+
+import spans
+from guilds import GuildRegistry, ShardScheduler, shard_for
+
+
+def guild(guild_id):
+    return SimpleNamespace(guild_id=guild_id, parser=SimpleNamespace(executor=None), history=None)
+
+
+def registry(*guild_ids):
+    result = GuildRegistry()
+    for guild_id in guild_ids:
+        result.add(guild(guild_id))
+    return result
+
+
+def test_guilds_are_partitioned_by_discord_shard_formula():
+    guild_ids = [(n << 22) + 7 for n in range(10)]
+    reg = registry(*guild_ids)
+    shards = [reg.for_shard(shard_id, 3) for shard_id in range(3)]
+    assert sorted(state.guild_id for shard in shards for state in shard) == guild_ids
+    assert all(shard_for(state.guild_id, 3) == shard_id for shard_id, shard in enumerate(shards) for state in shard)
+
+
+def test_profile_completes_in_multi_guild_mode():
+    updated = []
+
+    async def update(state):
+        updated.append(state.guild_id)
+        await asyncio.sleep(0)
+
+    async def scenario():
+        scheduler = ShardScheduler(registry(1 << 22, 2 << 22), update, interval=0.05)
+        scheduler.start([0], 1)
+        try:
+            return await asyncio.wait_for(spans.profiler.capture(2), timeout=2)
+        finally:
+            scheduler.stop()
+
+    report = asyncio.run(scenario())
+    assert 'function calls' in report
+    assert len(updated) >= 2
+    assert not spans.profiler.active
+
+
+def test_slow_guild_skips_its_turn_without_blocking_others():
+    calls = {1 << 22: 0, 2 << 22: 0}
+
+    async def update(state):
+        calls[state.guild_id] += 1
+        if state.guild_id == 1 << 22:
+            await asyncio.sleep(10)
+
+    async def scenario():
+        scheduler = ShardScheduler(registry(*calls), update, interval=0.02)
+        scheduler.start([0], 1)
+        await asyncio.sleep(0.2)
+        scheduler.stop()
+
+    asyncio.run(scenario())
+    assert calls[1 << 22] == 1
+    assert calls[2 << 22] > 3
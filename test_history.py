@@ -0,0 +1,75 @@
+"""Tests de l'historique : enregistrements mis en file sur la boucle, écrits dans un thread"""
+import asyncio
+import threading
+from datetime import timedelta
+
+from history import HistoryStore
+from icarus_core import get_french_time
+
+STATUS = {'online': True, 'port_open': True, 'ping': 42, 'players': 3, 'stale_since': None}
+
+
+NOW = get_french_time()
+
+
+def event(minutes_ago, player_name='Player01'):
+    return {'type': 'player_connect', 'player_name': player_name, 'raw_line': '[...]', 'seq': 1,
+            'timestamp': NOW - timedelta(minutes=minutes_ago)}
+
+
+def test_events_are_queued_until_flush(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.on_event(event(5))
+    assert store.days('events') == []
+    store.flush()
+    records = list(store.iter_records('events'))
+    assert [(record['player_name'], record['type']) for record in records] == [('Player01', 'player_connect')]
+    assert 'raw_line' not in records[0] and 'seq' not in records[0]
+
+
+def test_status_on_event_loop_writes_in_executor_thread(tmp_path, monkeypatch):
+    store = HistoryStore(str(tmp_path))
+    writers = []
+    write = store._write
+    monkeypatch.setattr(store, '_write', lambda *args: (writers.append(threading.current_thread()), write(*args)))
+
+    async def cycle():
+        store.on_event(event(1))
+        store.on_status(STATUS)
+        await store._flushing
+
+    asyncio.run(cycle())
+    assert writers and threading.main_thread() not in writers  # Rien n'est écrit sur la boucle
+    assert [record['ping_ms'] for record in store.iter_records('probes')] == [42]
+    assert len(list(store.iter_records('events'))) == 1
+
+
+def test_status_outside_event_loop_is_written_immediately(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.on_status(dict(STATUS, ping=0))
+    assert [record['ping_ms'] for record in store.iter_records('probes')] == [None]
+
+
+def test_events_already_recorded_are_skipped_after_restart(tmp_path):
+    first = HistoryStore(str(tmp_path))
+    first.on_event(event(10, 'Ancien'))
+    first.close()
+
+    second = HistoryStore(str(tmp_path))
+    second.on_event(event(10, 'Ancien'))  # Relu dans la fin du log
+    second.on_event(event(1, 'Nouveau'))
+    second.close()
+    assert [record['player_name'] for record in second.iter_records('events')] == ['Ancien', 'Nouveau']
+
+
+def test_unwritten_events_sharing_the_last_timestamp_are_kept_after_restart(tmp_path):
+    first = HistoryStore(str(tmp_path))
+    first.on_event(event(10, 'Ecrit'))
+    first.close()
+
+    # Arrêt avant l'écriture des autres événements du même instant : la relecture du log les rapporte
+    second = HistoryStore(str(tmp_path))
+    for player_name in ('Ecrit', 'NonEcrit', 'Ecrit'):
+        second.on_event(event(10, player_name))
+    second.close()
+    assert [record['player_name'] for record in second.iter_records('events')] == ['Ecrit', 'NonEcrit', 'Ecrit']
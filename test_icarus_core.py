@@ -0,0 +1,245 @@
+"""Tests du parseur : lecture FTP incrémentale (serveur FTP simulé) et état en mémoire"""
+import asyncio
+import ftplib
+from datetime import timedelta
+
+import pytest
+
+import icarus_core
+from benchmarks.loggen import format_timestamp
+from icarus_core import CircuitBreaker, IcarusLogParser, PrefixIndex, get_french_time
+
+from log_mirror import LogMirror
+FTP_CONFIG = {'host': 'ftp.test', 'port': 21, 'user': 'u', 'password': 'p', 'log_path': 'Icarus.log'}
+
+
+class FakeFTP:
+    """Serveur FTP en mémoire ; `during_retr` simule l'écriture du serveur pendant un transfert"""
+
+    data = bytearray()
+    during_retr = []  # Octets ajoutés au fichier au début de chaque RETR (un élément par RETR)
+    rests = []  # Position REST de chaque RETR
+
+    def connect(self, host, port, timeout=None):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def voidcmd(self, command):
+        pass
+
+    def size(self, path):
+        return len(self.data)
+
+    def retrbinary(self, command, callback, rest=None):
+        self.rests.append(rest or 0)
+        if self.during_retr:
+            self.data.extend(self.during_retr.pop(0))
+        callback(bytes(self.data[rest or 0:]))
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def fake_ftp(monkeypatch):
+    FakeFTP.data = bytearray()
+    FakeFTP.during_retr = []
+    FakeFTP.rests = []
+    monkeypatch.setattr(icarus_core.ftplib, 'FTP', FakeFTP)
+    return FakeFTP
+
+
+def log_lines(count, start_index=0):
+    """Lignes de connexion (un joueur par ligne) horodatées dans la dernière heure"""
+    base = get_french_time() - timedelta(minutes=30)
+    return b''.join(
+        (f'[{format_timestamp(base + timedelta(seconds=i))}]LogIcarusPlayerController: Display: '
+         f'ServerTryCompletePlayerInitialisation BP_IcarusPlayerCharacterSurvival_C_{i} '
+         f'IpConnection_{i} Name=Player{i:03d}\n').encode()
+        for i in range(start_index, start_index + count))
+
+
+def read(parser):
+    return asyncio.run(parser.read_logs_ftp())
+
+
+def test_offset_follows_bytes_read_when_file_grows_during_retr(fake_ftp):
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG)
+    fake_ftp.data.extend(log_lines(5))
+    first = read(parser)
+
+    # Ligne 5 présente au SIZE, lignes 6-7 écrites par le serveur pendant le RETR
+    fake_ftp.data.extend(log_lines(1, 5))
+    fake_ftp.during_retr.append(log_lines(2, 6))
+    second = read(parser)
+    assert parser._offset == len(fake_ftp.data)
+
+    third = read(parser)
+    names = [event['player_name'] for event in first + second + third]
+    assert names == [f'Player{i:03d}' for i in range(8)]
+    assert third == []
+
+
+def test_partial_line_is_completed_on_next_read(fake_ftp):
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG)
+    line = log_lines(1)
+    fake_ftp.data.extend(line[:40])
+    assert read(parser) == []
+    fake_ftp.data.extend(line[40:])
+    assert [event['player_name'] for event in read(parser)] == ['Player000']
+
+
+def test_ftp_error_opens_breaker_and_keeps_offset(fake_ftp, monkeypatch):
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG, breaker_failure_threshold=1)
+    fake_ftp.data.extend(log_lines(2))
+    read(parser)
+    offset = parser._offset
+
+    def refuse(self, *args, **kwargs):
+        raise ftplib.error_temp('421 indisponible')
+    monkeypatch.setattr(FakeFTP, 'login', refuse)
+    assert read(parser) == []
+    assert parser._offset == offset
+    assert parser.stale_since is not None
+    assert not parser.breaker.allow()
+
+
+def test_restart_resumes_ftp_after_mirror_without_gap_or_duplicate(fake_ftp, tmp_path):
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG, mirror=LogMirror(str(tmp_path)))
+    fake_ftp.data.extend(log_lines(3))
+    first = read(parser)
+    growth = log_lines(2, 3)
+    fake_ftp.data.extend(growth[:20])  # Ligne 3 incomplète au SIZE, complétée pendant le RETR
+    fake_ftp.during_retr.append(growth[20:])
+    first += read(parser)
+    assert parser.mirror.remote_end == parser._offset == len(fake_ftp.data)
+
+    # Redémarrage : la fin du log est relue depuis le miroir, le FTP ne transfère que la suite
+    fake_ftp.data.extend(log_lines(2, 5))
+    restarted = IcarusLogParser(ftp_config=FTP_CONFIG, mirror=LogMirror(str(tmp_path)))
+    resumed = read(restarted)
+    assert fake_ftp.rests[-1] == parser._offset
+    assert restarted._offset == restarted.mirror.remote_end == len(fake_ftp.data)
+    assert [event['player_name'] for event in first] == [f'Player{i:03d}' for i in range(5)]
+    assert [event['player_name'] for event in resumed] == [f'Player{i:03d}' for i in range(7)]
+    assert read(restarted) == []
+
+
+def test_prefix_index_completes_case_insensitively_in_order():
+    index = PrefixIndex(max_size=4)
+    for name in ('Survivor02', 'alpha', 'survivor01', 'Beta', 'Survivor03'):
+        index.add(name)
+    index.add('alpha')
+    assert len(index) == 4  # Doublon ignoré, Survivor03 au-delà de max_size
+    assert index.complete('SURV') == ['survivor01', 'Survivor02']
+    assert index.complete('surv', limit=1) == ['survivor01']
+    assert index.complete('z') == []
+    assert index.complete('') == ['alpha', 'Beta', 'survivor01', 'Survivor02']
+
+
+def timeline_parser(count):
+    """Parseur avec `count` événements groupés par trois sur le même timestamp"""
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG)
+    base = get_french_time() - timedelta(hours=1)
+    parser.add_events([
+        {'type': 'biome_change' if i % 2 else 'player_connect', 'player_name': f'Player{i % 2}',
+         'timestamp': base + timedelta(seconds=i // 3), 'index': i}
+        for i in range(count)])
+    return parser
+
+
+def test_timeline_pages_do_not_skip_or_repeat_events_with_same_timestamp():
+    parser = timeline_parser(10)
+    seen, before = [], None
+    while True:
+        page, has_older, has_newer = parser.get_timeline_page(before=before, page_size=4)
+        assert has_newer == (before is not None)
+        seen += [event['index'] for event in page]
+        if not has_older:
+            break
+        before = parser.event_cursor(page[-1])
+    assert seen == list(range(9, -1, -1))
+
+    # Retour vers les plus récents depuis le curseur du plus ancien
+    oldest = parser.events[0]
+    page, has_older, has_newer = parser.get_timeline_page(after=parser.event_cursor(oldest), page_size=4)
+    assert [event['index'] for event in page] == [4, 3, 2, 1]
+    assert has_older and has_newer
+
+
+def test_timeline_page_filters_by_player_and_type():
+    parser = timeline_parser(10)
+    page, has_older, has_newer = parser.get_timeline_page(page_size=3, player_name='Player1')
+    assert [event['index'] for event in page] == [9, 7, 5]
+    assert has_older and not has_newer
+    page, _, _ = parser.get_timeline_page(before=parser.event_cursor(page[-1]), event_type='biome_change')
+    assert [event['index'] for event in page] == [3, 1]
+
+
+def test_breaker_half_open_probe_doubles_interval_until_success(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(icarus_core.time, 'monotonic', lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, probe_interval=10, max_probe_interval=30)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == breaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN and not breaker.allow()
+
+    intervals = []
+    for _ in range(3):
+        # Le premier appel après l'intervalle passe en semi-ouvert et autorise un seul essai
+        interval = breaker.summary()['next_probe_seconds']
+        clock[0] += interval - 1
+        assert not breaker.allow()
+        clock[0] += 1
+        assert breaker.allow() and breaker.state == breaker.HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_failure()
+        intervals.append(interval)
+    assert intervals == [10, 20, 30]
+    assert breaker.summary()['next_probe_seconds'] == 30
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED and breaker.failures == 0
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.summary()['next_probe_seconds'] == 10
+
+
+def connect(parser, player_name, last_seen):
+    parser.connected_players[player_name] = {'connect_time': last_seen, 'last_seen': last_seen, 'name': player_name}
+    parser._touch_player(player_name, last_seen)
+
+
+def test_inactive_players_expire_with_lazy_heap_invalidation():
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG, player_timeout_minutes=45)
+    now = get_french_time()
+    connect(parser, 'Active', now - timedelta(minutes=50))
+    parser._touch_player('Active', now - timedelta(minutes=10))  # L'ancienne échéance reste dans le tas
+    connect(parser, 'Idle', now - timedelta(minutes=50))
+    connect(parser, 'Left', now - timedelta(minutes=50))
+    parser._remove_player('Left')
+
+    parser.cleanup_old_data()
+    assert list(parser.connected_players) == ['Active']
+    assert [entry[2] for entry in parser._expiry_heap] == ['Active']
+
+    # Logs périmés : personne n'est retiré
+    parser._touch_player('Active', now - timedelta(minutes=46))
+    parser.stale_since = now
+    parser.cleanup_old_data()
+    assert 'Active' in parser.connected_players
+
+
+def test_expiry_heap_is_compacted_when_stale_entries_dominate():
+    parser = IcarusLogParser(ftp_config=FTP_CONFIG)
+    now = get_french_time()
+    connect(parser, 'Player', now)
+    for second in range(500):
+        parser._touch_player('Player', now + timedelta(seconds=second))
+    assert len(parser._expiry_heap) <= 4 + 64 + 1
+    assert min(parser._expiry_heap)[0] >= now + parser.player_timeout
@@ -0,0 +1,94 @@
+"""Tests de l'archive des logs bruts : blocs compressés indexés par plage de temps"""
+import gzip
+from datetime import timedelta
+
+import pytest
+
+from icarus_core import get_french_time
+from log_archive import LogArchive, block_trigrams, format_log_time
+
+
+def day_start():
+    return get_french_time().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def lines(base, count, start_index=0):
+    """Une ligne horodatée par minute à partir de `base`"""
+    return [f'[{format_log_time(base + timedelta(minutes=i))}]LogTemp: Display: ligne {i}'
+            for i in range(start_index, start_index + count)]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return LogArchive(str(tmp_path), block_bytes=300)
+
+
+def test_blocks_are_independent_gzip_members_indexed_by_time(archive):
+    written = lines(day_start(), 20)
+    archive.append(written)
+    archive.flush()
+
+    day = format_log_time(day_start())[:10]
+    blocks = archive.load_index(day)
+    assert len(blocks) > 2
+    assert sum(block['lines'] for block in blocks) == 20
+    assert all(previous['last'] < block['first'] for previous, block in zip(blocks, blocks[1:]))
+
+    data_path, _, trigram_path = archive.segment_paths(day)
+    with open(data_path, 'rb') as data_file:
+        text = ''.join(archive.read_block(data_file, block) for block in blocks)
+        data_file.seek(0)
+        assert gzip.decompress(data_file.read()).decode() == text  # Membres gzip concaténés
+    assert text.split('\n')[:-1] == written
+    with open(trigram_path, encoding='utf-8') as trigram_file:
+        assert len(trigram_file.readlines()) == len(blocks)
+
+
+def test_read_window_decompresses_only_overlapping_blocks(archive):
+    base = day_start()
+    archive.append(lines(base, 20))
+    archive.flush()
+    archive.append(lines(base, 2, 20))  # Bloc en cours, non compressé
+
+    before = archive.load_index(format_log_time(base)[:10])
+    window = archive.read_window(base + timedelta(minutes=5), base + timedelta(minutes=8))
+    assert window == lines(base, 4, 5)
+    assert archive.read_window(base + timedelta(minutes=19), base + timedelta(minutes=30)) == lines(base, 3, 19)
+    assert archive.read_window(base, base + timedelta(minutes=30), limit=2) == lines(base, 2, 20)
+    assert len(before) == len(archive.load_index(format_log_time(base)[:10]))
+
+
+def test_lines_already_archived_are_skipped_after_restart(tmp_path):
+    base = day_start()
+    first = LogArchive(str(tmp_path), block_bytes=300)
+    first.append(lines(base, 10))
+    first.close()
+
+    # La fin du log est relue au redémarrage : seules les lignes nouvelles sont ajoutées
+    second = LogArchive(str(tmp_path), block_bytes=300)
+    second.append(lines(base, 15))
+    second.close()
+    assert second.read_window(base, base + timedelta(hours=1)) == lines(base, 15)
+
+
+def test_read_only_archive_refuses_writes_and_serves_published_buffer(tmp_path):
+    base = day_start()
+    reader = LogArchive(str(tmp_path), read_only=True)
+    with pytest.raises(RuntimeError):
+        reader.append(lines(base, 1))
+    reader.set_buffered_lines(lines(base, 3))
+    reader.close()
+    assert reader.read_window(base, base + timedelta(minutes=1)) == lines(base, 2)
+
+
+def test_block_trigrams_ignore_line_boundaries():
+    assert block_trigrams('Abc\nde') == {'abc'}
+
+
+def test_zstd_blocks_round_trip(tmp_path):
+    pytest.importorskip('zstandard')
+    archive = LogArchive(str(tmp_path), block_bytes=300, codec='zstd')
+    archive.append(lines(day_start(), 20))
+    archive.close()
+    assert archive.segment_paths('x')[0].endswith('.zst')
+    assert archive.read_window(day_start(), day_start() + timedelta(hours=1)) == lines(day_start(), 20)
@@ -0,0 +1,117 @@
+"""Tests du miroir local du log distant : plage contiguë, reprise, compaction, fenêtres de temps"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import log_mirror
+from log_archive import format_log_time
+from log_mirror import LogMirror
+
+LINES = b''.join(b'ligne %03d\n' % i for i in range(100))  # 10 octets par ligne
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    return LogMirror(str(tmp_path))
+
+
+def test_appends_at_remote_end_stay_contiguous(mirror):
+    mirror.append(LINES[:300], 1000, 1300)
+    mirror.append(LINES[300:500], 1300, 1500)
+    assert (mirror.base, mirror.length, mirror.remote_end) == (1000, 500, 1500)
+    assert mirror.tail(30) == (1470, LINES[470:500])
+    assert mirror.tail(10_000) == (1000, LINES[:500])
+
+
+def test_gap_or_rotation_restarts_mirror_at_new_position(mirror):
+    resets = log_mirror.MIRROR_RESETS.value()
+    mirror.append(LINES[:100], 0, 100)
+
+    # Saut de lecture (retard rattrapé) : les octets manquants ne sont pas comblés
+    mirror.append(LINES[200:300], 200, 300)
+    assert (mirror.base, mirror.length) == (200, 100)
+    assert mirror.tail(1000) == (200, LINES[200:300])
+
+    # Rotation : fichier distant plus court que la fin du miroir
+    mirror.append(LINES[:50], 300, 250)
+    assert (mirror.base, mirror.length) == (300, 50)
+    assert mirror.tail(1000) == (300, LINES[:50])
+    assert log_mirror.MIRROR_RESETS.value() == resets + 2
+
+    # Lecture vide à la suite : rien ne change
+    mirror.append(b'', 350, 350)
+    assert (mirror.base, mirror.length) == (300, 50)
+
+
+def test_load_drops_bytes_written_after_last_meta(tmp_path):
+    first = LogMirror(str(tmp_path))
+    first.append(LINES[:200], 500, 700)
+    with open(first.path, 'ab') as mirror_file:
+        mirror_file.write(b'ligne interrom')  # Arrêt entre l'écriture et la mise à jour du .json
+
+    second = LogMirror(str(tmp_path))
+    assert (second.base, second.length) == (500, 200)
+    with open(second.path, 'rb') as mirror_file:
+        assert mirror_file.read() == LINES[:200]
+    second.append(LINES[200:250], 700, 750)
+    assert second.tail(1000) == (500, LINES[:250])
+
+
+def test_load_restarts_when_file_is_shorter_than_meta(tmp_path):
+    first = LogMirror(str(tmp_path))
+    first.append(LINES[:200], 0, 200)
+    with open(first.meta_path, 'w', encoding='utf-8') as meta_file:
+        json.dump({'base': 0, 'length': 400}, meta_file)
+
+    second = LogMirror(str(tmp_path))
+    assert (second.base, second.length) == (0, 0)
+    assert second.tail(100) == (0, b'')
+
+
+def test_compaction_keeps_second_half_cut_at_line_end(tmp_path):
+    mirror = LogMirror(str(tmp_path), max_bytes=400)
+    mirror.append(LINES[:395], 0, 395)
+    mirror.append(LINES[395:415], 395, 415)
+    # 415 > 400 : on garde au moins 200 octets, à partir du début d'une ligne
+    assert mirror.remote_end == 415
+    assert mirror.base == 220 and mirror.length == 195
+    assert mirror.tail(1000) == (220, LINES[220:415])
+    mirror.append(LINES[415:500], 415, 500)
+    assert mirror.tail(1000) == (mirror.base, LINES[mirror.base:500])
+
+    reloaded = LogMirror(str(tmp_path), max_bytes=400)
+    assert (reloaded.base, reloaded.length) == (mirror.base, mirror.length)
+
+
+def log_lines(base, minutes):
+    """Lignes Icarus horodatées (une par minute) suivies d'une ligne de continuation sans horodatage"""
+    return b''.join(b'[%s]LogTemp: Display: minute %d\n  suite %d\n' % (format_log_time(base + timedelta(minutes=m)).encode(), m, m)
+                    for m in minutes)
+
+
+def test_read_window_seeks_by_time_and_keeps_continuation_lines(mirror):
+    base = datetime(2026, 10, 19, 14, 0)
+    data = b'suite coupee\n' + log_lines(base, range(0, 60, 2)) + b'[2026.10.19-15.00'  # Fin incomplète
+    mirror.append(data, 5000, 5000 + len(data))
+
+    window = mirror.read_window(base + timedelta(minutes=9), base + timedelta(minutes=14))
+    assert window == log_lines(base, (10, 12, 14)).decode().splitlines()
+    assert mirror.read_window(base + timedelta(minutes=55), base + timedelta(hours=2)) == \
+        log_lines(base, (56, 58)).decode().splitlines()
+    assert mirror.read_window(base - timedelta(hours=1), base + timedelta(minutes=2), limit=3) == \
+        ['  suite 0', f'[{format_log_time(base + timedelta(minutes=2))}]LogTemp: Display: minute 2', '  suite 2']
+    assert mirror.read_window(base + timedelta(hours=2), base + timedelta(hours=3)) == []
+    assert mirror.covers(base) and not mirror.covers(base - timedelta(seconds=1))
+
+
+def test_read_window_survives_reset_during_read(mirror, tmp_path):
+    base = datetime(2026, 10, 19, 14, 0)
+    mirror.append(log_lines(base, range(5)), 0, 10_000)
+    _, view = mirror._view()
+    with view:
+        # Rotation pendant qu'une lecture tient le mmap : l'ancien fichier reste lisible
+        mirror.append(b'', 0, 10)
+        assert view[:1] == b'['
+    assert mirror.read_window(base, base + timedelta(hours=1)) == []
+    assert not LogMirror(str(tmp_path)).covers(base)
@@ -0,0 +1,54 @@
+"""Tests de la recherche plein texte : index de trigrammes par jour d'archive"""
+from datetime import timedelta
+
+import pytest
+
+from log_archive import LogArchive, format_log_time
+from log_search import LogSearch
+from test_log_archive import day_start
+
+
+def line(base, minute, text):
+    return f'[{format_log_time(base + timedelta(minutes=minute))}]LogTemp: Display: {text}'
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = LogArchive(str(tmp_path), block_bytes=200)
+    base = day_start()
+    archive.append([line(base, minute, f'Player{minute:02d} crafted Workbench') for minute in range(30)])
+    archive.append([line(base, 30, 'Rare DropShip arrivée'), line(base, 31, 'Player31 crafted Workbench')])
+    archive.flush()
+    return archive
+
+
+def test_only_blocks_with_all_trigrams_are_decompressed(archive):
+    base = day_start()
+    found, stats = LogSearch(archive).search('dropship', base, base + timedelta(hours=1))
+    assert found == [line(base, 30, 'Rare DropShip arrivée')]
+    assert stats['blocks'] > 3
+    assert stats['candidates'] == stats['scanned'] == 1
+
+
+def test_search_returns_latest_matches_in_log_order_within_window(archive):
+    base = day_start()
+    search = LogSearch(archive)
+    found, _ = search.search('WORKBENCH', base, base + timedelta(hours=1), limit=3)
+    assert found == [line(base, 28, 'Player28 crafted Workbench'), line(base, 29, 'Player29 crafted Workbench'),
+                     line(base, 31, 'Player31 crafted Workbench')]
+    found, _ = search.search('player0', base + timedelta(minutes=3), base + timedelta(minutes=5))
+    assert found == [line(base, minute, f'Player{minute:02d} crafted Workbench') for minute in (3, 4, 5)]
+
+
+def test_partition_picks_up_blocks_written_after_first_search(archive):
+    base = day_start()
+    search = LogSearch(archive)
+    assert search.search('nouveau', base, base + timedelta(hours=1))[0] == []
+    archive.append([line(base, 40, 'Prospect nouveau lancé')])
+    found, stats = search.search('nouveau', base, base + timedelta(hours=1))
+    assert found == [line(base, 40, 'Prospect nouveau lancé')]
+    assert stats['scanned'] == 0  # Encore dans le bloc en cours
+    archive.flush()
+    found, stats = search.search('nouveau', base, base + timedelta(hours=1))
+    assert found == [line(base, 40, 'Prospect nouveau lancé')]
+    assert stats['candidates'] == 1
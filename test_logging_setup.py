@@ -0,0 +1,55 @@
+"""Tests du logging en file : message figé à l'appel, limitation des messages répétitifs"""
+import logging
+import queue
+import time
+
+from logging_setup import RATE_LIMITED, DeferredQueueHandler, RateLimitFilter
+
+
+def record(msg, *args, rate_limited=False, level=logging.INFO):
+    result = logging.LogRecord('icarus_core', level, __file__, 1, msg, args, None)
+    if rate_limited:
+        result.__dict__.update(RATE_LIMITED)  # Comme logger.x(..., extra=RATE_LIMITED)
+    return result
+
+
+def test_event_logs_sharing_a_template_are_never_dropped():
+    limiter = RateLimitFilter(burst=3, window=60)
+    kept = [limiter.filter(record("🟢 CONNEXION détectée: %s", f'Player{i}')) for i in range(10)]
+    assert all(kept)
+
+
+def test_marked_records_are_limited_per_template_and_summarized():
+    limiter = RateLimitFilter(burst=2, window=0.05)
+    kept = [limiter.filter(record("❌ Erreur FTP: %s", 'timeout', rate_limited=True, level=logging.ERROR))
+            for _ in range(5)]
+    assert kept == [True, True, False, False, False]
+
+    time.sleep(0.06)
+    next_window = record("❌ Erreur FTP: %s", 'timeout', rate_limited=True, level=logging.ERROR)
+    assert limiter.filter(next_window)
+    assert next_window.getMessage() == "❌ Erreur FTP: timeout (+3 messages similaires supprimés)"
+
+
+
+def test_message_is_built_before_queueing_mutable_arguments():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    players = ['Player01']
+    handler.handle(record("👥 Joueurs: %s", players))
+    players.append('Player02')  # La boucle continue de modifier l'objet passé en argument
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "👥 Joueurs: ['Player01']"
+    assert queued.args is None
+
+
+def test_suppressed_count_is_part_of_the_queued_message():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter(burst=1, window=0.05))
+    for _ in range(3):
+        handler.handle(record("Erreur 100%", rate_limited=True))
+    time.sleep(0.06)
+    handler.handle(record("Erreur 100%", rate_limited=True))
+    messages = [log_queue.get_nowait().getMessage() for _ in range(log_queue.qsize())]
+    assert messages == ["Erreur 100%", "Erreur 100% (+2 messages similaires supprimés)"]